@@ -0,0 +1,84 @@
+"""Time to first token for delegated tasks: strands' A2A client tools against DelegationToolProvider.
+
+Usage:
+    python -m benchmarks.bench_delegation [--calls 20] [--token-delay-ms 40]
+
+Sends the same message to a local stub A2A agent (benchmarks/stub_a2a.py)
+through strands' A2AClientToolProvider, which waits for the finished task,
+and through DelegationToolProvider, which streams it. Reports when the first
+piece of the delegated reply is available to relay (for the stock client,
+only once the whole task is done), the total time per call, and how many
+agent card fetches and TCP connections reached the stub.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from strands_tools.a2a_client import A2AClientToolProvider
+
+from benchmarks.stub_a2a import StubAgent
+from src.agents.delegation import DelegationToolProvider
+
+
+async def stock_call(provider, url):
+    start = time.perf_counter()
+    result = await provider._send_message("What is the status of the office sensor", url)
+    if result["status"] != "success":
+        raise RuntimeError(result["error"])
+    elapsed = time.perf_counter() - start
+    return elapsed, elapsed
+
+
+async def streamed_call(provider, url):
+    start = time.perf_counter()
+    first = None
+    async for event in provider._stream_message("What is the status of the office sensor", url):
+        if "relay" in event and first is None:
+            first = time.perf_counter() - start
+    if event.get("status") != "success":
+        raise RuntimeError(event.get("error"))
+    elapsed = time.perf_counter() - start
+    return first if first is not None else elapsed, elapsed
+
+
+async def run(provider, call, calls, token_delay_ms):
+    stub = StubAgent(token_delay_ms=token_delay_ms).start()
+    try:
+        samples = [await call(provider, stub.url) for _ in range(calls)]
+    finally:
+        if isinstance(provider, DelegationToolProvider):
+            await provider.aclose()
+        elif provider._httpx_client is not None:
+            await provider._httpx_client.aclose()
+        stub.stop()
+    first = sorted(s[0] * 1000 for s in samples)
+    total = sorted(s[1] * 1000 for s in samples)
+    return {
+        "first_p50": first[len(first) // 2],
+        "first_mean": statistics.fmean(first),
+        "total_p50": total[len(total) // 2],
+        "card_requests": stub.card_requests,
+        "connections": len(stub.connections),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare delegated-task latency with and without streaming relay")
+    parser.add_argument("--calls", type=int, default=20)
+    parser.add_argument("--token-delay-ms", type=float, default=40)
+    args = parser.parse_args()
+
+    results = {
+        "stock": asyncio.run(run(A2AClientToolProvider(), stock_call, args.calls, args.token_delay_ms)),
+        "streamed": asyncio.run(run(DelegationToolProvider(), streamed_call, args.calls,
+                                    args.token_delay_ms)),
+    }
+    print(f"{'client':<10} {'first ms p50':>13} {'first ms mean':>14} {'total ms p50':>13} {'cards':>6} {'conns':>6}")
+    for name, r in results.items():
+        print(f"{name:<10} {r['first_p50']:>13.1f} {r['first_mean']:>14.1f} {r['total_p50']:>13.1f} "
+              f"{r['card_requests']:>6} {r['connections']:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Per-tool-call overhead of the in-process MCP transport against HTTP.
+
+Usage:
+    python -m benchmarks.bench_mcp_transport [--calls 200] [--fixture benchmarks/fixtures/maker_api.json]
+
+Runs the Hubitat MCP server both ways inside this process: over streamable
+HTTP on a local port (what `hubitat-agent` does with the `hubitat-mcp`
+container) and over the in-memory transport (MCP_TRANSPORT=inprocess). The
+device cache is seeded from the Maker API fixture so no hub is needed and the
+numbers are transport overhead plus tool shaping only.
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import threading
+import time
+import uuid
+from pathlib import Path
+
+# Seeded entries must outlive the run
+os.environ.setdefault("HUB_CACHE_TTL", "3600")
+
+import uvicorn
+from mcp.client.streamable_http import streamablehttp_client
+from strands_tools.mcp_client import MCPClient
+
+from src.mcp.hubitat_mcp import device_cache, mcp
+from src.mcp.memory_transport import memory_transport
+
+DEFAULT_FIXTURE = Path(__file__).parent / "fixtures" / "maker_api.json"
+
+
+def seed(fixture):
+    device_cache.set("devices", fixture["devices"])
+    details = fixture["device_details"]
+    device_cache.set(f"devices/{details['id']}", details)
+    return details["id"]
+
+
+def start_http_server():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(mcp.http_app(), host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, f"http://127.0.0.1:{port}/mcp"
+
+
+def measure(client, name, arguments, calls):
+    # A few untimed calls so connection setup isn't counted
+    for _ in range(5):
+        client.call_tool_sync(str(uuid.uuid4()), name, arguments)
+    samples = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        result = client.call_tool_sync(str(uuid.uuid4()), name, arguments)
+        samples.append((time.perf_counter() - start) * 1000)
+        if result["status"] != "success":
+            raise RuntimeError(f"{name} failed: {result['content']}")
+    samples.sort()
+    return {
+        "mean": statistics.fmean(samples),
+        "p50": samples[len(samples) // 2],
+        "p95": samples[int(len(samples) * 0.95) - 1],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare MCP tool-call overhead over HTTP and in-process")
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--fixture", default=str(DEFAULT_FIXTURE))
+    args = parser.parse_args()
+
+    device_id = seed(json.loads(Path(args.fixture).read_text()))
+    tools = {
+        "cache_stats": {},
+        "device_details": {"device_id": device_id},
+        "list_devices": {},
+    }
+
+    server, url = start_http_server()
+    transports = {
+        "http": lambda: streamablehttp_client(url),
+        "inprocess": lambda: memory_transport(mcp),
+    }
+    results = {}
+    try:
+        for mode, transport in transports.items():
+            with MCPClient(transport) as client:
+                for tool, arguments in tools.items():
+                    results[(mode, tool)] = measure(client, tool, arguments, args.calls)
+    finally:
+        server.should_exit = True
+
+    print(f"{'tool':<16} {'mode':<10} {'mean ms':>8} {'p50 ms':>8} {'p95 ms':>8} {'speedup':>8}")
+    for tool in tools:
+        for mode in transports:
+            r = results[(mode, tool)]
+            speedup = results[("http", tool)]["mean"] / r["mean"]
+            print(f"{tool:<16} {mode:<10} {r['mean']:>8.2f} {r['p50']:>8.2f} {r['p95']:>8.2f} {speedup:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Bytes and tokens saved by field projection and compact encoding.
+
+Usage:
+    python -m benchmarks.bench_output [--fixture benchmarks/fixtures/maker_api.json]
+
+Runs the same shaping the MCP tools use over a Maker API fixture and reports
+the payload size of each output mode against the raw JSON. Tokens are
+estimated at ~4 characters per token, which is close enough for comparing
+modes against each other.
+"""
+import argparse
+import json
+from pathlib import Path
+
+from src.mcp.output import encode, paginate, project
+
+DEFAULT_FIXTURE = Path(__file__).parent / "fixtures" / "maker_api.json"
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def history(events, offset=0, limit=50, fields=None, compact=False):
+    page = paginate(events, offset=offset, limit=limit)
+    page["events"] = project(page.pop("items"), fields)
+    return encode(page, compact=compact)
+
+
+def scenarios(fixture):
+    devices = fixture["devices"]
+    details = fixture["device_details"]
+    events = fixture["device_history"]
+    return {
+        "list_devices": (json.dumps(devices), {
+            "fields": encode(devices, fields=["id", "label", "type"]),
+            "compact": encode(devices, compact=True),
+            "fields+compact": encode(devices, fields=["id", "label", "type"], compact=True),
+        }),
+        "device_details": (json.dumps(details), {
+            "fields": encode(details, fields=["id", "label", "attributes"]),
+            "compact": encode(details, compact=True),
+            "fields+compact": encode(details, fields=["id", "label", "attributes"], compact=True),
+        }),
+        "device_history": (json.dumps(events), {
+            "page": history(events),
+            "page+fields": history(events, fields=["name", "value", "date"]),
+            "page+fields+compact": history(events, fields=["name", "value", "date"], compact=True),
+        }),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure MCP tool output size per encoding mode")
+    parser.add_argument("--fixture", default=str(DEFAULT_FIXTURE))
+    args = parser.parse_args()
+
+    fixture = json.loads(Path(args.fixture).read_text())
+    print(f"{'tool':<16} {'mode':<22} {'bytes':>8} {'tokens':>8} {'saved':>7}")
+    for tool, (raw, modes) in scenarios(fixture).items():
+        raw_bytes = len(raw.encode())
+        print(f"{tool:<16} {'raw':<22} {raw_bytes:>8} {estimate_tokens(raw):>8} {'':>7}")
+        for mode, text in modes.items():
+            size = len(text.encode())
+            saved = 1 - size / raw_bytes
+            print(f"{tool:<16} {mode:<22} {size:>8} {estimate_tokens(text):>8} {saved:>7.1%}")
+
+
+if __name__ == "__main__":
+    main()
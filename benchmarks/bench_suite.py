@@ -0,0 +1,293 @@
+"""End-to-end latency benchmarks against a fake hub and a scripted model.
+
+Usage:
+    python -m benchmarks.bench_suite [--scenarios mcp,hubitat_agent,home_agent,outlets]
+        [--devices 50] [--hub-latency-ms 30] [--model-latency-ms 0]
+        [--iterations 20] [--concurrency 4] [--json results.json] [--compare baseline.json]
+
+Starts a FakeHub in this process and the real servers as subprocesses
+(`hubitat-mcp` on 8888, `hubitat-agent` on 9002, `home-agent` on 9001, so
+those ports must be free) with LLM_PROVIDER=scripted, then drives them:
+
+- mcp: each MCP tool called directly over streamable HTTP
+- hubitat_agent: A2A requests to the Hubitat agent (model -> MCP -> hub)
+- home_agent: A2A requests to the Home agent, one on the fast path and one
+  delegated to the Hubitat agent
+- outlets: the README's "Turn off all outlets" workflow through the Home agent
+
+Each operation runs `iterations` x `concurrency` times. The report shows
+p50/p95/p99 latency, throughput and how many requests reached the hub per
+operation. `--json` saves the results and `--compare` exits non-zero if any
+p95 regressed by more than `--tolerance` against a saved run.
+"""
+from pathlib import Path
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+import httpx
+from mcp.client.streamable_http import streamablehttp_client
+from strands_tools.mcp_client import MCPClient
+
+from benchmarks.fake_hub import FakeHub
+
+ROOT = Path(__file__).resolve().parent.parent
+MCP_PORT, HUBITAT_PORT, HOME_PORT = 8888, 9002, 9001
+
+SERVERS = {
+    "mcp": ("src.mcp.hubitat_mcp", MCP_PORT),
+    "hubitat_agent": ("src.agents.hubitat_a2a", HUBITAT_PORT),
+    "home_agent": ("src.agents.home_a2a", HOME_PORT),
+}
+# Servers each scenario needs, in start order
+NEEDS = {
+    "mcp": ["mcp"],
+    "hubitat_agent": ["mcp", "hubitat_agent"],
+    "home_agent": ["mcp", "hubitat_agent", "home_agent"],
+    "outlets": ["mcp", "hubitat_agent", "home_agent"],
+}
+
+
+def percentile(samples, p):
+    """Nearest-rank percentile of already sorted samples."""
+    if not samples:
+        return 0.0
+    return samples[min(len(samples) - 1, max(0, round(p * len(samples) + 0.5) - 1))]
+
+
+def port_in_use(port):
+    with socket.socket() as s:
+        return s.connect_ex(("127.0.0.1", port)) == 0
+
+
+class Servers:
+    """Runs the MCP server and A2A agents as subprocesses pointed at the fake hub."""
+
+    def __init__(self, hub_url, model_latency_ms):
+        self.env = {
+            **os.environ,
+            "HUB_HOST": hub_url,
+            "HUB_ACCESS_TOKEN": "bench",
+            "HUB_METADATA_DB": ":memory:",
+            "LLM_PROVIDER": "scripted",
+            "LLM_CACHE": "false",
+            "LLM_ROUTER": "false",
+            "SCRIPTED_MODEL_LATENCY_MS": str(model_latency_ms),
+            "MCP_SERVER_HOST": "127.0.0.1",
+            "MCP_TRANSPORT": "http",
+            "HUBITAT_AGENT_URL": f"http://127.0.0.1:{HUBITAT_PORT}",
+            "A2A_HOST": "127.0.0.1",
+            "PYTHONUNBUFFERED": "1",
+        }
+        self.logs = Path(tempfile.mkdtemp(prefix="bench-suite-"))
+        self.processes = {}
+
+    def start(self, name):
+        if name in self.processes:
+            return
+        module, port = SERVERS[name]
+        if port_in_use(port):
+            raise RuntimeError(f"Port {port} is in use; stop the running {name} before benchmarking")
+        env = {**self.env, "A2A_HTTP_URL": f"http://127.0.0.1:{port}"}
+        log = open(self.logs / f"{name}.log", "w")
+        self.processes[name] = subprocess.Popen(
+            [sys.executable, "-m", module], cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT
+        )
+        deadline = time.monotonic() + 60
+        while not port_in_use(port):
+            if self.processes[name].poll() is not None or time.monotonic() > deadline:
+                tail = (self.logs / f"{name}.log").read_text()[-2000:]
+                raise RuntimeError(f"{name} failed to start:\n{tail}")
+            time.sleep(0.2)
+
+    def stop(self):
+        for process in reversed(list(self.processes.values())):
+            process.terminate()
+        for process in self.processes.values():
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+
+async def a2a_send(client, url, text, context_id):
+    """Send one A2A message/send request and return the reply text."""
+    response = await client.post(url, json={
+        "jsonrpc": "2.0",
+        "id": uuid.uuid4().hex,
+        "method": "message/send",
+        "params": {"message": {
+            "kind": "message", "role": "user", "messageId": uuid.uuid4().hex, "contextId": context_id,
+            "parts": [{"kind": "text", "text": text}],
+        }},
+    })
+    response.raise_for_status()
+    body = response.json()
+    if "error" in body:
+        raise RuntimeError(body["error"])
+    task = body["result"]
+    if task.get("status", {}).get("state") != "completed":
+        raise RuntimeError(f"Task ended in state {task.get('status', {}).get('state')}")
+    return " ".join(p.get("text", "") for a in task.get("artifacts", []) for p in a.get("parts", []))
+
+
+def mcp_operations(client, hub):
+    devices = list(hub.devices.values())
+    outlet = next(d for d in devices if "Outlet" in d["label"])
+    sensors = [d["id"] for d in devices if "Sensor" in d["label"]][:5]
+
+    async def call(name, arguments):
+        result = await client.call_tool_async(uuid.uuid4().hex, name, arguments)
+        if result["status"] != "success":
+            raise RuntimeError(f"{name} failed: {result['content']}")
+
+    return {
+        "list_devices": lambda _: call("list_devices", {}),
+        "list_devices compact": lambda _: call("list_devices", {"fields": ["id", "label"], "compact": True}),
+        "find_devices": lambda _: call("find_devices", {"query": outlet["label"].lower(), "limit": 3}),
+        "device_details": lambda _: call("device_details", {"device_id": outlet["id"]}),
+        "device_commands": lambda _: call("device_commands", {"device_id": outlet["id"]}),
+        "control_device": lambda _: call("control_device", {"device_id": outlet["id"], "command": "on"}),
+        "attribute_stats": lambda _: call("attribute_stats", {"attribute": "temperature", "device_ids": sensors}),
+    }
+
+
+def agent_operations(http, url, prompts):
+    return {name: (lambda worker, text=text: a2a_send(http, url, text, f"bench-{worker}"))
+            for name, text in prompts.items()}
+
+
+async def run_operation(operation, iterations, concurrency, hub):
+    """Run `operation` iterations x concurrency times; return latency/throughput/hub stats."""
+    samples, errors = [], []
+    hub_before = hub.total_requests()
+
+    async def worker(worker_id):
+        for _ in range(iterations):
+            start = time.perf_counter()
+            try:
+                await operation(worker_id)
+                samples.append((time.perf_counter() - start) * 1000)
+            except Exception as e:
+                errors.append(str(e))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    samples.sort()
+    runs = iterations * concurrency
+    return {
+        "runs": runs,
+        "errors": len(errors),
+        "first_error": errors[0][:200] if errors else None,
+        "p50_ms": round(percentile(samples, 0.50), 2),
+        "p95_ms": round(percentile(samples, 0.95), 2),
+        "p99_ms": round(percentile(samples, 0.99), 2),
+        "throughput": round(len(samples) / elapsed, 2) if elapsed else 0.0,
+        "hub_requests_per_op": round((hub.total_requests() - hub_before) / runs, 2),
+    }
+
+
+async def run_scenarios(args, hub, servers):
+    results = {}
+    http = httpx.AsyncClient(timeout=120)
+    try:
+        for scenario in args.scenarios:
+            for name in NEEDS[scenario]:
+                servers.start(name)
+            mcp_client = None
+            if scenario == "mcp":
+                mcp_client = MCPClient(lambda: streamablehttp_client(f"http://127.0.0.1:{MCP_PORT}/mcp"))
+                mcp_client.start()
+                operations = mcp_operations(mcp_client, hub)
+            elif scenario == "hubitat_agent":
+                operations = agent_operations(http, f"http://127.0.0.1:{HUBITAT_PORT}/", {
+                    "turn on a device": "Turn on the kitchen outlet 1",
+                    "device status": "What is the status of the office sensor 1",
+                })
+            elif scenario == "home_agent":
+                operations = agent_operations(http, f"http://127.0.0.1:{HOME_PORT}/", {
+                    "fast path command": "Turn off the kitchen outlet 1",
+                    "delegated status": "What is the status of the office sensor 1",
+                })
+            else:
+                operations = agent_operations(http, f"http://127.0.0.1:{HOME_PORT}/", {
+                    "turn off all outlets": "Turn off all outlets",
+                })
+            try:
+                for name, operation in operations.items():
+                    # One untimed call so start-up work (connections, index build) isn't measured
+                    await run_operation(operation, 1, 1, hub)
+                    results[f"{scenario}/{name}"] = await run_operation(operation, args.iterations, args.concurrency, hub)
+                    print(f"  {scenario}/{name}: done", file=sys.stderr)
+            finally:
+                if mcp_client is not None:
+                    mcp_client.stop(None, None, None)
+    finally:
+        await http.aclose()
+    return results
+
+
+def report(results, baseline=None):
+    print(f"{'operation':<40} {'runs':>5} {'err':>4} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'ops/s':>8} {'hub/op':>7}"
+          + (f" {'p95 vs base':>12}" if baseline else ""))
+    regressions = []
+    for name, r in results.items():
+        line = (f"{name:<40} {r['runs']:>5} {r['errors']:>4} {r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} "
+                f"{r['p99_ms']:>8.1f} {r['throughput']:>8.1f} {r['hub_requests_per_op']:>7.2f}")
+        if baseline and name in baseline and baseline[name]["p95_ms"]:
+            change = r["p95_ms"] / baseline[name]["p95_ms"] - 1
+            line += f" {change:>+11.0%}"
+            regressions.append((name, change))
+        print(line)
+        if r["first_error"]:
+            print(f"    first error: {r['first_error']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the MCP server and A2A agents offline")
+    parser.add_argument("--scenarios", default="mcp,hubitat_agent,home_agent,outlets")
+    parser.add_argument("--devices", type=int, default=50)
+    parser.add_argument("--hub-latency-ms", type=float, default=30)
+    parser.add_argument("--model-latency-ms", type=float, default=0)
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--compare", help="baseline results file from an earlier --json run")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed p95 regression (0.25 = +25%%)")
+    args = parser.parse_args()
+    args.scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    unknown = set(args.scenarios) - set(NEEDS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    hub = FakeHub(devices=args.devices, latency_ms=args.hub_latency_ms).start()
+    servers = Servers(hub.url, args.model_latency_ms)
+    print(f"Fake hub: {args.devices} devices, {args.hub_latency_ms:.0f} ms latency; "
+          f"server logs in {servers.logs}", file=sys.stderr)
+    try:
+        results = asyncio.run(run_scenarios(args, hub, servers))
+    finally:
+        servers.stop()
+        hub.stop()
+
+    baseline = json.loads(Path(args.compare).read_text()) if args.compare else None
+    regressions = report(results, baseline)
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+    failed = [name for name, change in regressions if change > args.tolerance]
+    if failed:
+        print(f"p95 regressed more than {args.tolerance:.0%}: {', '.join(failed)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
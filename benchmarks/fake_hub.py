@@ -0,0 +1,179 @@
+"""Local stand-in for the Hubitat Maker API.
+
+Usage:
+    python -m benchmarks.fake_hub --devices 50 --latency-ms 40 --port 18080
+    HUB_HOST=http://127.0.0.1:18080/apps/api/1 HUB_ACCESS_TOKEN=bench uv run hubitat-mcp
+
+    from benchmarks.fake_hub import FakeHub
+    hub = FakeHub(devices=50, latency_ms=40).start()   # hub.url -> HUB_HOST
+
+Serves the Maker API endpoints the MCP server uses (device list, details,
+events, capabilities, commands and device commands) for a generated house of
+outlets, dimmers, multisensors and locks. Every request sleeps `latency_ms`
+to stand in for the hub's response time, commands change device state, and
+`requests` counts what reached the hub per endpoint kind.
+"""
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+import argparse
+import json
+import threading
+import time
+
+ROOMS = ["Kitchen", "Office", "Living Room", "Bedroom", "Garage"]
+KINDS = [
+    ("Outlet", "Generic Zigbee Outlet", ["Switch", "Outlet", "Actuator", "Refresh"], ["on", "off", "refresh"],
+     {"switch": "off"}),
+    ("Lamp", "Generic Z-Wave Dimmer", ["Switch", "SwitchLevel", "Actuator"], ["on", "off", "setLevel"],
+     {"switch": "off", "level": 0}),
+    ("Sensor", "Aeotec MultiSensor 6", ["TemperatureMeasurement", "RelativeHumidityMeasurement", "MotionSensor", "Battery"],
+     ["refresh"], {"temperature": 70.0, "humidity": 40, "motion": "inactive", "battery": 90}),
+    ("Lock", "Generic Z-Wave Lock", ["Lock", "Battery", "Actuator"], ["lock", "unlock"],
+     {"lock": "locked", "battery": 80}),
+]
+
+
+def make_devices(count):
+    devices = {}
+    for i in range(count):
+        label, driver, capabilities, commands, attributes = KINDS[i % len(KINDS)]
+        room = ROOMS[(i // len(KINDS)) % len(ROOMS)]
+        device_id = str(100 + i)
+        devices[device_id] = {
+            "id": device_id,
+            "name": driver,
+            "label": f"{room} {label} {i // (len(KINDS) * len(ROOMS)) + 1}",
+            "type": driver,
+            "room": room,
+            "capabilities": capabilities,
+            "commands": commands,
+            "attributes": dict(attributes),
+        }
+    return devices
+
+
+class FakeHub:
+    """Threaded Maker API server over generated devices."""
+
+    def __init__(self, devices=20, latency_ms=0.0, port=0, history=48):
+        self.devices = make_devices(devices)
+        self.latency = latency_ms / 1000
+        self.history = history
+        self.requests = Counter()
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        self.url = f"http://127.0.0.1:{self.port}/apps/api/1"
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, name="fake-hub", daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+
+    def total_requests(self):
+        with self._lock:
+            return sum(self.requests.values())
+
+    def details(self, device):
+        return {
+            **{k: device[k] for k in ("id", "name", "label", "type", "room")},
+            "attributes": [
+                {"name": name, "currentValue": value, "dataType": "NUMBER" if isinstance(value, (int, float)) else "ENUM"}
+                for name, value in device["attributes"].items()
+            ],
+            "capabilities": device["capabilities"],
+            "commands": device["commands"],
+        }
+
+    def events(self, device):
+        now = time.time()
+        events = []
+        for n in range(self.history):
+            for name, value in device["attributes"].items():
+                if isinstance(value, (int, float)):
+                    value = round(value + (n % 7) - 3, 1)
+                events.append({
+                    "device_id": device["id"], "label": device["label"], "name": name, "value": str(value),
+                    "date": time.strftime("%Y-%m-%dT%H:%M:%S+0000", time.gmtime(now - n * 600)),
+                })
+        return events
+
+    def command(self, device, command, argument):
+        attributes = device["attributes"]
+        if command in ("on", "off"):
+            attributes["switch"] = command
+        elif command == "setLevel" and argument is not None:
+            attributes["level"] = int(argument)
+            attributes["switch"] = "on" if int(argument) else "off"
+        elif command in ("lock", "unlock"):
+            attributes["lock"] = f"{command}ed"
+        return self.details(device)
+
+    def route(self, parts):
+        """Return (kind, body) for a path below /apps/api/<app>/."""
+        if parts == ["devices"]:
+            return "list", [{k: d[k] for k in ("id", "name", "label", "type", "room")} for d in self.devices.values()]
+        if parts == ["devices", "all"]:
+            return "list_all", [self.details(d) for d in self.devices.values()]
+        if len(parts) < 2 or parts[0] != "devices" or parts[1] not in self.devices:
+            return "not_found", None
+        device = self.devices[parts[1]]
+        if len(parts) == 2:
+            return "details", self.details(device)
+        if parts[2] == "events":
+            return "events", self.events(device)
+        if parts[2] == "capabilities":
+            return "capabilities", {"capabilities": device["capabilities"]}
+        if parts[2] == "commands":
+            return "commands", [{"command": c} for c in device["commands"]]
+        if parts[2] in device["commands"]:
+            with self._lock:
+                return "command", self.command(device, parts[2], parts[3] if len(parts) > 3 else None)
+        return "not_found", None
+
+    def _handler(self):
+        hub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                parts = [p for p in urlparse(self.path).path.split("/") if p]
+                # /apps/api/<app id>/...
+                kind, body = hub.route(parts[3:]) if parts[:2] == ["apps", "api"] else ("not_found", None)
+                with hub._lock:
+                    hub.requests[kind] += 1
+                if hub.latency:
+                    time.sleep(hub.latency)
+                payload = json.dumps(body).encode()
+                self.send_response(404 if body is None else 200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a fake Hubitat Maker API")
+    parser.add_argument("--devices", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--port", type=int, default=18080)
+    args = parser.parse_args()
+
+    hub = FakeHub(devices=args.devices, latency_ms=args.latency_ms, port=args.port)
+    print(f"Fake hub with {args.devices} devices at {hub.url}")
+    try:
+        hub.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Local stand-in for a downstream A2A agent.
+
+Usage:
+    python -m benchmarks.stub_a2a --port 19002 --token-delay-ms 40
+    HUBITAT_AGENT_URL=http://127.0.0.1:19002 uv run home-agent
+
+    from benchmarks.stub_a2a import StubAgent
+    stub = StubAgent(token_delay_ms=40).start()   # stub.url -> HUBITAT_AGENT_URL
+
+Serves an agent card and answers every message with a fixed reply, one word
+per working-status update with `token_delay_ms` between words to stand in
+for a model generating it, then the whole reply as the task's artifact (the
+same events a strands A2AServer sends). `card_requests` counts agent card
+fetches and `connections` the distinct TCP connections that reached it.
+"""
+import argparse
+import asyncio
+import socket
+import threading
+import time
+
+import uvicorn
+from a2a.server.agent_execution import AgentExecutor
+from a2a.server.apps import A2AStarletteApplication
+from a2a.server.request_handlers import DefaultRequestHandler
+from a2a.server.tasks import InMemoryTaskStore, TaskUpdater
+from a2a.types import AgentCapabilities, AgentCard, AgentSkill, Part, TaskState, TextPart
+from a2a.utils import new_agent_text_message, new_task
+from a2a.utils.constants import AGENT_CARD_WELL_KNOWN_PATH
+
+DEFAULT_REPLY = "The kitchen outlet is off and the office sensor reads 70 degrees with 40% humidity."
+
+
+class StubExecutor(AgentExecutor):
+    def __init__(self, reply, token_delay):
+        self.reply = reply
+        self.token_delay = token_delay
+
+    async def execute(self, context, event_queue):
+        task = context.current_task
+        if not task:
+            task = new_task(context.message)
+            await event_queue.enqueue_event(task)
+        updater = TaskUpdater(event_queue, task.id, task.context_id)
+        for n, word in enumerate(self.reply.split(" ")):
+            await asyncio.sleep(self.token_delay)
+            await updater.update_status(
+                TaskState.working, new_agent_text_message(word if n == 0 else " " + word, task.context_id, task.id)
+            )
+        await updater.add_artifact([Part(root=TextPart(text=self.reply))], name="agent_response")
+        await updater.complete()
+
+    async def cancel(self, context, event_queue):
+        # Replies are short and scripted; a cancelled one is simply left to finish
+        return None
+
+
+class StubAgent:
+    """A2A server on a background thread with a scripted, word-by-word streamed reply."""
+
+    def __init__(self, reply=DEFAULT_REPLY, token_delay_ms=40.0, port=0, streaming=True):
+        self.port = port or _free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        self.card_requests = 0
+        self.connections = set()
+        card = AgentCard(
+            name="Stub Agent",
+            description="Answers every message with a fixed reply",
+            url=self.url + "/",
+            version="1.0.0",
+            default_input_modes=["text"],
+            default_output_modes=["text"],
+            capabilities=AgentCapabilities(streaming=streaming),
+            skills=[AgentSkill(id="reply", name="reply", description="Fixed reply", tags=[])],
+        )
+        handler = DefaultRequestHandler(StubExecutor(reply, token_delay_ms / 1000), InMemoryTaskStore())
+        app = A2AStarletteApplication(agent_card=card, http_handler=handler).build()
+        self.server = uvicorn.Server(uvicorn.Config(self._counting(app), host="127.0.0.1", port=self.port,
+                                                    log_level="warning"))
+
+    def _counting(self, app):
+        async def counted(scope, receive, send):
+            if scope["type"] == "http":
+                self.connections.add(tuple(scope.get("client") or ()))
+                if scope["path"] == AGENT_CARD_WELL_KNOWN_PATH:
+                    self.card_requests += 1
+            await app(scope, receive, send)
+        return counted
+
+    def start(self):
+        threading.Thread(target=self.server.run, name="stub-a2a", daemon=True).start()
+        deadline = time.monotonic() + 10
+        while not self.server.started:
+            if time.monotonic() > deadline:
+                raise RuntimeError("stub A2A agent did not start")
+            time.sleep(0.02)
+        return self
+
+    def stop(self):
+        self.server.should_exit = True
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a stub A2A agent")
+    parser.add_argument("--port", type=int, default=19002)
+    parser.add_argument("--token-delay-ms", type=float, default=40.0)
+    parser.add_argument("--reply", default=DEFAULT_REPLY)
+    args = parser.parse_args()
+
+    stub = StubAgent(reply=args.reply, token_delay_ms=args.token_delay_ms, port=args.port)
+    print(f"Stub A2A agent at {stub.url}")
+    stub.server.run()
+
+
+if __name__ == "__main__":
+    main()
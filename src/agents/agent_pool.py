@@ -0,0 +1,165 @@
+"""Per-session agent pool for A2A servers.
+
+Usage:
+    from .agent_pool import AgentPool, PooledA2AExecutor, serve_pooled
+    pool = AgentPool(lambda: Agent(model=model, tools=tools, ...))
+    serve_pooled(a2a_server, PooledA2AExecutor(template_agent, pool))
+
+A single `Agent` shared by every A2A request mixes all callers into one
+conversation history and serializes them. The pool keeps one agent per A2A
+context ID (one per household member / device conversation), built by a
+factory that reuses the same model and tool objects. Turns within a session
+run one at a time; different sessions run in parallel. Idle sessions are
+evicted after AGENT_POOL_IDLE_TTL seconds and the least recently used one is
+dropped once AGENT_POOL_SIZE is reached.
+
+a2a's RequestContext invents a context ID when the caller sends none, so
+`serve_pooled` installs a context builder that remembers whether the caller
+named a conversation; requests that didn't run on a one-off agent and stay
+out of the pool. While a turn runs, `current_session` holds its session ID so
+delegation can continue the same conversation downstream.
+"""
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Optional
+import asyncio
+import os
+import time
+
+from a2a.server.agent_execution import RequestContext
+from a2a.server.agent_execution.simple_request_context_builder import SimpleRequestContextBuilder
+from a2a.server.request_handlers import DefaultRequestHandler
+from a2a.types import TaskState
+from a2a.utils import new_agent_text_message
+from strands.multiagent.a2a.executor import StrandsA2AExecutor
+
+# Session ID of the turn running in this task, or None for a one-off request
+current_session: ContextVar[Optional[str]] = ContextVar("current_session", default=None)
+
+
+class _Session:
+    def __init__(self, agent):
+        self.agent = agent
+        self.lock = asyncio.Lock()
+        self.last_used = time.monotonic()
+
+
+class AgentPool:
+    """LRU pool of agents keyed by session ID."""
+
+    def __init__(self, factory: Callable[[], Any], max_size: Optional[int] = None, idle_ttl: Optional[float] = None):
+        self.factory = factory
+        self.max_size = max_size or int(os.getenv("AGENT_POOL_SIZE", "8"))
+        self.idle_ttl = idle_ttl if idle_ttl is not None else float(os.getenv("AGENT_POOL_IDLE_TTL", "1800"))
+        self._sessions: "OrderedDict[str, _Session]" = OrderedDict()
+        self._metrics = {"created": 0, "reused": 0, "evicted": 0}
+
+    def _evict(self, keep: str):
+        """Drop idle and least recently used sessions, never `keep` (the one being acquired)."""
+        now = time.monotonic()
+        for session_id, session in list(self._sessions.items()):
+            if session_id == keep or session.lock.locked():
+                continue
+            if len(self._sessions) > self.max_size or now - session.last_used > self.idle_ttl:
+                del self._sessions[session_id]
+                self._metrics["evicted"] += 1
+
+    @asynccontextmanager
+    async def session(self, session_id: Optional[str]):
+        """Yield the agent for `session_id`, holding it exclusively for one turn."""
+        if not session_id:
+            # No conversation to continue; a one-off agent keeps it out of the pool
+            self._metrics["created"] += 1
+            yield self.factory()
+            return
+        session = self._sessions.get(session_id)
+        if session is None:
+            session = self._sessions[session_id] = _Session(self.factory())
+            self._metrics["created"] += 1
+        else:
+            self._metrics["reused"] += 1
+        self._sessions.move_to_end(session_id)
+        self._evict(keep=session_id)
+        async with session.lock:
+            try:
+                yield session.agent
+            finally:
+                session.last_used = time.monotonic()
+
+    def stats(self) -> Dict[str, Any]:
+        context_tokens = [
+            getattr(s.agent.conversation_manager, "context_tokens", 0) for s in self._sessions.values()
+            if hasattr(s.agent, "conversation_manager")
+        ]
+        return {
+            "sessions": len(self._sessions),
+            "context_tokens_total": sum(context_tokens),
+            "context_tokens_max": max(context_tokens, default=0),
+            "active": sum(1 for s in self._sessions.values() if s.lock.locked()),
+            "max_size": self.max_size,
+            "idle_ttl": self.idle_ttl,
+            **self._metrics,
+        }
+
+
+class SessionContextBuilder(SimpleRequestContextBuilder):
+    """Builds request contexts with a `session_id`: the caller's context ID, or None if it sent none."""
+
+    async def build(self, params=None, task_id=None, context_id=None, task=None, context=None) -> RequestContext:
+        # Checked before RequestContext fills in a generated context ID
+        named = bool(context_id or task is not None or (params and params.message.context_id))
+        request_context = await super().build(params=params, task_id=task_id, context_id=context_id,
+                                              task=task, context=context)
+        request_context.session_id = request_context.context_id if named else None
+        return request_context
+
+
+def serve_pooled(a2a_server, executor: "PooledA2AExecutor"):
+    """Serve `a2a_server`'s requests with `executor`, keyed by the caller's context ID."""
+    task_store = a2a_server.request_handler.task_store
+    a2a_server.request_handler = DefaultRequestHandler(
+        agent_executor=executor,
+        task_store=task_store,
+        request_context_builder=SessionContextBuilder(task_store=task_store),
+    )
+
+
+class PooledA2AExecutor(StrandsA2AExecutor):
+    """A2A executor that runs each request on the pooled agent for its context ID.
+
+    `agent` is only the template the A2A server builds its agent card from.
+    Partial output a tool relays while it runs (a delegated agent's reply,
+    see delegation.py) is forwarded to the caller as working-status updates.
+    """
+
+    def __init__(self, agent, pool: AgentPool):
+        super().__init__(agent)
+        self.pool = pool
+
+    async def _execute_streaming(self, context, updater):
+        if not (context.message and hasattr(context.message, "parts")):
+            raise ValueError("No content blocks available")
+        content_blocks = self._convert_a2a_parts_to_content_blocks(context.message.parts)
+        if not content_blocks:
+            raise ValueError("No content blocks available")
+
+        # Without SessionContextBuilder every request looks like part of a conversation
+        session_id = getattr(context, "session_id", context.context_id)
+        async with self.pool.session(session_id) as agent:
+            token = current_session.set(session_id)
+            try:
+                async for event in agent.stream_async(content_blocks):
+                    await self._handle_streaming_event(event, updater)
+            finally:
+                current_session.reset(token)
+
+    async def _handle_streaming_event(self, event, updater):
+        relayed = event.get("tool_stream_event", {}).get("data")
+        if isinstance(relayed, dict) and relayed.get("relay"):
+            await updater.update_status(
+                TaskState.working,
+                new_agent_text_message(relayed["relay"], updater.context_id, updater.task_id),
+            )
+            return
+        await super()._handle_streaming_event(event, updater)
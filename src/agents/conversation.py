@@ -0,0 +1,189 @@
+"""Token-budgeted conversation memory for long-lived agents.
+
+Usage:
+    from .conversation import TokenBudgetConversationManager
+    agent = Agent(model=model, tools=tools, conversation_manager=TokenBudgetConversationManager())
+
+The default strands manager bounds history by message count, but a single
+`list_devices` result can be thousands of tokens, so long-running agents keep
+getting slower. This manager keeps the estimated context under
+AGENT_CONTEXT_TOKENS: after each turn it first shrinks old tool results, then
+summarizes the oldest turns with the model on a background thread and splices
+the summary in on a later turn, so no user turn waits on summarization.
+`context_tokens` and `stats()` report the current size.
+"""
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+import copy
+import json
+import logging
+import os
+import threading
+
+from strands.agent.conversation_manager.summarizing_conversation_manager import (
+    DEFAULT_SUMMARIZATION_PROMPT,
+    SummarizingConversationManager,
+)
+from strands.types.content import Message
+from strands.types.exceptions import ContextWindowOverflowException
+
+if TYPE_CHECKING:
+    from strands import Agent
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_tokens(messages: List[Message]) -> int:
+    """Rough token count (~4 characters per token) of text, tool inputs and tool results."""
+    chars = 0
+    for message in messages:
+        for content in message.get("content", []):
+            if "text" in content:
+                chars += len(content["text"])
+            elif "toolUse" in content:
+                chars += len(json.dumps(content["toolUse"].get("input", {}), default=str))
+            elif "toolResult" in content:
+                for item in content["toolResult"].get("content", []):
+                    chars += len(item["text"]) if "text" in item else len(json.dumps(item, default=str))
+    return chars // 4
+
+
+class TokenBudgetConversationManager(SummarizingConversationManager):
+    """Keeps an agent's history under a token budget by trimming tool results and summarizing."""
+
+    def __init__(
+        self,
+        max_tokens: Optional[int] = None,
+        preserve_recent_messages: int = 6,
+        tool_result_chars: Optional[int] = None,
+        background: bool = True,
+    ):
+        super().__init__(preserve_recent_messages=preserve_recent_messages)
+        self.max_tokens = max_tokens or int(os.getenv("AGENT_CONTEXT_TOKENS", "6000"))
+        self.tool_result_chars = tool_result_chars or int(os.getenv("AGENT_TOOL_RESULT_CHARS", "400"))
+        self.background = background
+        self.context_tokens = 0
+        # In-flight background summary: {"thread", "count", "summary"}
+        self._pending: Optional[Dict[str, Any]] = None
+        self._metrics = {"truncated_results": 0, "summaries": 0, "dropped_messages": 0}
+
+    def _truncate_tool_results(self, messages: List[Message], keep_last: int) -> bool:
+        """Shorten tool results older than the last `keep_last` messages."""
+        changed = False
+        for message in messages[:max(len(messages) - keep_last, 0)]:
+            for content in message.get("content", []):
+                if "toolResult" not in content:
+                    continue
+                for item in content["toolResult"].get("content", []):
+                    text = item["text"] if "text" in item else json.dumps(item, default=str)
+                    if len(text) > self.tool_result_chars:
+                        item.clear()
+                        item["text"] = f"{text[:self.tool_result_chars]}... [truncated {len(text) - self.tool_result_chars} chars]"
+                        self._metrics["truncated_results"] += 1
+                        changed = True
+        return changed
+
+    def _split_point(self, messages: List[Message]) -> int:
+        """How many of the oldest messages can be summarized without splitting tool pairs."""
+        count = max(1, len(messages) // 2)
+        count = min(count, len(messages) - self.preserve_recent_messages)
+        if count <= 0:
+            return 0
+        try:
+            return self._adjust_split_point_for_tool_pairs(messages, count)
+        except ContextWindowOverflowException:
+            return 0
+
+    def _summarize(self, agent: "Agent", messages: List[Message], pending: Dict[str, Any]):
+        from strands import Agent
+        from .model_cache import CachingModel
+
+        # Every summary uses the same prompt, so it must not go through the response cache
+        model = agent.model.model if isinstance(agent.model, CachingModel) else agent.model
+        try:
+            summarizer = Agent(
+                model=model,
+                system_prompt=DEFAULT_SUMMARIZATION_PROMPT,
+                messages=messages,
+                callback_handler=None,
+            )
+            result = summarizer("Please summarize this conversation.")
+            pending["summary"] = {**result.message, "role": "user"}
+        except Exception as e:
+            logger.warning("Background summarization failed: %s", e)
+
+    def _splice_summary(self, agent: "Agent"):
+        """Swap summarized messages for the finished summary, if one is ready."""
+        if self._pending is None or self._pending["thread"].is_alive():
+            return
+        summary, count = self._pending["summary"], self._pending["count"]
+        self._pending = None
+        if summary is None or count > len(agent.messages):
+            return
+        self.removed_message_count += count - (1 if self._summary_message else 0)
+        self._summary_message = summary
+        agent.messages[:] = [summary] + agent.messages[count:]
+        self._metrics["summaries"] += 1
+
+    def _drop_oldest(self, agent: "Agent") -> bool:
+        count = self._split_point(agent.messages)
+        if count <= 0:
+            return False
+        # Any summary still running covers messages that are about to disappear
+        self._pending = None
+        agent.messages[:] = agent.messages[count:]
+        self.removed_message_count += count
+        self._metrics["dropped_messages"] += count
+        return True
+
+    def apply_management(self, agent: "Agent", **kwargs: Any) -> None:
+        """After each turn: splice finished summaries, trim tool results, start summarizing."""
+        self._splice_summary(agent)
+        self.context_tokens = estimate_tokens(agent.messages)
+        if self.context_tokens <= self.max_tokens:
+            return
+
+        if self._truncate_tool_results(agent.messages, self.preserve_recent_messages):
+            self.context_tokens = estimate_tokens(agent.messages)
+        if self.context_tokens <= self.max_tokens:
+            return
+
+        if self._pending is not None:
+            # Summary still running; only step in if the history has run far past the budget
+            if self.context_tokens > 2 * self.max_tokens:
+                self._drop_oldest(agent)
+                self.context_tokens = estimate_tokens(agent.messages)
+            return
+
+        count = self._split_point(agent.messages)
+        if count <= 0:
+            return
+        if not self.background:
+            self._drop_oldest(agent)
+            self.context_tokens = estimate_tokens(agent.messages)
+            return
+        pending = {"count": count, "summary": None}
+        pending["thread"] = threading.Thread(
+            target=self._summarize,
+            args=(agent, copy.deepcopy(agent.messages[:count]), pending),
+            name="conversation-summarizer",
+            daemon=True,
+        )
+        self._pending = pending
+        pending["thread"].start()
+        logger.info("Context at ~%d tokens (budget %d); summarizing %d oldest messages in the background",
+                    self.context_tokens, self.max_tokens, count)
+
+    def reduce_context(self, agent: "Agent", e: Optional[Exception] = None, **kwargs: Any) -> None:
+        """On a context overflow there is no time to summarize: trim and drop synchronously."""
+        if not self._truncate_tool_results(agent.messages, 1) and not self._drop_oldest(agent):
+            raise ContextWindowOverflowException("Unable to reduce conversation context") from e
+        self.context_tokens = estimate_tokens(agent.messages)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "context_tokens": self.context_tokens,
+            "max_tokens": self.max_tokens,
+            "summarizing": self._pending is not None and self._pending["thread"].is_alive(),
+            "removed_messages": self.removed_message_count,
+            **self._metrics,
+        }
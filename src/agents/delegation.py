@@ -0,0 +1,272 @@
+"""Delegation to other A2A agents over cached, kept-alive, streaming channels.
+
+Usage:
+    from .delegation import DelegationToolProvider
+    provider = DelegationToolProvider(known_agent_urls=[hubitat_agent_url])
+    agent = Agent(tools=provider.tools, ...)
+    serve_pooled(a2a_server, PooledA2AExecutor(agent, pool))   # relays partial replies
+
+A drop-in for strands' A2AClientToolProvider with the same tools and result
+shape. Each known agent gets a channel:
+
+- its agent card, cached and revalidated in the background once it is older
+  than A2A_CARD_TTL seconds (conditional on the card's ETag when the server
+  sends one), so a delegated task never waits on card resolution after the
+  first; a changed card rebuilds the channel's client
+- its own pooled keep-alive HTTP client (A2A_MAX_CONNECTIONS,
+  A2A_KEEPALIVE_EXPIRY) carrying trace headers, and one a2a Client reused for
+  every message
+
+Messages go out as message/stream when the card advertises streaming.
+`a2a_send_message` is an async-generator tool: each piece of text the
+downstream agent produces is yielded as {"relay": text} while the task runs,
+and PooledA2AExecutor forwards those to our own caller as working-status
+updates, so the caller hears the Hubitat agent's first words instead of
+waiting for the whole delegated task. The final yield is the tool result.
+
+Each of our sessions (agent_pool.current_session) talks to a downstream
+agent under its own stable context ID, so the downstream agent keeps one
+conversation per session; one-off requests send no context ID.
+"""
+from typing import Any, Dict, Optional
+from uuid import NAMESPACE_URL, uuid4, uuid5
+import asyncio
+import logging
+import os
+import time
+
+import httpx
+from a2a.client import ClientConfig, ClientFactory
+from a2a.types import AgentCard, Message, Part, Role, TaskStatusUpdateEvent, TextPart
+from a2a.utils.constants import AGENT_CARD_WELL_KNOWN_PATH
+from strands import tool
+from strands_tools.a2a_client import DEFAULT_TIMEOUT, A2AClientToolProvider
+
+from ..telemetry import inject_trace_headers
+from .agent_pool import current_session
+
+logger = logging.getLogger(__name__)
+
+
+def downstream_context_id(session_id: Optional[str], url: str) -> Optional[str]:
+    """Context ID a session uses with the agent at `url`: stable per session and agent."""
+    return str(uuid5(NAMESPACE_URL, f"{url}#{session_id}")) if session_id else None
+
+
+def status_text(update: Any) -> str:
+    """Text carried by a working-status update, or "" for any other event."""
+    if not isinstance(update, TaskStatusUpdateEvent) or update.status.message is None:
+        return ""
+    return "".join(p.root.text for p in update.status.message.parts if isinstance(p.root, TextPart))
+
+
+class _Channel:
+    """Everything kept per downstream agent between delegated tasks."""
+
+    def __init__(self, url: str, http: httpx.AsyncClient):
+        self.url = url
+        self.http = http
+        self.card: Optional[AgentCard] = None
+        self.etag: Optional[str] = None
+        self.fetched_at = 0.0
+        self.client = None
+        self.lock = asyncio.Lock()
+        self.revalidation: Optional[asyncio.Task] = None
+
+
+class DelegationToolProvider(A2AClientToolProvider):
+    """A2A client tools with per-agent cached cards, pooled connections and streamed replies."""
+
+    def __init__(self, known_agent_urls: list[str] | None = None, timeout: int = DEFAULT_TIMEOUT,
+                 card_ttl: Optional[float] = None, max_connections: Optional[int] = None,
+                 keepalive_expiry: Optional[float] = None, **kwargs):
+        super().__init__(known_agent_urls=known_agent_urls, timeout=timeout, **kwargs)
+        self.card_ttl = card_ttl if card_ttl is not None else float(os.getenv("A2A_CARD_TTL", "300"))
+        max_connections = max_connections or int(os.getenv("A2A_MAX_CONNECTIONS", "10"))
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+            keepalive_expiry=keepalive_expiry if keepalive_expiry is not None
+            else float(os.getenv("A2A_KEEPALIVE_EXPIRY", "120")),
+        )
+        self._channels: Dict[str, _Channel] = {}
+        self._metrics = {
+            "messages": 0,
+            "errors": 0,
+            "card_fetches": 0,
+            "card_revalidations": 0,
+            "card_changes": 0,
+            "relayed_chunks": 0,
+            "first_chunk_seconds": 0.0,
+            "streamed_messages": 0,
+            "total_seconds": 0.0,
+        }
+
+    def _channel(self, url: str) -> _Channel:
+        channel = self._channels.get(url)
+        if channel is None:
+            http = httpx.AsyncClient(timeout=self.timeout, limits=self.limits,
+                                     event_hooks={"request": [inject_trace_headers]})
+            channel = self._channels[url] = _Channel(url, http)
+        return channel
+
+    async def _ensure_httpx_client(self) -> httpx.AsyncClient:
+        # Only used by the inherited card resolver for agents we never made a channel for
+        if self._httpx_client is None:
+            self._httpx_client = httpx.AsyncClient(timeout=self.timeout, limits=self.limits,
+                                                   event_hooks={"request": [inject_trace_headers]})
+        return self._httpx_client
+
+    async def _fetch_card(self, channel: _Channel) -> AgentCard:
+        headers = {"If-None-Match": channel.etag} if channel.etag and channel.card is not None else {}
+        response = await channel.http.get(channel.url.rstrip("/") + AGENT_CARD_WELL_KNOWN_PATH, headers=headers)
+        self._metrics["card_fetches"] += 1
+        if response.status_code == 304 and channel.card is not None:
+            channel.fetched_at = time.monotonic()
+            return channel.card
+        response.raise_for_status()
+        card = AgentCard.model_validate(response.json())
+        if card != channel.card:
+            if channel.card is not None:
+                self._metrics["card_changes"] += 1
+                logger.info("Agent card for %s changed; rebuilding its client", channel.url)
+            channel.card = card
+            channel.client = None
+        channel.etag = response.headers.get("etag")
+        channel.fetched_at = time.monotonic()
+        self._discovered_agents[channel.url] = card
+        return card
+
+    async def _revalidate(self, channel: _Channel):
+        try:
+            await self._fetch_card(channel)
+            self._metrics["card_revalidations"] += 1
+        except Exception as e:
+            # Keep serving the card we have; try again after another TTL
+            channel.fetched_at = time.monotonic()
+            logger.warning("Revalidating the agent card for %s failed: %s", channel.url, e)
+        finally:
+            channel.revalidation = None
+
+    async def _discover_agent_card(self, url: str) -> AgentCard:
+        """Cached card for `url`: fetched once, then refreshed in the background when stale."""
+        channel = self._channel(url)
+        if channel.card is None:
+            async with channel.lock:
+                if channel.card is None:
+                    await self._fetch_card(channel)
+            return channel.card
+        if time.monotonic() - channel.fetched_at > self.card_ttl and channel.revalidation is None:
+            channel.revalidation = asyncio.create_task(self._revalidate(channel))
+        return channel.card
+
+    def _client(self, channel: _Channel):
+        if channel.client is None:
+            config = ClientConfig(
+                httpx_client=channel.http,
+                streaming=True,
+                push_notification_configs=[self._push_config] if self._push_config else [],
+            )
+            channel.client = ClientFactory(config).create(channel.card)
+        return channel.client
+
+    @tool
+    async def a2a_send_message(self, message_text: str, target_agent_url: str, message_id: str | None = None):
+        """
+        Send a message to a specific A2A agent and return the response.
+
+        Args:
+            message_text: The message content to send to the agent
+            target_agent_url: The URL of the target A2A agent
+            message_id: Optional message ID for tracking (generates UUID if not provided)
+
+        Returns:
+            dict: Response data including:
+                - status: "success" or "error"
+                - response: The agent's response data (if successful)
+                - error: Error message (if failed)
+                - message_id: The message ID used
+                - target_agent_url: The agent URL that was contacted
+        """
+        async for event in self._stream_message(message_text, target_agent_url, message_id):
+            yield event
+
+    async def _stream_message(self, message_text: str, target_agent_url: str, message_id: str | None = None):
+        message_id = message_id or uuid4().hex
+        start = time.perf_counter()
+        first_chunk = None
+        task = update = reply = None
+        self._metrics["messages"] += 1
+        try:
+            await self._ensure_discovered_known_agents()
+            await self._discover_agent_card(target_agent_url)
+            client = self._client(self._channel(target_agent_url))
+            message = Message(
+                kind="message",
+                role=Role.user,
+                parts=[Part(TextPart(kind="text", text=message_text))],
+                message_id=message_id,
+                context_id=downstream_context_id(current_session.get(), target_agent_url),
+            )
+            logger.info("Sending message to %s", target_agent_url)
+            async for event in client.send_message(message):
+                if isinstance(event, Message):
+                    reply = event
+                    break
+                task, update = event
+                text = status_text(update)
+                if text:
+                    if first_chunk is None:
+                        first_chunk = time.perf_counter() - start
+                    self._metrics["relayed_chunks"] += 1
+                    yield {"relay": text, "target_agent_url": target_agent_url}
+        except Exception as e:
+            logger.exception("Error sending message to %s", target_agent_url)
+            self._metrics["errors"] += 1
+            yield {"status": "error", "error": str(e), "message_id": message_id, "target_agent_url": target_agent_url}
+            return
+
+        self._metrics["total_seconds"] += time.perf_counter() - start
+        if first_chunk is not None:
+            self._metrics["streamed_messages"] += 1
+            self._metrics["first_chunk_seconds"] += first_chunk
+        if reply is not None:
+            response = reply.model_dump(mode="python", exclude_none=True)
+        elif task is not None:
+            # The streamed chunks pile up in the task history; the answer is in the artifacts
+            response = {
+                "task": task.model_dump(mode="python", exclude_none=True, exclude={"history"}),
+                "update": update.model_dump(mode="python", exclude_none=True) if update else None,
+            }
+        else:
+            self._metrics["errors"] += 1
+            yield {"status": "error", "error": "No response received from agent",
+                   "message_id": message_id, "target_agent_url": target_agent_url}
+            return
+        yield {"status": "success", "response": response, "message_id": message_id, "target_agent_url": target_agent_url}
+
+    async def aclose(self):
+        for channel in self._channels.values():
+            await channel.http.aclose()
+        if self._httpx_client is not None:
+            await self._httpx_client.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        m = self._metrics
+        now = time.monotonic()
+        return {
+            "agents": {
+                url: {
+                    "name": channel.card.name if channel.card else None,
+                    "streaming": bool(channel.card and channel.card.capabilities.streaming),
+                    "card_age_seconds": round(now - channel.fetched_at, 1) if channel.card else None,
+                }
+                for url, channel in self._channels.items()
+            },
+            "card_ttl": self.card_ttl,
+            **{k: v for k, v in m.items() if not k.endswith("_seconds")},
+            "avg_first_chunk_ms": round(m["first_chunk_seconds"] / m["streamed_messages"] * 1000, 1)
+            if m["streamed_messages"] else 0.0,
+            "avg_total_ms": round(m["total_seconds"] / (m["messages"] - m["errors"]) * 1000, 1)
+            if m["messages"] > m["errors"] else 0.0,
+        }
@@ -1,52 +1,128 @@
+from ..startup import startup_timer
 import os
+import threading
+import time
 
+from opentelemetry import trace
 from strands import Agent
 from strands.multiagent.a2a import A2AServer
-from strands_tools.a2a_client import A2AClientToolProvider
+from strands_tools.mcp_client import MCPClient
+from mcp.client.streamable_http import streamablehttp_client
+from a2a.types import Part, TextPart
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 
 from dotenv import load_dotenv
 load_dotenv()
 
-from .llm_provider import get_model
-
-model = get_model(provider="ollama")
+from .agent_pool import AgentPool, PooledA2AExecutor, serve_pooled
+from .conversation import TokenBudgetConversationManager
+from .delegation import DelegationToolProvider
+from .intent_router import IntentRouter
+from .llm_provider import ModelWarmer, get_model
+from .model_cache import CachingModel
+from .model_router import TieredModel
+from ..telemetry import TraceContextMiddleware, metrics_text, recent_traces, setup_telemetry
 
 # Use Docker service name when running in Docker, localhost otherwise
 hubitat_agent_url = os.getenv("HUBITAT_AGENT_URL", "http://127.0.0.1:9002")
-hubitat_provider = A2AClientToolProvider(known_agent_urls=[hubitat_agent_url])
-
-agent = Agent(
-    name="Home Agent",
-    description="""
-    A Home Agent that connects to other agents around the home. 
-    One such agent is the Hubitat Home Assistant which can control devices, sense temperature and other metrics around the house.
-    """,
-    system_prompt="""
-    You are a Smart Home Agent that connects to other agents around the home.
-    You only use the tools of other agents to perform tasks and do not yourself have any tools.
-    One such agent is the Hubitat Agent which can control devices, sense temperature and other metrics around the house.
-    Discover and List the agents you have access to and its skills. Only use those skills to perform tasks.
-    Ask the agents you discover what they can do and use their skills to perform tasks.
-    """,
-    model=model,
-    tools=hubitat_provider.tools
-)
-
-# Create A2A server (streaming enabled by default)
+# Cached agent card, kept-alive connections and streamed replies relayed to our caller
+hubitat_provider = DelegationToolProvider(known_agent_urls=[hubitat_agent_url])
+
+# Direct MCP connection used only by the fast path for simple device commands
+mcp_host = os.getenv("MCP_SERVER_HOST", "localhost")
+mcp_url = f"http://{mcp_host}:8888/mcp"
+hubitat_mcp_client = MCPClient(lambda: streamablehttp_client(mcp_url))
+intent_router = IntentRouter(hubitat_mcp_client)
+
+def build_agent(model):
+    """Build a Home Agent; every pooled session shares the same model and tools."""
+    return Agent(
+        name="Home Agent",
+        description="""
+        A Home Agent that connects to other agents around the home. 
+        One such agent is the Hubitat Home Assistant which can control devices, sense temperature and other metrics around the house.
+        """,
+        system_prompt="""
+        You are a Smart Home Agent that connects to other agents around the home.
+        You only use the tools of other agents to perform tasks and do not yourself have any tools.
+        One such agent is the Hubitat Agent which can control devices, sense temperature and other metrics around the house.
+        Discover and List the agents you have access to and its skills. Only use those skills to perform tasks.
+        Ask the agents you discover what they can do and use their skills to perform tasks.
+        """,
+        model=model,
+        conversation_manager=TokenBudgetConversationManager(),
+        tools=hubitat_provider.tools
+    )
+
+tracer = trace.get_tracer(__name__)
+
+class FastPathExecutor(PooledA2AExecutor):
+    """A2A executor that answers simple device commands without running the agent."""
+
+    def __init__(self, agent, pool: AgentPool, router: IntentRouter):
+        super().__init__(agent, pool)
+        self.router = router
+
+    async def _execute_streaming(self, context, updater):
+        with tracer.start_as_current_span("fast_path") as span:
+            reply = await self.router.handle(context.get_user_input())
+            span.set_attribute("fast_path.handled", reply is not None)
+        if reply is not None:
+            # A command or scene just changed device state: retire cached answers about it
+            if isinstance(self.agent.model, CachingModel):
+                self.agent.model.bump_version()
+            await updater.add_artifact([Part(root=TextPart(text=reply))], name="agent_response")
+            await updater.complete()
+            return
+        start = time.perf_counter()
+        await super()._execute_streaming(context, updater)
+        self.router.record_agent_turn(time.perf_counter() - start)
+
 # Bind to 0.0.0.0 to allow access from outside the container (Docker)
 a2a_host = os.getenv("A2A_HOST", "0.0.0.0")
 # Use localhost for the public URL (0.0.0.0 is not a valid URL for browsers)
 a2a_http_url = os.getenv("A2A_HTTP_URL", "http://localhost:9001")
-a2a_server = A2AServer(
-    agent=agent,
-    host=a2a_host,
-    port=9001,
-    http_url=a2a_http_url,
-)
+startup_timer.mark("imports")
+
+def connect_fast_path():
+    """Connect the fast path's MCP client; requests go to the agent until it is up."""
+    try:
+        hubitat_mcp_client.start()
+    except Exception as e:
+        print(f"Fast path disabled, could not connect to MCP server at {mcp_url}: {e}")
+        return
+    intent_router.enabled = True
+    print(f"Fast path connected to {mcp_url}")
 
 def main():
     """Main entry point for the home agent."""
+    setup_telemetry("home-agent")
+    # LLM_PROVIDER selects the backend (default ollama); "scripted" runs without an LLM
+    model = get_model()
+    model_warmer = ModelWarmer(model)
+    # Load the model in the background while the rest of the server is built
+    model_warmer.start()
+    startup_timer.mark("model")
+
+    # The fast path is optional, so its MCP connection doesn't hold up start-up either
+    if intent_router.enabled:
+        intent_router.enabled = False
+        threading.Thread(target=connect_fast_path, name="fast-path-connect", daemon=True).start()
+
+    # Template agent for the agent card; requests run on per-session agents from the pool
+    agent = build_agent(model)
+    agent_pool = AgentPool(lambda: build_agent(model))
+    # Create A2A server (streaming enabled by default)
+    a2a_server = A2AServer(
+        agent=agent,
+        host=a2a_host,
+        port=9001,
+        http_url=a2a_http_url,
+    )
+    serve_pooled(a2a_server, FastPathExecutor(agent, agent_pool, intent_router))
+    startup_timer.mark("agent")
+
     # Enable CORS for all origins
     app = a2a_server.to_fastapi_app()
     app.add_middleware(
@@ -57,9 +133,58 @@ def main():
         allow_headers=["*"],  # Allow all headers
     )
 
+    app.add_middleware(TraceContextMiddleware)
+
+    @app.get("/metrics")
+    async def prometheus_metrics():
+        return PlainTextResponse(metrics_text(), media_type="text/plain; version=0.0.4")
+
+    @app.get("/traces")
+    async def traces(limit: int = 20):
+        return recent_traces(limit)
+
+    @app.get("/health/ready")
+    async def readiness():
+        stats = model_warmer.stats()
+        return JSONResponse(stats, status_code=200 if stats["ready"] else 503)
+
+    @app.get("/stats/startup")
+    async def startup_stats():
+        return startup_timer.stats()
+
+    @app.get("/stats/fast-path")
+    async def fast_path_stats():
+        return intent_router.stats()
+
+    @app.get("/stats/delegation")
+    async def delegation_stats():
+        return hubitat_provider.stats()
+
+    @app.get("/stats/agent-pool")
+    async def agent_pool_stats():
+        return agent_pool.stats()
+
+    @app.get("/stats/model-cache")
+    async def model_cache_stats():
+        return model.stats() if isinstance(model, CachingModel) else {"enabled": False}
+
+    @app.get("/stats/model-router")
+    async def model_router_stats():
+        router = model.model if isinstance(model, CachingModel) else model
+        return router.stats() if isinstance(router, TieredModel) else {"enabled": False}
+
     # Start the server with the modified app
     import uvicorn
-    uvicorn.run(app, host=a2a_host, port=9001)
+    startup_timer.mark("app")
+    model_warmer.wait_ready()
+    startup_timer.mark("model warm-up wait")
+    print(startup_timer.report())
+    try:
+        uvicorn.run(app, host=a2a_host, port=9001)
+    finally:
+        model_warmer.stop()
+        if intent_router.enabled:
+            hubitat_mcp_client.stop(None, None, None)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
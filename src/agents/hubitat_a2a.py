@@ -1,11 +1,19 @@
+from ..startup import startup_timer
 from strands import Agent
 from strands_tools.mcp_client import MCPClient
 from mcp.client.streamable_http import streamablehttp_client
 from strands.multiagent.a2a import A2AServer
-from .llm_provider import get_model
+from .agent_pool import AgentPool, PooledA2AExecutor, serve_pooled
+from .conversation import TokenBudgetConversationManager
+from .llm_provider import ModelWarmer, get_model
+from .model_cache import CachingModel
+from .model_router import TieredModel
+from ..telemetry import TraceContextMiddleware, metrics_text, recent_traces, setup_telemetry
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 
 from dotenv import load_dotenv
+import asyncio
 import os
 
 load_dotenv()
@@ -13,32 +21,69 @@ load_dotenv()
 # Use Docker service name when running in Docker, localhost otherwise
 mcp_host = os.getenv("MCP_SERVER_HOST", "localhost")
 mcp_url = f"http://{mcp_host}:8888/mcp"
-hubitat_mcp_client = MCPClient(lambda: streamablehttp_client(mcp_url))
-model = get_model(provider="ollama")
+# MCP_TRANSPORT=inprocess runs the Hubitat MCP server inside this process instead of
+# calling the hubitat-mcp container over HTTP
+mcp_transport = os.getenv("MCP_TRANSPORT", "http").lower()
+if mcp_transport == "inprocess":
+    from ..mcp.hubitat_mcp import mcp as hubitat_mcp_server, handle_events, record_event
+    from ..mcp.memory_transport import call_in_server_loop, memory_transport
+    hubitat_mcp_client = MCPClient(lambda: memory_transport(hubitat_mcp_server))
+
+    async def receive_events(request):
+        """Maker API /events for the in-process server.
+
+        The device stores are only safe on the MCP client's loop, where the tools
+        run, so events are applied there rather than on uvicorn's loop.
+        """
+        return await handle_events(
+            request,
+            lambda payload: asyncio.wrap_future(call_in_server_loop(hubitat_mcp_server, record_event, payload)),
+        )
+else:
+    hubitat_mcp_server = None
+    hubitat_mcp_client = MCPClient(lambda: streamablehttp_client(mcp_url))
+startup_timer.mark("imports")
 
 def main():
     """Main entry point for the hubitat agent."""
+    setup_telemetry("hubitat-agent")
+    # LLM_PROVIDER selects the backend (default ollama); "scripted" runs without an LLM
+    model = get_model()
+    model_warmer = ModelWarmer(model)
+    # Load the model while the MCP client connects, so the first command doesn't pay for it
+    model_warmer.start()
+    startup_timer.mark("model")
+
     # Enter MCP client context - must stay open while server runs
     hubitat_mcp_client.__enter__()
     
     try:
         # Get the tools from the MCP server
         tools = hubitat_mcp_client.list_tools_sync()
-        agent = Agent(
-            name="Hubitat Agent",
-            description="""
-            An Agent that can control and monitor a Hubitat smart home system. 
-            It can turn devices on and off, adjust settings, and provide information.
-            Has information from various sensors and devices, including names, IDs, and capabilities.
-            Multisensors have temperature, humidity, and motion information.
-            """,
-            system_prompt="""
-            You are a Hubitat Agent that can control and monitor a Hubitat smart home system. 
-            List the tools you have access to.
-            """,
-            model=model,
-            tools=tools
-        )
+        startup_timer.mark("mcp connect")
+
+        def build_agent():
+            """Build a Hubitat Agent; every pooled session shares the same model and tools."""
+            return Agent(
+                name="Hubitat Agent",
+                description="""
+                An Agent that can control and monitor a Hubitat smart home system. 
+                It can turn devices on and off, adjust settings, and provide information.
+                Has information from various sensors and devices, including names, IDs, and capabilities.
+                Multisensors have temperature, humidity, and motion information.
+                """,
+                system_prompt="""
+                You are a Hubitat Agent that can control and monitor a Hubitat smart home system. 
+                List the tools you have access to.
+                """,
+                model=model,
+                conversation_manager=TokenBudgetConversationManager(),
+                tools=tools
+            )
+
+        # Template agent for the agent card; requests run on per-session agents from the pool
+        agent = build_agent()
+        agent_pool = AgentPool(build_agent)
 
         # Create A2A server (streaming enabled by default)
         # Bind to 0.0.0.0 to allow access from outside the container (Docker)
@@ -52,6 +97,8 @@ def main():
             port=9002,
             http_url=a2a_http_url,
         )
+        serve_pooled(a2a_server, PooledA2AExecutor(agent, agent_pool))
+        startup_timer.mark("agent")
 
         # Enable CORS for all origins
         app = a2a_server.to_fastapi_app()
@@ -65,11 +112,52 @@ def main():
             allow_headers=["*"],  # Allow all headers
         )
 
+        if hubitat_mcp_server is not None:
+            # Serve the MCP server's Maker API /events feed from this app
+            app.add_route("/events", receive_events, methods=["POST"])
+
+        app.add_middleware(TraceContextMiddleware)
+
+        @app.get("/metrics")
+        async def prometheus_metrics():
+            return PlainTextResponse(metrics_text(), media_type="text/plain; version=0.0.4")
+
+        @app.get("/traces")
+        async def traces(limit: int = 20):
+            return recent_traces(limit)
+
+        @app.get("/health/ready")
+        async def readiness():
+            stats = model_warmer.stats()
+            return JSONResponse(stats, status_code=200 if stats["ready"] else 503)
+
+        @app.get("/stats/startup")
+        async def startup_stats():
+            return startup_timer.stats()
+
+        @app.get("/stats/agent-pool")
+        async def agent_pool_stats():
+            return agent_pool.stats()
+
+        @app.get("/stats/model-cache")
+        async def model_cache_stats():
+            return model.stats() if isinstance(model, CachingModel) else {"enabled": False}
+
+        @app.get("/stats/model-router")
+        async def model_router_stats():
+            router = model.model if isinstance(model, CachingModel) else model
+            return router.stats() if isinstance(router, TieredModel) else {"enabled": False}
+
         # Start the server with the modified app
         # The server will run until interrupted, keeping the MCP client context open
         import uvicorn
+        startup_timer.mark("app")
+        model_warmer.wait_ready()
+        startup_timer.mark("model warm-up wait")
+        print(startup_timer.report())
         uvicorn.run(app, host=a2a_host, port=9002, log_level="info")
     finally:
+        model_warmer.stop()
         # Clean up MCP client when server stops
         hubitat_mcp_client.__exit__(None, None, None)
 
@@ -0,0 +1,238 @@
+"""Deterministic fast path for simple device commands.
+
+Usage:
+    from .intent_router import IntentRouter
+    router = IntentRouter(hubitat_mcp_client)
+    reply = await router.handle("turn off the kitchen light")  # None -> let the agent handle it
+
+Commands like "turn off the kitchen light", "set office lamp to 50%" or
+"lock the front door" are matched by a small grammar, the device is resolved
+through the MCP server's `find_devices` index, and `control_device` is called
+directly. Anything ambiguous or outside the grammar returns None so the full
+agent (LLM -> A2A -> LLM -> MCP) handles it as before.
+
+Scene names from the MCP server's `list_scenes` ("goodnight", "run the movie
+night scene") are run directly with `run_scene`, so a whole routine is one
+tool call instead of several agent turns. Only an explicit request ("run",
+"activate", "... scene") waits for `list_scenes`; any other utterance is
+checked against the scene names already loaded, which are refreshed in the
+background, so requests that are not scenes reach the agent without an extra
+round trip.
+"""
+from typing import Any, Dict, NamedTuple, Optional
+import asyncio
+import json
+import logging
+import os
+import re
+import time
+import uuid
+
+from ..mcp.device_cache import TTLCache
+from ..mcp.scenes import scene_key
+
+logger = logging.getLogger(__name__)
+
+
+class Intent(NamedTuple):
+    device: str          # spoken device phrase, e.g. "kitchen light"
+    command: str         # Maker API command path, e.g. "off" or "setLevel/50"
+    capability: str      # capability the device must have
+    reply: str           # confirmation template, formatted with the device label
+
+
+_ARTICLE = r"(?:the |my )?"
+_GRAMMAR = [
+    (re.compile(rf"^(?:turn|switch) (on|off) {_ARTICLE}(.+)$"),
+     lambda m: Intent(m[2], m[1], "Switch", f"Turned {m[1]} {{label}}.")),
+    (re.compile(rf"^(?:turn|switch) {_ARTICLE}(.+?) (on|off)$"),
+     lambda m: Intent(m[1], m[2], "Switch", f"Turned {m[2]} {{label}}.")),
+    (re.compile(rf"^(?:set|dim) {_ARTICLE}(.+?) (?:to|at) (\d{{1,3}}) ?(?:%|percent)?$"),
+     lambda m: Intent(m[1], f"setLevel/{m[2]}", "SwitchLevel", f"Set {{label}} to {m[2]}%.")
+     if int(m[2]) <= 100 else None),
+    (re.compile(rf"^(lock|unlock) {_ARTICLE}(.+)$"),
+     lambda m: Intent(m[2], m[1], "Lock", f"{m[1].capitalize()}ed {{label}}.")),
+]
+
+# "goodnight", "run the goodnight scene", "activate movie night"
+_SCENE = re.compile(r"^(?:(?:run|activate|start|trigger|set) )?(?:the |my )?(.+?)(?: scene| routine| mode)?$")
+# Phrasings that can only mean a scene, worth asking the MCP server about
+_SCENE_REQUEST = re.compile(r"^(?:run|activate|start|trigger|set) | (?:scene|routine|mode)$")
+
+_POLITE = re.compile(r"^(?:please |hey |ok |can you |could you )+|(?: please| now| for me)+$")
+# Phrases that mean more than one device or a condition; always left to the agent
+_MULTI = re.compile(r"\b(?:all|every|each|and|except|if|when|then|after|before)\b")
+
+
+def _clean(text: str) -> str:
+    text = re.sub(r"\s+", " ", text.lower()).strip().rstrip(".!?")
+    return _POLITE.sub("", text).strip()
+
+
+def parse(text: str) -> Optional[Intent]:
+    """Match a command against the grammar; None when it isn't a simple single-device command."""
+    text = _clean(text)
+    for pattern, build in _GRAMMAR:
+        match = pattern.match(text)
+        if match:
+            intent = build(match)
+            if intent is None or _MULTI.search(intent.device):
+                return None
+            return intent
+    return None
+
+
+class IntentRouter:
+    """Runs high-confidence device commands directly against the Hubitat MCP server."""
+
+    def __init__(self, mcp_client, min_score: Optional[float] = None, margin: Optional[float] = None):
+        self.mcp_client = mcp_client
+        self.enabled = os.getenv("FAST_PATH_ENABLED", "true").lower() not in ("0", "false", "no")
+        self.min_score = min_score if min_score is not None else float(os.getenv("FAST_PATH_MIN_SCORE", "0.9"))
+        self.margin = margin if margin is not None else float(os.getenv("FAST_PATH_MARGIN", "0.2"))
+        # Resolved device phrase -> device summary, so repeat commands skip the index lookup
+        self._resolved = TTLCache(ttl=float(os.getenv("FAST_PATH_RESOLVE_TTL", "300")), maxsize=256)
+        # Runnable scene names, re-read now and then so edits to the scenes file show up
+        self.scenes_ttl = float(os.getenv("FAST_PATH_SCENES_TTL", "60"))
+        self._scene_names: Optional[Dict[str, str]] = None
+        self._scenes_loaded_at = 0.0
+        self._scene_refresh: Optional[asyncio.Task] = None
+        self._metrics = {
+            "requests": 0,
+            "matched": 0,
+            "scenes": 0,
+            "fallbacks": 0,
+            "errors": 0,
+            "fast_path_seconds": 0.0,
+            "agent_seconds": 0.0,
+        }
+
+    async def _call(self, name: str, arguments: Dict[str, Any]) -> Any:
+        result = await self.mcp_client.call_tool_async(str(uuid.uuid4()), name, arguments)
+        if result.get("status") != "success":
+            raise RuntimeError(f"MCP tool {name} failed: {result.get('content')}")
+        return json.loads(result["content"][0]["text"])
+
+    async def resolve(self, intent: Intent) -> Optional[Dict[str, Any]]:
+        """Return the one device the phrase clearly refers to, or None if unsure."""
+        key = (intent.device, intent.capability)
+        device = self._resolved.get(key)
+        if device is not None:
+            return device
+        matches = await self._call("find_devices", {"query": intent.device, "capability": intent.capability, "limit": 2})
+        if not matches or matches[0]["score"] < self.min_score:
+            return None
+        if len(matches) > 1 and matches[0]["score"] - matches[1]["score"] < self.margin:
+            return None
+        self._resolved.set(key, matches[0])
+        return matches[0]
+
+    async def _load_scenes(self) -> Dict[str, str]:
+        scenes = await self._call("list_scenes", {})
+        # An unreadable scenes file comes back as an error object: no scenes
+        listed = scenes if isinstance(scenes, list) else []
+        self._scene_names = {scene_key(s["name"]): s["name"] for s in listed if s.get("valid")}
+        self._scenes_loaded_at = time.monotonic()
+        return self._scene_names
+
+    async def _refresh_scenes(self):
+        try:
+            await self._load_scenes()
+        except Exception as e:
+            logger.warning("Refreshing scene names failed: %s", e)
+        finally:
+            self._scene_refresh = None
+
+    async def scene_names(self, wait: bool = True) -> Dict[str, str]:
+        """Valid scenes on the MCP server, keyed by scene_key().
+
+        Stale or missing names are re-read; with `wait=False` that happens in
+        the background and the names already loaded (possibly none) are returned.
+        """
+        stale = self._scene_names is None or time.monotonic() - self._scenes_loaded_at > self.scenes_ttl
+        if stale:
+            if wait:
+                return await self._load_scenes()
+            if self._scene_refresh is None:
+                self._scene_refresh = asyncio.create_task(self._refresh_scenes())
+        return self._scene_names or {}
+
+    async def run_scene(self, text: str) -> Optional[str]:
+        """Run the scene `text` names, if it names one; None when it doesn't."""
+        text = _clean(text)
+        match = _SCENE.match(text)
+        if match is None:
+            return None
+        names = await self.scene_names(wait=_SCENE_REQUEST.search(text) is not None)
+        name = names.get(scene_key(match[1]))
+        if name is None:
+            return None
+        result = await self._call("run_scene", {"name": name})
+        if "results" not in result:
+            # The scene stopped being runnable since it was listed; let the agent explain
+            self._scene_names = None
+            return None
+        self._metrics["scenes"] += 1
+        sent = len(result["results"]) - result["skipped"]
+        if result["status"] == "ok":
+            return f"Ran {name}: {sent} commands sent."
+        skipped = f" and {result['skipped']} were skipped" if result["skipped"] else ""
+        return f"Ran {name}, but {result['failed']} of {sent} commands failed{skipped}."
+
+    async def handle(self, text: str) -> Optional[str]:
+        """Execute `text` directly if it is a high-confidence command; None to fall back."""
+        if not self.enabled or not text:
+            return None
+        start = time.perf_counter()
+        self._metrics["requests"] += 1
+        intent = parse(text)
+        try:
+            if intent is None:
+                reply = await self.run_scene(text)
+            else:
+                reply = await self.run_intent(intent)
+        except Exception as e:
+            logger.warning("Fast path failed for %r, falling back to the agent: %s", text, e)
+            self._metrics["errors"] += 1
+            reply = None
+        if reply is None:
+            self._metrics["fallbacks"] += 1
+            return None
+        elapsed = time.perf_counter() - start
+        self._metrics["matched"] += 1
+        self._metrics["fast_path_seconds"] += elapsed
+        logger.info("Fast path handled %r in %.1f ms", text, elapsed * 1000)
+        return reply
+
+    async def run_intent(self, intent: Intent) -> Optional[str]:
+        """Send a single-device command; None when the device is unclear or the hub refused."""
+        device = await self.resolve(intent)
+        if device is None:
+            return None
+        result = await self._call("control_device", {"device_id": device["id"], "command": intent.command})
+        if result.get("status") != "ok":
+            # The hub rejected it; the agent can explain or retry with more context
+            return None
+        return intent.reply.format(label=device.get("label") or device["id"])
+
+    def record_agent_turn(self, seconds: float):
+        """Record how long a fallback turn took through the full agent."""
+        self._metrics["agent_seconds"] += seconds
+
+    def stats(self) -> Dict[str, Any]:
+        m = self._metrics
+        fast_avg = m["fast_path_seconds"] / m["matched"] if m["matched"] else 0.0
+        agent_avg = m["agent_seconds"] / m["fallbacks"] if m["fallbacks"] else 0.0
+        return {
+            "enabled": self.enabled,
+            "requests": m["requests"],
+            "matched": m["matched"],
+            "scenes": m["scenes"],
+            "fallbacks": m["fallbacks"],
+            "errors": m["errors"],
+            "match_rate": round(m["matched"] / m["requests"], 3) if m["requests"] else 0.0,
+            "avg_fast_path_ms": round(fast_avg * 1000, 1),
+            "avg_agent_ms": round(agent_avg * 1000, 1),
+            # Estimated: each matched command would otherwise have cost an average agent turn
+            "estimated_seconds_saved": round(m["matched"] * max(agent_avg - fast_avg, 0.0), 2),
+        }
@@ -7,25 +7,151 @@ Usage:
 This module centralizes creating `strands` model instances for different backends
 like Ollama or OpenRouter (via strands.models.openai.OpenAIModel). It reads
 configuration from environment variables: LLM_PROVIDER, OLLAMA_HOST, OPENROUTER_KEY,
-OPENROUTER_BASE_URL, OPENAI_API_KEY, etc.
+OPENROUTER_BASE_URL, OPENAI_API_KEY, etc. Set LLM_CACHE=true to wrap the model in a
+response cache for repeated read-only prompts (see model_cache.py), and
+LLM_ROUTER=true to route tool-picking steps to a small model and answers to a
+large one (see model_router.py); each tier is configured by
+LLM_SMALL_PROVIDER / LLM_SMALL_MODEL_ID and LLM_LARGE_PROVIDER / LLM_LARGE_MODEL_ID,
+falling back to the regular provider settings.
+
+Every provider model is wrapped in `InstrumentedModel`, which records a span
+per model call plus call latency, token counts and output tokens/sec through
+the OpenTelemetry API (no-ops unless the process calls setup_telemetry()).
+
+Ollama unloads idle models and the next request pays the full load time, so
+Ollama models are built with OLLAMA_KEEP_ALIVE (default "30m") and servers can
+use `ModelWarmer` to preload the model at startup and ping it every
+OLLAMA_KEEP_WARM_INTERVAL seconds:
+
+    warmer = ModelWarmer(model)
+    warmer.start()
+    warmer.wait_ready()  # before accepting traffic
+
+A failed warm-up (e.g. Ollama not up yet) is retried every few seconds
+(OLLAMA_WARMUP_RETRY, doubling up to 30s) until it succeeds. `wait_ready`
+gives up after LLM_WARMUP_TIMEOUT seconds (default 60), or as soon as the
+first attempt fails, so the server starts listening while Ollama comes up.
 """
-from typing import Optional, Dict
+from typing import Any, Optional, Dict, List
 import os
+import sys
+import threading
+import time
+
+from opentelemetry import metrics, trace
+from opentelemetry.trace import SpanKind
+
+from strands.models import Model
+
+from .model_cache import CachingModel
+from .model_router import TieredModel
+
+
+tracer = trace.get_tracer(__name__)
+meter = metrics.get_meter(__name__)
+llm_duration = meter.create_histogram(
+    "llm.call.duration", unit="s", description="Model call latency, by provider, model and tier",
+    explicit_bucket_boundaries_advisory=[0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120],
+)
+llm_tokens = meter.create_counter("llm.tokens", description="Model tokens, by direction (input/output)")
+llm_tokens_per_second = meter.create_histogram(
+    "llm.output.tokens_per_second", description="Output tokens per second of generation",
+    explicit_bucket_boundaries_advisory=[1, 2, 5, 10, 20, 40, 80, 160, 320],
+)
+
 
-from strands.models.ollama import OllamaModel
-from strands.models.openai import OpenAIModel
+class InstrumentedModel(Model):
+    """Traces and meters every call to the wrapped provider model."""
+
+    def __init__(self, model, provider: str, tier: str = "default"):
+        self.model = model
+        self.labels = {"provider": provider, "model": str(model.get_config().get("model_id")), "tier": tier}
+
+    @property
+    def config(self):
+        # strands reads model.config["model_id"] for its own span attributes
+        return self.model.get_config()
+
+    def update_config(self, **model_config: Any) -> None:
+        self.model.update_config(**model_config)
+
+    def get_config(self) -> Any:
+        return self.model.get_config()
+
+    def structured_output(self, output_model, prompt, system_prompt=None, **kwargs):
+        return self.model.structured_output(output_model, prompt, system_prompt=system_prompt, **kwargs)
+
+    async def stream(self, messages, tool_specs=None, system_prompt=None, **kwargs):
+        labels = self.labels
+        with tracer.start_as_current_span(
+            f"llm {labels['provider']} {labels['model']}", kind=SpanKind.CLIENT,
+            attributes={"gen_ai.system": labels["provider"], "gen_ai.request.model": labels["model"], "llm.tier": labels["tier"]},
+        ) as span:
+            start = time.perf_counter()
+            first_token = None
+            usage = {}
+            try:
+                async for event in self.model.stream(messages, tool_specs, system_prompt, **kwargs):
+                    if first_token is None and "contentBlockDelta" in event:
+                        first_token = time.perf_counter()
+                    elif "metadata" in event:
+                        usage = event["metadata"].get("usage", {})
+                    yield event
+            finally:
+                end = time.perf_counter()
+                llm_duration.record(end - start, labels)
+                input_tokens, output_tokens = usage.get("inputTokens", 0), usage.get("outputTokens", 0)
+                llm_tokens.add(input_tokens, {**labels, "direction": "input"})
+                llm_tokens.add(output_tokens, {**labels, "direction": "output"})
+                span.set_attribute("gen_ai.usage.input_tokens", input_tokens)
+                span.set_attribute("gen_ai.usage.output_tokens", output_tokens)
+                if first_token is not None:
+                    span.set_attribute("llm.time_to_first_token_ms", round((first_token - start) * 1000, 1))
+                    if output_tokens and end > first_token:
+                        rate = output_tokens / (end - first_token)
+                        llm_tokens_per_second.record(rate, labels)
+                        span.set_attribute("llm.output_tokens_per_second", round(rate, 1))
 
 
 def get_default_provider() -> str:
     return os.getenv("LLM_PROVIDER", "ollama").lower()
 
 
-def get_model(provider: Optional[str] = None, **options):
+def _env_flag(name: str) -> bool:
+    return os.getenv(name, "false").lower() in ("1", "true", "yes")
+
+
+def get_model(provider: Optional[str] = None, cache: Optional[bool] = None, routed: Optional[bool] = None, **options):
     """Return a strands-compatible model instance for the selected provider.
 
-    provider: 'ollama' | 'openrouter' | 'openai'
+    provider: 'ollama' | 'openrouter' | 'openai' | 'scripted'
+    cache: wrap the model in a CachingModel for repeated read-only prompts
+           (defaults to the LLM_CACHE env var)
+    routed: build a small and a large tier behind a TieredModel
+            (defaults to the LLM_ROUTER env var)
     options: optional overrides (model_id, host, client_args, params)
     """
+    if cache is None:
+        cache = _env_flag("LLM_CACHE")
+    if routed is None:
+        routed = _env_flag("LLM_ROUTER")
+    if routed:
+        tiers = {}
+        for tier in ("small", "large"):
+            tier_options = dict(options)
+            model_id = os.getenv(f"LLM_{tier.upper()}_MODEL_ID")
+            if model_id:
+                tier_options["model_id"] = model_id
+            tier_provider = os.getenv(f"LLM_{tier.upper()}_PROVIDER") or provider or get_default_provider()
+            tiers[tier] = InstrumentedModel(_build_model(tier_provider, **tier_options), tier_provider, tier)
+        model = TieredModel(**tiers)
+    else:
+        provider = provider or get_default_provider()
+        model = InstrumentedModel(_build_model(provider, **options), provider)
+    return CachingModel(model) if cache else model
+
+
+def _build_model(provider: Optional[str] = None, **options):
     provider = (provider or get_default_provider() or "ollama").lower()
 
     if provider == "ollama":
@@ -37,9 +163,13 @@ def get_model(provider: Optional[str] = None, **options):
         # Allow passing params through options
         if "params" in options:
             kwargs["params"] = options["params"]
+        keep_alive = options.get("keep_alive") or os.getenv("OLLAMA_KEEP_ALIVE", "30m")
         print(f"Using Ollama host: {host}")
         print(f"Using Ollama model: {model_id}")
-        return OllamaModel(host=host, temperature=0.3,**kwargs)
+        # Provider SDKs are imported only for the provider in use; each takes a noticeable
+        # part of a second to import, more on a small ARM host
+        from strands.models.ollama import OllamaModel
+        return OllamaModel(host=host, temperature=0.3, keep_alive=keep_alive, **kwargs)
 
     if provider in ("openrouter", "openai"):
         # Use strands' OpenAIModel for both OpenAI and OpenRouter-compatible hosts,
@@ -69,6 +199,114 @@ def get_model(provider: Optional[str] = None, **options):
         if params is not None:
             kwargs["params"] = params
 
+        from strands.models.openai import OpenAIModel
         return OpenAIModel(**kwargs)
 
+    if provider == "scripted":
+        # Deterministic rule-based model for benchmarks and offline runs; no LLM involved
+        from .scripted_model import ScriptedModel
+        return ScriptedModel()
+
     raise ValueError(f"Unknown LLM provider: {provider}")
+
+
+def _is_ollama(model) -> bool:
+    # Nothing can be an OllamaModel unless an Ollama model was built and imported it
+    module = sys.modules.get("strands.models.ollama")
+    return module is not None and isinstance(model, module.OllamaModel)
+
+
+def _provider_models(model) -> List[Any]:
+    """The provider models behind CachingModel / TieredModel wrappers."""
+    if isinstance(model, TieredModel):
+        return [m for tier in model.tiers.values() for m in _provider_models(tier)]
+    if isinstance(model, (CachingModel, InstrumentedModel)):
+        return _provider_models(model.model)
+    return [model]
+
+
+class ModelWarmer:
+    """Preloads an Ollama model and keeps it loaded with periodic pings.
+
+    `ready` is set once the first warm-up of every Ollama model behind the
+    wrappers finishes (immediately for hosted providers, which have nothing to
+    load). Warm-up failures are logged and retried with a short backoff
+    until one succeeds; after that the model is pinged every `interval`.
+    """
+
+    MAX_RETRY_DELAY = 30.0
+
+    def __init__(self, model, interval: Optional[float] = None, retry_delay: Optional[float] = None):
+        self.models = _provider_models(model)
+        self.interval = interval if interval is not None else float(os.getenv("OLLAMA_KEEP_WARM_INTERVAL", "240"))
+        self.retry_delay = retry_delay if retry_delay is not None else float(os.getenv("OLLAMA_WARMUP_RETRY", "3"))
+        self.ready = threading.Event()
+        # Set after the first warm-up attempt, successful or not
+        self.attempted = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._metrics: Dict[str, Any] = {"pings": 0, "failures": 0, "warmup_seconds": None, "last_ping_seconds": None}
+
+    def warm_up(self) -> bool:
+        """Load the model(s) now; returns False if the Ollama server could not be reached."""
+        start = time.perf_counter()
+        ok = all([self._ping(model) for model in self.models if _is_ollama(model)])
+        if ok and not self.ready.is_set():
+            self._metrics["warmup_seconds"] = round(time.perf_counter() - start, 3)
+            self.ready.set()
+        return ok
+
+    def _ping(self, model) -> bool:
+        config = model.get_config()
+        start = time.perf_counter()
+        try:
+            import ollama
+            # An empty prompt makes Ollama load the model without generating anything
+            client = ollama.Client(model.host, **model.client_args)
+            client.generate(model=config.get("model_id"), prompt="", keep_alive=config.get("keep_alive"))
+        except Exception as e:
+            self._metrics["failures"] += 1
+            print(f"Ollama warm-up failed for {config.get('model_id')}: {e}")
+            return False
+        elapsed = time.perf_counter() - start
+        self._metrics["pings"] += 1
+        self._metrics["last_ping_seconds"] = round(elapsed, 3)
+        if not self.ready.is_set():
+            print(f"Ollama model {config.get('model_id')} loaded in {elapsed:.1f}s")
+        return True
+
+    def _run(self):
+        delay = self.retry_delay
+        while not self.warm_up():
+            self.attempted.set()
+            if self._stop.wait(delay):
+                return
+            delay = min(delay * 2, self.MAX_RETRY_DELAY)
+        self.attempted.set()
+        while self.interval > 0 and not self._stop.wait(self.interval):
+            self.warm_up()
+
+    def start(self):
+        """Warm up in the background, then keep the model loaded until `stop()`."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="model-warmer", daemon=True)
+            self._thread.start()
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        """Block until the model is loaded or `timeout` (LLM_WARMUP_TIMEOUT) passes.
+
+        Returns early when the first warm-up attempt fails: an unreachable Ollama
+        could take any amount of time to appear, so there is nothing worth waiting
+        for. Warm-up keeps retrying in the background either way.
+        """
+        timeout = timeout if timeout is not None else float(os.getenv("LLM_WARMUP_TIMEOUT", "60"))
+        self.attempted.wait(timeout)
+        if not self.ready.is_set():
+            print("Model not ready yet; accepting traffic while warm-up continues in the background")
+        return self.ready.is_set()
+
+    def stop(self):
+        self._stop.set()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"ready": self.ready.is_set(), "interval": self.interval, **self._metrics}
@@ -0,0 +1,205 @@
+"""Response cache for repeated read-only questions.
+
+Usage:
+    from .model_cache import CachingModel
+    model = CachingModel(get_model(provider="ollama"))   # or get_model(cache=True) / LLM_CACHE=true
+
+Wraps any strands model. When a turn starts with a prompt already answered
+(same normalized prompt, system prompt and tool-state version) within
+LLM_CACHE_TTL seconds, the stored answer is replayed without calling the
+model. Standalone status questions ("is the kitchen light on?") hit anywhere
+in a session; prompts that point back at the conversation ("and that one?",
+"summarize this", anything about "my" or "you") also need the same earlier
+conversation, so they only hit at the start of a fresh session. A turn's answer is only stored if every tool it called is read-only;
+any state-changing tool call bumps the tool-state version, which retires
+everything cached before it. Tool names are classified by READ_ONLY_TOOLS and
+LLM_CACHE_READ_ONLY_TOOLS; unknown tools count as state-changing.
+"""
+from collections import OrderedDict
+from typing import Any, AsyncGenerator, Dict, List, Optional, Tuple
+import hashlib
+import json
+import os
+import re
+import time
+
+from strands.models import Model
+from strands.types.content import Messages
+
+READ_ONLY_TOOLS = {
+    "list_devices", "find_devices", "device_details", "device_history", "device_capabilities",
+    "device_commands", "attribute_stats", "attribute_series", "cache_stats",
+    "a2a_discover_agent", "a2a_list_discovered_agents",
+}
+
+# Delegated messages are read-only unless they ask the other agent to change something
+_DELEGATION_TOOLS = {"a2a_send_message"}
+_COMMAND_WORDS = re.compile(
+    r"\b(?:turn|switch|set|dim|brighten|lock|unlock|open|close|toggle|run|start|stop|activate|arm|disarm|"
+    r"control_devices?|run_scene)\b",
+    re.IGNORECASE,
+)
+
+
+# A status question stands on its own unless it points back at the conversation
+_STATUS_QUESTION = re.compile(r"^(?:is|are|was|were|what|whats|which|how|show|list|check|get|does|do)\b")
+_REFERS_BACK = re.compile(
+    r"\b(?:it|its|that|this|these|those|them|they|there|then|one|ones|same|again|else|also|too|other|"
+    r"before|earlier|previous|last|above|conversation|summar\w*|i|im|my|mine|we|us|our|you|your)\b"
+)
+
+
+def normalize_prompt(text: str) -> str:
+    return " ".join(re.findall(r"[a-z0-9%]+", text.lower()))
+
+
+def is_standalone(prompt: str) -> bool:
+    """True for a normalized prompt that means the same whatever came before it."""
+    return bool(_STATUS_QUESTION.match(prompt)) and not _REFERS_BACK.search(prompt)
+
+
+class CachingModel(Model):
+    """Model wrapper that replays cached answers for repeated read-only prompts."""
+
+    def __init__(self, model: Model, ttl: Optional[float] = None, max_size: Optional[int] = None):
+        self.model = model
+        self.ttl = ttl if ttl is not None else float(os.getenv("LLM_CACHE_TTL", "60"))
+        self.max_size = max_size or int(os.getenv("LLM_CACHE_SIZE", "256"))
+        extra = os.getenv("LLM_CACHE_READ_ONLY_TOOLS", "")
+        self.read_only_tools = READ_ONLY_TOOLS | {t.strip() for t in extra.split(",") if t.strip()}
+        self.tool_state_version = 0
+        self._entries: "OrderedDict[Tuple, Tuple[float, str]]" = OrderedDict()
+        # toolUseIds already classified, so each state change bumps the version once
+        self._seen_tool_uses: "OrderedDict[str, bool]" = OrderedDict()
+        self._metrics = {"hits": 0, "misses": 0, "mid_session_hits": 0, "stored": 0, "bypassed": 0}
+
+    # Model interface: configuration and structured output go straight to the wrapped model
+    def update_config(self, **model_config: Any) -> None:
+        self.model.update_config(**model_config)
+
+    def get_config(self) -> Any:
+        return self.model.get_config()
+
+    def structured_output(self, output_model, prompt, system_prompt=None, **kwargs):
+        return self.model.structured_output(output_model, prompt, system_prompt=system_prompt, **kwargs)
+
+    def bump_version(self):
+        """Retire every cached answer, e.g. after device state changed outside the agent."""
+        self.tool_state_version += 1
+
+    def is_mutating(self, tool_use: Dict[str, Any]) -> bool:
+        name = tool_use.get("name", "")
+        if name in self.read_only_tools:
+            return False
+        if name in _DELEGATION_TOOLS:
+            return bool(_COMMAND_WORDS.search(str(tool_use.get("input", {}).get("message_text", ""))))
+        return True
+
+    @staticmethod
+    def _turn_start(messages: Messages) -> Optional[int]:
+        """Index of the user prompt that started the current turn."""
+        for i in range(len(messages) - 1, -1, -1):
+            content = messages[i].get("content", [])
+            if messages[i].get("role") == "user" and not any("toolResult" in c for c in content):
+                return i if any("text" in c for c in content) else None
+        return None
+
+    def _key(self, messages: Messages, start: int, system_prompt: Optional[str]) -> Tuple:
+        prompt = normalize_prompt(" ".join(c["text"] for c in messages[start]["content"] if "text" in c))
+        system = hashlib.sha1((system_prompt or "").encode()).hexdigest()
+        # Other prompts mean something else after a different conversation (and a
+        # summarizer's fixed prompt must never replay another session's summary)
+        history = None if is_standalone(prompt) else hashlib.sha1(
+            json.dumps(messages[:start], sort_keys=True, default=str).encode()
+        ).hexdigest()
+        return (system, history, prompt, self.tool_state_version)
+
+    def _get(self, key: Tuple) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            self._entries.pop(key, None)
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def _set(self, key: Tuple, text: str):
+        self._entries[key] = (time.monotonic() + self.ttl, text)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    @staticmethod
+    async def _replay(text: str) -> AsyncGenerator[Dict[str, Any], None]:
+        yield {"messageStart": {"role": "assistant"}}
+        yield {"contentBlockStart": {"start": {}}}
+        yield {"contentBlockDelta": {"delta": {"text": text}}}
+        yield {"contentBlockStop": {}}
+        yield {"messageStop": {"stopReason": "end_turn"}}
+
+    async def stream(self, messages: Messages, tool_specs=None, system_prompt=None, **kwargs):
+        start = self._turn_start(messages)
+        if start is None:
+            async for event in self.model.stream(messages, tool_specs, system_prompt, **kwargs):
+                yield event
+            return
+
+        turn_tool_uses = [
+            c["toolUse"] for m in messages[start:] if m.get("role") == "assistant"
+            for c in m.get("content", []) if "toolUse" in c
+        ]
+        mutated = False
+        for tool_use in turn_tool_uses:
+            tool_use_id = tool_use.get("toolUseId", "")
+            if tool_use_id not in self._seen_tool_uses:
+                self._seen_tool_uses[tool_use_id] = self.is_mutating(tool_use)
+                if self._seen_tool_uses[tool_use_id]:
+                    # Device state changed: everything cached before it may now be wrong
+                    self.bump_version()
+                while len(self._seen_tool_uses) > 1024:
+                    self._seen_tool_uses.popitem(last=False)
+            mutated = mutated or self._seen_tool_uses[tool_use_id]
+
+        first_call = start == len(messages) - 1
+        key = self._key(messages, start, system_prompt)
+        if first_call:
+            cached = self._get(key)
+            if cached is not None:
+                self._metrics["hits"] += 1
+                if start:
+                    # Hits after the first turn of a session, only possible for standalone prompts
+                    self._metrics["mid_session_hits"] += 1
+                async for event in self._replay(cached):
+                    yield event
+                return
+            self._metrics["misses"] += 1
+
+        text: List[str] = []
+        new_tool_uses = False
+        stop_reason = None
+        async for event in self.model.stream(messages, tool_specs, system_prompt, **kwargs):
+            if "contentBlockDelta" in event:
+                text.append(event["contentBlockDelta"].get("delta", {}).get("text", ""))
+            elif "contentBlockStart" in event and "toolUse" in event["contentBlockStart"].get("start", {}):
+                new_tool_uses = True
+            elif "messageStop" in event:
+                stop_reason = event["messageStop"].get("stopReason")
+            yield event
+
+        if stop_reason != "end_turn" or new_tool_uses:
+            return
+        if mutated:
+            self._metrics["bypassed"] += 1
+            return
+        self._set(key, "".join(text))
+        self._metrics["stored"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self._metrics["hits"] + self._metrics["misses"]
+        return {
+            **self._metrics,
+            "hit_rate": round(self._metrics["hits"] / lookups, 3) if lookups else 0.0,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl": self.ttl,
+            "tool_state_version": self.tool_state_version,
+        }
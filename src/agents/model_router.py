@@ -0,0 +1,154 @@
+"""Tiered model routing: a small model picks tools, a large one writes answers.
+
+Usage:
+    from .model_router import TieredModel
+    model = TieredModel(small=get_model(model_id="qwen3:1.7b"), large=get_model(model_id="qwen3:14b"))
+    # or LLM_ROUTER=true with LLM_SMALL_* / LLM_LARGE_* set, see llm_provider.get_model()
+
+Most agent steps only choose the next Hubitat tool and fill in its arguments,
+which a small local model does well and quickly. Each step is routed on the
+shape of the conversation:
+
+- small: the step calls a tool
+- large: no tools are offered, the step answers in text (a free-form answer,
+  or the final answer after tool results) and LLM_ROUTER_SYNTHESIS is
+  "large", or the turn already has LLM_ROUTER_MAX_FAILURES failed tool calls
+
+Whether a step calls a tool or answers is only known once a model starts
+replying, so the small model goes first. Its reply is held back until the
+first content block: a tool call is passed through and the step stays small,
+while text closes the small model's stream and the large model answers.
+With LLM_ROUTER_SYNTHESIS=small every step with tools stays on the small model.
+
+`stats()` reports calls, latency and tokens per tier plus why steps escalated.
+"""
+from typing import Any, Dict, Optional, Tuple
+import os
+import time
+
+from strands.models import Model
+from strands.types.content import Messages
+
+
+class TieredModel(Model):
+    """Model that routes each agent step to a small or large model."""
+
+    def __init__(
+        self,
+        small: Model,
+        large: Model,
+        max_failures: Optional[int] = None,
+        synthesis: Optional[str] = None,
+    ):
+        self.tiers: Dict[str, Model] = {"small": small, "large": large}
+        self.max_failures = max_failures if max_failures is not None else int(os.getenv("LLM_ROUTER_MAX_FAILURES", "2"))
+        self.synthesis = (synthesis or os.getenv("LLM_ROUTER_SYNTHESIS", "large")).lower()
+        self._metrics = {
+            tier: {"calls": 0, "seconds": 0.0, "input_tokens": 0, "output_tokens": 0} for tier in self.tiers
+        }
+        self._escalations = {"no_tools": 0, "free_form": 0, "synthesis": 0, "tool_failures": 0}
+
+    # Configuration is per tier; update_config applies to both and get_config reports both
+    def update_config(self, **model_config: Any) -> None:
+        for model in self.tiers.values():
+            model.update_config(**model_config)
+
+    def get_config(self) -> Any:
+        return {tier: model.get_config() for tier, model in self.tiers.items()}
+
+    def structured_output(self, output_model, prompt, system_prompt=None, **kwargs):
+        return self.tiers["large"].structured_output(output_model, prompt, system_prompt=system_prompt, **kwargs)
+
+    def route(self, messages: Messages, tool_specs) -> Tuple[str, Optional[str]]:
+        """Return (tier, escalation reason) for the next step.
+
+        "small" with a reason means the small model probes the step and it
+        escalates for that reason if the reply turns out to be text.
+        """
+        if not tool_specs:
+            return "large", "no_tools"
+        failures = 0
+        for message in reversed(messages):
+            content = message.get("content", [])
+            results = [c["toolResult"] for c in content if "toolResult" in c]
+            if message.get("role") == "user" and not results:
+                break  # reached the prompt that started this turn
+            failures += sum(1 for r in results if r.get("status") == "error")
+        if failures >= self.max_failures:
+            return "large", "tool_failures"
+        if self.synthesis != "large":
+            return "small", None
+        after_tools = bool(messages) and any("toolResult" in c for c in messages[-1].get("content", []))
+        return "small", "synthesis" if after_tools else "free_form"
+
+    async def stream(self, messages: Messages, tool_specs=None, system_prompt=None, **kwargs):
+        tier, reason = self.route(messages, tool_specs)
+        if tier == "small" and reason:
+            # Held back until the first content block shows a tool call or an answer
+            small = self._stream("small", messages, tool_specs, system_prompt, **kwargs)
+            try:
+                held, kind = [], None
+                async for event in small:
+                    held.append(event)
+                    kind = _reply_kind(event)
+                    if kind:
+                        break
+                if kind == "tool":
+                    for event in held:
+                        yield event
+                    async for event in small:
+                        yield event
+                    return
+            finally:
+                await small.aclose()
+            tier = "large"
+        if reason:
+            self._escalations[reason] += 1
+        async for event in self._stream(tier, messages, tool_specs, system_prompt, **kwargs):
+            yield event
+
+    async def _stream(self, tier: str, messages: Messages, tool_specs, system_prompt, **kwargs):
+        metrics = self._metrics[tier]
+        metrics["calls"] += 1
+        start = time.perf_counter()
+        try:
+            async for event in self.tiers[tier].stream(messages, tool_specs, system_prompt, **kwargs):
+                if "metadata" in event:
+                    usage = event["metadata"].get("usage", {})
+                    metrics["input_tokens"] += usage.get("inputTokens", 0)
+                    metrics["output_tokens"] += usage.get("outputTokens", 0)
+                yield event
+        finally:
+            metrics["seconds"] += time.perf_counter() - start
+
+    def stats(self) -> Dict[str, Any]:
+        tiers = {}
+        for tier, m in self._metrics.items():
+            tiers[tier] = {
+                "calls": m["calls"],
+                "input_tokens": m["input_tokens"],
+                "output_tokens": m["output_tokens"],
+                "avg_ms": round(m["seconds"] / m["calls"] * 1000, 1) if m["calls"] else 0.0,
+                "total_seconds": round(m["seconds"], 3),
+            }
+        return {
+            "tiers": tiers,
+            "escalations": dict(self._escalations),
+            "max_failures": self.max_failures,
+            "synthesis": self.synthesis,
+        }
+
+
+def _reply_kind(event) -> Optional[str]:
+    """"tool" or "text" once a stream event shows how the reply starts, else None."""
+    if "toolUse" in event.get("contentBlockStart", {}).get("start", {}):
+        return "tool"
+    delta = event.get("contentBlockDelta", {}).get("delta", {})
+    if "toolUse" in delta:
+        return "tool"
+    # Whitespace (and reasoning) can precede a tool call
+    if delta.get("text", "").strip():
+        return "text"
+    if "messageStop" in event:
+        return "tool" if event["messageStop"].get("stopReason") == "tool_use" else "text"
+    return None
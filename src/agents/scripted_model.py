@@ -0,0 +1,183 @@
+"""Deterministic stand-in for an LLM, for benchmarks and offline runs.
+
+Usage:
+    from .llm_provider import get_model
+    model = get_model(provider="scripted")   # or LLM_PROVIDER=scripted
+
+Plays the part of the model in both agents without any inference: given the
+user's prompt, the tools on offer and the tool results so far, it emits the
+same tool calls a well-behaved model would (find the device, then command it;
+`control_devices` for "all outlets"; delegate to the Hubitat agent from the
+Home agent) and finishes with a short text answer. Structured output is a
+valid instance of the requested model built from field defaults and fixed
+per-type values, with text fields set to the prompt. SCRIPTED_MODEL_LATENCY_MS
+adds a fixed delay per model call to stand in for inference time. Token
+usage (~4 characters per token) is reported like a real provider's.
+"""
+from enum import Enum
+from typing import Any, Dict, List, Literal, Optional, Tuple, Union, get_args, get_origin
+import asyncio
+import json
+import os
+import re
+import types
+
+from strands.models import Model
+from strands.types.content import Messages
+
+_ALL = re.compile(r"\bturn (on|off) (?:all|every) (?:the |my )?(\w+?)s?\b")
+_ONE = re.compile(r"\b(?:turn|switch) (on|off) (?:the |my )?(.+?)[.!?]*$")
+_STATUS = re.compile(r"\b(?:status|details|state) of (?:the |my )?(.+?)[.!?]*$")
+_LIST = re.compile(r"\b(?:list|what|which) .*devices\b")
+
+
+def _result_text(result: Dict[str, Any]) -> str:
+    return " ".join(item.get("text", "") for item in result.get("content", []) if "text" in item)
+
+
+def _first_device_id(text: str) -> Optional[str]:
+    try:
+        matches = json.loads(text)
+    except ValueError:
+        return None
+    return str(matches[0]["id"]) if isinstance(matches, list) and matches else None
+
+
+def _placeholder(annotation: Any, text: str) -> Any:
+    """A fixed value of type `annotation`; text fields get `text`."""
+    origin, args = get_origin(annotation), get_args(annotation)
+    if origin in (Union, types.UnionType):
+        return None if type(None) in args else _placeholder(args[0], text)
+    if origin is Literal:
+        return args[0]
+    if origin in (list, set, frozenset, tuple):
+        return []
+    if origin is dict:
+        return {}
+    if isinstance(annotation, type):
+        if hasattr(annotation, "model_fields"):   # a nested pydantic model
+            return _scripted_fields(annotation, text)
+        if issubclass(annotation, Enum):
+            return next(iter(annotation))
+        if issubclass(annotation, str):
+            return text
+        if issubclass(annotation, (bool, int, float)):
+            return annotation()
+    return None
+
+
+def _scripted_fields(output_model: type, text: str) -> Dict[str, Any]:
+    # Optional fields keep their defaults
+    return {
+        name: _placeholder(field.annotation, text)
+        for name, field in output_model.model_fields.items() if field.is_required()
+    }
+
+
+class ScriptedModel(Model):
+    """Rule-based model that emits fixed tool-call sequences for known prompts."""
+
+    def __init__(self, latency_ms: Optional[float] = None, **config: Any):
+        self.latency = (latency_ms if latency_ms is not None else float(os.getenv("SCRIPTED_MODEL_LATENCY_MS", "0"))) / 1000
+        self.config = {"model_id": "scripted", **config}
+
+    def update_config(self, **model_config: Any) -> None:
+        self.config.update(model_config)
+
+    def get_config(self) -> Any:
+        return self.config
+
+    async def structured_output(self, output_model, prompt, system_prompt=None, **kwargs):
+        """Yield a deterministic instance of `output_model` for the prompt."""
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        text, _ = self._turn(prompt)
+        yield {"output": output_model.model_validate(_scripted_fields(output_model, text))}
+
+    @staticmethod
+    def _turn(messages: Messages) -> Tuple[str, List[Tuple[str, str]]]:
+        """The prompt that started this turn and the (tool name, result text) pairs since."""
+        names = {}
+        results = []
+        for message in reversed(messages):
+            content = message.get("content", [])
+            if message.get("role") == "user" and not any("toolResult" in c for c in content):
+                prompt = " ".join(c["text"] for c in content if "text" in c)
+                break
+            for c in content:
+                if "toolUse" in c:
+                    names[c["toolUse"]["toolUseId"]] = c["toolUse"]["name"]
+                elif "toolResult" in c:
+                    results.append(c["toolResult"])
+        else:
+            prompt = ""
+        ordered = [(names.get(r["toolUseId"], ""), _result_text(r)) for r in reversed(results)]
+        return prompt, ordered
+
+    def plan(self, prompt: str, tools: set, results: List[Tuple[str, str]]):
+        """Return ("tool", name, input) for the next call or ("text", answer) to finish."""
+        text = prompt.lower().strip()
+        done = [name for name, _ in results]
+        last = results[-1][1] if results else ""
+
+        if "a2a_send_message" in tools:
+            if not done:
+                url = os.getenv("HUBITAT_AGENT_URL", "http://127.0.0.1:9002")
+                return "tool", "a2a_send_message", {"message_text": prompt, "target_agent_url": url}
+            return "text", f"The Hubitat agent replied: {last[:200]}"
+
+        match = _ALL.search(text)
+        if match and "control_devices" in tools:
+            if not done:
+                return "tool", "control_devices", {"selector": match[2], "command": match[1]}
+            return "text", f"Turned {match[1]} all {match[2]}s: {last[:200]}"
+
+        match = _ONE.search(text) or _STATUS.search(text)
+        if match and "find_devices" in tools:
+            phrase = match[2] if match.re is _ONE else match[1]
+            if not done:
+                return "tool", "find_devices", {"query": phrase, "limit": 1}
+            device_id = _first_device_id(results[0][1])
+            if device_id is None:
+                return "text", f"I couldn't find {phrase}."
+            if len(done) == 1:
+                if match.re is _ONE:
+                    return "tool", "control_device", {"device_id": device_id, "command": match[1]}
+                return "tool", "device_details", {"device_id": device_id, "fields": ["label", "attributes"]}
+            return "text", f"Done: {last[:200]}"
+
+        if _LIST.search(text) and "list_devices" in tools:
+            if not done:
+                return "tool", "list_devices", {"fields": ["id", "label", "room"], "compact": True}
+            return "text", f"Here are your devices: {last[:200]}"
+
+        return "text", f"You said: {prompt}"
+
+    async def stream(self, messages: Messages, tool_specs=None, system_prompt=None, **kwargs):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        prompt, results = self._turn(messages)
+        tools = {spec["name"] for spec in tool_specs or []}
+        step = self.plan(prompt, tools, results)
+
+        yield {"messageStart": {"role": "assistant"}}
+        if step[0] == "tool":
+            _, name, tool_input = step
+            output = json.dumps(tool_input)
+            yield {"contentBlockStart": {"start": {"toolUse": {"name": name, "toolUseId": f"scripted-{len(messages)}"}}}}
+            yield {"contentBlockDelta": {"delta": {"toolUse": {"input": output}}}}
+            yield {"contentBlockStop": {}}
+            yield {"messageStop": {"stopReason": "tool_use"}}
+        else:
+            output = step[1]
+            yield {"contentBlockStart": {"start": {}}}
+            yield {"contentBlockDelta": {"delta": {"text": output}}}
+            yield {"contentBlockStop": {}}
+            yield {"messageStop": {"stopReason": "end_turn"}}
+
+        input_tokens = len(json.dumps(messages, default=str)) // 4 + len(system_prompt or "") // 4
+        output_tokens = max(1, len(output) // 4)
+        yield {"metadata": {
+            "usage": {"inputTokens": input_tokens, "outputTokens": output_tokens, "totalTokens": input_tokens + output_tokens},
+            "metrics": {"latencyMs": int(self.latency * 1000)},
+        }}
@@ -1,20 +1,24 @@
+from startup import startup_timer
 from strands import Agent, tool
-from strands_tools import calculator
-from strands_tools import file_read
-from strands_tools import file_write
 from strands_tools.mcp_client import MCPClient
 from mcp import stdio_client, StdioServerParameters
 from mcp.client.sse import sse_client
 # Use the shared common_llm package
 from agents.llm_provider import get_model
+from agents.conversation import TokenBudgetConversationManager
 from mcp.client.streamable_http import streamablehttp_client
 # from strands_tools.browser import LocalChromiumBrowser
 
+from strands.handlers.callback_handler import PrintingCallbackHandler
+
+from array import array
+import math
 import os
-import speech_recognition as sr
+import queue
+import re
 import threading
+import time
 from dotenv import load_dotenv
-import pyttsx3
 
 
 load_dotenv()
@@ -28,57 +32,188 @@ hubitat_mcp_client = MCPClient(lambda: streamablehttp_client("http://localhost:8
 #     # Get the tools from the MCP server
 #     tools = hubitat_mcp_client.list_tools_sync()
 
-# Create model via llm_provider; set LLM_PROVIDER env var to 'openrouter' to use OpenRouter/OpenAI
-model = get_model(provider="ollama")
-
-# Initialize TTS engine
-tts_engine = pyttsx3.init()
-
-def text_to_speech(text):
-    """Convert text to speech using pyttsx3."""
-    if not text or not text.strip():
-        print("⚠️  No text to speak")
-        return
-    try:
-        # print(f"🔊 Speaking: {text[:100]}{'...' if len(text) > 100 else ''}")
-        tts_engine.say(text)
-        tts_engine.runAndWait()
-    except Exception as e:
-        print(f"⚠️  Error with text-to-speech: {e}")
-
-def listen_and_transcribe():
-    recognizer = sr.Recognizer()
-    mic = sr.Microphone()
+# Sentence end: ., ! or ? followed by whitespace (so "71.5" isn't split), or a line break
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+|\n+")
+# Barge-in: mic level must exceed the ambient threshold by this factor to count as the
+# user talking over the agent, so the agent's own voice through the speakers doesn't
+BARGE_IN_FACTOR = float(os.getenv("BARGE_IN_FACTOR", "3"))
+
+
+class SentenceSplitter:
+    """Buffers streamed text and returns complete sentences as they arrive."""
+
+    def __init__(self, min_chars=12):
+        self.min_chars = min_chars
+        self.buffer = ""
+
+    def feed(self, text):
+        self.buffer += text
+        sentences = []
+        start = 0
+        for match in SENTENCE_END.finditer(self.buffer):
+            # Very short fragments ("Ok.", "1.") are joined with the next sentence
+            if match.start() - start >= self.min_chars:
+                sentences.append(self.buffer[start:match.start()].strip())
+                start = match.end()
+        self.buffer = self.buffer[start:]
+        return [s for s in sentences if s]
+
+    def flush(self):
+        rest, self.buffer = self.buffer.strip(), ""
+        return [rest] if rest else []
+
+
+class SpeechWorker:
+    """Speaks queued sentences on its own thread so generation never waits on audio.
+
+    pyttsx3 engines are not thread-safe, so the engine is created and driven
+    only on the worker thread, which starts on the first `say()` so sessions
+    that never speak don't load TTS at all. `interrupt()` drops queued
+    sentences and stops the one being spoken at the next word boundary.
+    """
+
+    def __init__(self):
+        self.queue = queue.Queue()
+        self.speaking = threading.Event()
+        # Bumped on every interrupt; sentences queued under an older generation are dropped
+        self.generation = 0
+        self.current = None
+        self.first_audio_at = None
+        self.thread = None
+
+    def _on_word(self, name, location, length):
+        if self.current != self.generation:
+            self.engine.stop()
+
+    def _run(self):
+        import pyttsx3
+        self.engine = pyttsx3.init()
+        self.engine.connect("started-word", self._on_word)
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            self.current, text = item
+            if self.current != self.generation:
+                continue
+            self.speaking.set()
+            if self.first_audio_at is None:
+                self.first_audio_at = time.perf_counter()
+            try:
+                self.engine.say(text)
+                self.engine.runAndWait()
+            except Exception as e:
+                print(f"⚠️  Error with text-to-speech: {e}")
+            finally:
+                if self.queue.empty():
+                    self.speaking.clear()
+
+    def say(self, text):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run, name="tts-worker", daemon=True)
+            self.thread.start()
+        self.queue.put((self.generation, text))
+
+    def interrupt(self):
+        """Barge-in: stop speaking now and forget anything still queued."""
+        self.generation += 1
+        self.speaking.clear()
+
+    def close(self):
+        self.interrupt()
+        if self.thread is not None:
+            self.queue.put(None)
+
+
+class BargeInMonitor:
+    """Watches the microphone while the agent speaks and interrupts it when the user talks."""
+
+    def __init__(self, speaker, chunks_to_trigger=3):
+        self.speaker = speaker
+        self.chunks_to_trigger = chunks_to_trigger
+        self.thread = threading.Thread(target=self._run, name="barge-in", daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        import speech_recognition as sr
+        recognizer = sr.Recognizer()
+        try:
+            mic = sr.Microphone()
+            with mic as source:
+                recognizer.adjust_for_ambient_noise(source)
+        except Exception as e:
+            print(f"⚠️  Barge-in disabled, no microphone: {e}")
+            return
+        threshold = recognizer.energy_threshold * BARGE_IN_FACTOR
+        while True:
+            self.speaker.speaking.wait()
+            loud = 0
+            with mic as source:
+                while self.speaker.speaking.is_set():
+                    samples = array("h", source.stream.read(source.CHUNK))
+                    rms = math.sqrt(sum(x * x for x in samples) / len(samples)) if samples else 0
+                    loud = loud + 1 if rms > threshold else 0
+                    if loud >= self.chunks_to_trigger:
+                        print("\n✋ Barge-in, stopped speaking.")
+                        self.speaker.interrupt()
+
+
+class SpeakingCallbackHandler(PrintingCallbackHandler):
+    """Prints the agent's streamed output and hands each finished sentence to the speaker."""
+
+    def __init__(self, speaker):
+        super().__init__()
+        self.speaker = speaker
+        self.enabled = False
+        self.splitter = SentenceSplitter()
+
+    def __call__(self, **kwargs):
+        super().__call__(**kwargs)
+        if self.enabled and kwargs.get("data"):
+            for sentence in self.splitter.feed(kwargs["data"]):
+                self.speaker.say(sentence)
+
+    def finish_turn(self):
+        if self.enabled:
+            for sentence in self.splitter.flush():
+                self.speaker.say(sentence)
+        self.splitter.flush()
+
+# Speech recognizer, built on the first `voice` prompt and reused: loading a Vosk
+# or Whisper model reads hundreds of MB from disk
+_recognizer = None
+
+def listen_and_transcribe(speaker=None):
+    global _recognizer
+    # Audio capture and recognizer backends load only once voice input is used
+    from speech import MicrophoneSource, SpeechPipeline, get_recognizer
+    if speaker is not None:
+        # The user is about to talk; don't talk over them
+        speaker.interrupt()
+    if _recognizer is None:
+        _recognizer = get_recognizer()
+    # Capture keeps running while earlier phrases are recognized, so nothing said is lost
+    pipeline = SpeechPipeline(MicrophoneSource(), _recognizer)
     print("🎤 Listening... (speak now, press Enter to finish)")
     transcription = []
-    stop_listening = threading.Event()
 
     def wait_for_enter():
         input()  # Wait for Enter
-        stop_listening.set()
+        pipeline.stop()
 
     enter_thread = threading.Thread(target=wait_for_enter)
     enter_thread.daemon = True
     enter_thread.start()
 
-    with mic as source:
-        recognizer.adjust_for_ambient_noise(source)
-        while not stop_listening.is_set():
-            try:
-                print("...listening for next phrase...")
-                audio = recognizer.listen(source, timeout=1, phrase_time_limit=5)
-                try:
-                    text = recognizer.recognize_google(audio)
-                    print(f"📝 Transcribed: {text}")
-                    transcription.append(text)
-                except sr.UnknownValueError:
-                    print("(Unrecognized speech, try again)")
-                except sr.RequestError as e:
-                    print(f"Could not request results; {e}")
-            except sr.WaitTimeoutError:
-                # No speech detected, keep looping
-                continue
+    pipeline.start()
+    for transcript in pipeline.transcripts():
+        print(f"📝 Transcribed: {transcript.text} ({transcript.latency * 1000:.0f} ms)")
+        transcription.append(transcript.text)
     print("🛑 Stopped listening.")
+    stats = pipeline.stats()
+    if stats["utterances"]:
+        print(f"(speech: {stats['utterances']} phrases, p50 {stats['latency_p50'] * 1000:.0f} ms, "
+              f"real-time factor {stats['real_time_factor']}, dropped {stats['dropped']})")
     return ' '.join(transcription)
 
 # Interactive loop to ask user for prompts
@@ -87,20 +222,31 @@ def interactive_agent():
     print("Type 'quit', 'exit', or 'bye' to end the session")
     print("Type 'voice' to use your microphone")
     print("-" * 50)
+    # Create model via llm_provider; set LLM_PROVIDER env var to 'openrouter' to use OpenRouter/OpenAI
+    model = get_model(provider="ollama")
+    startup_timer.mark("model")
    
     with hubitat_mcp_client:
         # Get the tools from the MCP server
         tools = hubitat_mcp_client.list_tools_sync()
+        startup_timer.mark("mcp connect")
 
+        conversation_manager = TokenBudgetConversationManager()
+        speaker = SpeechWorker()
+        callback_handler = SpeakingCallbackHandler(speaker)
+        if os.getenv("BARGE_IN", "false").lower() in ("1", "true", "yes"):
+            BargeInMonitor(speaker)
         agent = Agent(
             model=model,
+            conversation_manager=conversation_manager,
+            callback_handler=callback_handler,
             tools=tools
             # system_prompt="You are a personal AWS (Amazon Web Services) Strands agent running on a host machine named Adena. You have access to specific tools and general knowledge. You have access to the following tool(s): `file_read`, `file_write`, `calculator`. You can use these tools to assist the user. Reply concisely and to the point."
         )
+        startup_timer.mark("agent")
+        print(startup_timer.report())
         agent("Tell me what tools you have access to.")
 
-        SPEAK=False
-    
         while True:
             try:
                 user_prompt = input("\n💬 You (or type 'voice', 'speak', 'nospeak','stop'): ").strip()
@@ -108,15 +254,15 @@ def interactive_agent():
                     print("👋 Goodbye! Thanks for chatting!")
                     break
                 if user_prompt.lower() == 'voice':
-                    user_prompt = listen_and_transcribe()
+                    user_prompt = listen_and_transcribe(speaker)
                     if not user_prompt:
                         continue
                 if user_prompt.lower() == 'speak':
-                    SPEAK=True
+                    callback_handler.enabled = True
                     print("🔊 Speaking is now enabled.")
                     continue
                 if user_prompt.lower() == 'nospeak':
-                    SPEAK=False
+                    callback_handler.enabled = False
                     print("🔊 Speaking is now disabled.")
                     continue
                 if user_prompt.lower() == 'stop':
@@ -124,18 +270,24 @@ def interactive_agent():
                 if not user_prompt:
                     print("Please enter a prompt.")
                     continue
+                speaker.interrupt()
                 print("\n🤖 Agent: ", end="")
-                response = agent(user_prompt)
-                response_text = str(response)     
-
-                if SPEAK:
-                    text_to_speech(text=response_text)
+                start = time.perf_counter()
+                speaker.first_audio_at = None
+                # Sentences are spoken by the worker thread while the rest is still generating
+                agent(user_prompt)
+                callback_handler.finish_turn()
+                timing = f"context: ~{conversation_manager.context_tokens} tokens"
+                if speaker.first_audio_at is not None:
+                    timing += f", first audio after {speaker.first_audio_at - start:.1f}s"
+                print(f"\n({timing})")
             except KeyboardInterrupt:
                 print("\n\n👋 Session interrupted. Goodbye!")
                 break
             except Exception as e:
                 print(f"\n❌ Error: {e}")
                 print("Please try again.")
+        speaker.close()
 
 if __name__ == "__main__":
     interactive_agent()
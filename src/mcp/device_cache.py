@@ -0,0 +1,61 @@
+"""In-process TTL cache for Hubitat device inventory and details.
+
+Usage:
+    from .device_cache import TTLCache
+    cache = TTLCache(ttl=30, maxsize=512)
+    value = cache.get("devices")   # None on miss or expiry
+    cache.set("devices", devices)
+
+Entries expire after `ttl` seconds and the least recently used entry is evicted
+once `maxsize` is reached. Hit and miss counters are kept for `stats()`.
+"""
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+import time
+
+
+class TTLCache:
+    """Size-bounded LRU cache whose entries expire after a fixed TTL."""
+
+    def __init__(self, ttl: float = 30.0, maxsize: int = 512):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any):
+        if self.ttl <= 0 or self.maxsize <= 0:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+        }
@@ -0,0 +1,167 @@
+"""Searchable index over the Hubitat device inventory.
+
+Usage:
+    from .device_index import DeviceIndex
+    index = DeviceIndex(ttl=300)
+    index.update(devices)                      # /devices/all payload, re-indexes only changed devices
+    index.search("kitchen light", capability="Switch", limit=5)
+    index.select("kitchen lights", capability="Switch")   # every match, no fuzzy hits
+
+Labels, names, types, rooms and capabilities are normalized into tokens in an
+inverted index. Query tokens match exactly, by prefix, or fuzzily (difflib) so
+"kitchn lite" still finds "Kitchen Light". Only a short summary per device is returned.
+"""
+from typing import Any, Dict, Iterable, List, Optional, Set
+import difflib
+import re
+import time
+
+# Fields that make up a device's searchable text, in decreasing weight
+FIELD_WEIGHTS = {"label": 1.0, "name": 0.8, "room": 0.8, "type": 0.6}
+CAPABILITY_WEIGHT = 0.5
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_CAMEL_RE = re.compile(r"(?<=[a-z0-9])(?=[A-Z])")
+
+
+def normalize(text: Any) -> str:
+    return " ".join(tokenize(text))
+
+
+def tokenize(text: Any) -> List[str]:
+    return _TOKEN_RE.findall(str(text or "").lower())
+
+
+def capability_names(device: Dict[str, Any]) -> Set[str]:
+    """Capabilities as normalized names; /devices/all mixes strings and attribute dicts."""
+    return {normalize(c) for c in device.get("capabilities") or [] if isinstance(c, str)}
+
+
+class DeviceIndex:
+    """Inverted token index over device label, name, room, type and capabilities."""
+
+    def __init__(self, ttl: float = 300.0):
+        self.ttl = ttl
+        self.updated_at: Optional[float] = None
+        self._devices: Dict[str, Dict[str, Any]] = {}
+        self._fingerprints: Dict[str, tuple] = {}
+        self._tokens: Dict[str, Dict[str, float]] = {}
+
+    def __len__(self):
+        return len(self._devices)
+
+    def is_stale(self) -> bool:
+        return self.updated_at is None or time.monotonic() - self.updated_at > self.ttl
+
+    @staticmethod
+    def fingerprint(device: Dict[str, Any]) -> tuple:
+        return (
+            *(str(device.get(field) or "") for field in FIELD_WEIGHTS),
+            tuple(sorted(capability_names(device))),
+        )
+
+    def update(self, devices: Iterable[Dict[str, Any]]) -> int:
+        """Sync the index with a full inventory; returns how many devices were (re)indexed."""
+        seen = set()
+        changed = 0
+        for device in devices:
+            device_id = str(device.get("id"))
+            seen.add(device_id)
+            fingerprint = self.fingerprint(device)
+            if self._fingerprints.get(device_id) == fingerprint:
+                continue
+            self._remove(device_id)
+            self._add(device_id, device, fingerprint)
+            changed += 1
+        for device_id in set(self._devices) - seen:
+            self._remove(device_id)
+            changed += 1
+        self.updated_at = time.monotonic()
+        return changed
+
+    def _add(self, device_id: str, device: Dict[str, Any], fingerprint: tuple):
+        self._devices[device_id] = {
+            "id": device_id,
+            "label": device.get("label") or device.get("name"),
+            "type": device.get("type"),
+            "room": device.get("room"),
+            "capabilities": sorted(c for c in device.get("capabilities") or [] if isinstance(c, str)),
+        }
+        self._fingerprints[device_id] = fingerprint
+        weighted = [(tokenize(device.get(field)), weight) for field, weight in FIELD_WEIGHTS.items()]
+        # "TemperatureMeasurement" -> "temperature", "measurement"
+        weighted += [
+            (tokenize(_CAMEL_RE.sub(" ", c)), CAPABILITY_WEIGHT) for c in self._devices[device_id]["capabilities"]
+        ]
+        for tokens, weight in weighted:
+            for token in tokens:
+                postings = self._tokens.setdefault(token, {})
+                postings[device_id] = max(postings.get(device_id, 0.0), weight)
+
+    def _remove(self, device_id: str):
+        if self._devices.pop(device_id, None) is None:
+            return
+        self._fingerprints.pop(device_id, None)
+        for token in list(self._tokens):
+            postings = self._tokens[token]
+            postings.pop(device_id, None)
+            if not postings:
+                del self._tokens[token]
+
+    def _match_token(self, query_token: str) -> Dict[str, float]:
+        """Score every device for one query token: exact > prefix > fuzzy."""
+        scores: Dict[str, float] = {}
+
+        def add(token, factor):
+            for device_id, weight in self._tokens[token].items():
+                scores[device_id] = max(scores.get(device_id, 0.0), weight * factor)
+
+        if query_token in self._tokens:
+            add(query_token, 1.0)
+        for token in self._tokens:
+            if token != query_token and token.startswith(query_token):
+                add(token, 0.8)
+        if not scores:
+            for token in difflib.get_close_matches(query_token, self._tokens, n=3, cutoff=0.6):
+                add(token, 0.6 * difflib.SequenceMatcher(None, query_token, token).ratio())
+        return scores
+
+    def search(self, query: str, capability: Optional[str] = None, limit: int = 10) -> List[Dict[str, Any]]:
+        """Return device summaries ranked by how well they match the query."""
+        wanted = normalize(capability) if capability else None
+        candidates = [
+            device_id for device_id in self._devices
+            if not wanted or wanted in capability_names(self._devices[device_id])
+        ]
+        query_tokens = tokenize(query)
+        if not query_tokens:
+            ranked = [(0.0, device_id) for device_id in candidates]
+        else:
+            totals: Dict[str, float] = {}
+            for query_token in query_tokens:
+                for device_id, score in self._match_token(query_token).items():
+                    totals[device_id] = totals.get(device_id, 0.0) + score
+            ranked = [(totals[device_id] / len(query_tokens), device_id) for device_id in candidates if device_id in totals]
+        ranked.sort(key=lambda item: (-item[0], self._devices[item[1]]["label"] or ""))
+        return [dict(self._devices[device_id], score=round(score, 2)) for score, device_id in ranked[:limit]]
+
+    def select(self, query: str, capability: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Every device with `capability` matching all query tokens exactly or by prefix.
+
+        Unlike search() nothing is fuzzy or partial, since the result is used to
+        command devices in bulk. A plural query token also matches its singular.
+        """
+        wanted = normalize(capability) if capability else None
+        selected: Optional[Set[str]] = None
+        for query_token in tokenize(query):
+            forms = {query_token, query_token[:-1]} if len(query_token) > 3 and query_token.endswith("s") else {query_token}
+            matches = {
+                device_id for token, postings in self._tokens.items()
+                if any(token.startswith(form) for form in forms) for device_id in postings
+            }
+            selected = matches if selected is None else selected & matches
+        return sorted(
+            (self._devices[device_id] for device_id in selected or ()
+             if not wanted or wanted in capability_names(self._devices[device_id])),
+            key=lambda device: device["label"] or "",
+        )
@@ -0,0 +1,65 @@
+"""Stub Maker API event generator for exercising the /events receiver locally.
+
+Usage:
+    python -m src.mcp.event_stub --url http://localhost:8888/events --devices 1,2,3 --rate 5
+
+POSTs randomized device events in the same shape the Maker API
+"POST device events to URL" feed sends, so the live state table can be tested
+without a real hub.
+"""
+import argparse
+import random
+import time
+
+import httpx
+
+# Attribute name -> value generator, roughly what a house of sensors and outlets reports
+ATTRIBUTES = {
+    "switch": lambda: random.choice(["on", "off"]),
+    "temperature": lambda: round(random.uniform(62.0, 78.0), 1),
+    "humidity": lambda: random.randint(30, 60),
+    "power": lambda: round(random.uniform(0.0, 120.0), 1),
+    "battery": lambda: random.randint(20, 100),
+    "motion": lambda: random.choice(["active", "inactive"]),
+}
+
+
+def make_event(device_id: str, attribute: str = None) -> dict:
+    """Build one Maker API event body for a device."""
+    attribute = attribute or random.choice(list(ATTRIBUTES))
+    return {
+        "content": {
+            "name": attribute,
+            "value": str(ATTRIBUTES[attribute]()),
+            "displayName": f"Stub Device {device_id}",
+            "deviceId": str(device_id),
+            "descriptionText": None,
+            "unit": None,
+            "type": None,
+            "data": None,
+        }
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="POST stub Maker API device events")
+    parser.add_argument("--url", default="http://localhost:8888/events")
+    parser.add_argument("--devices", default="1,2,3", help="Comma separated device IDs")
+    parser.add_argument("--rate", type=float, default=2.0, help="Events per second")
+    parser.add_argument("--count", type=int, default=0, help="Stop after N events (0 = forever)")
+    args = parser.parse_args()
+
+    device_ids = [d.strip() for d in args.devices.split(",") if d.strip()]
+    sent = 0
+    with httpx.Client(timeout=5) as client:
+        while not args.count or sent < args.count:
+            event = make_event(random.choice(device_ids))
+            r = client.post(args.url, json=event)
+            content = event["content"]
+            print(f"{content['deviceId']} {content['name']}={content['value']} -> {r.status_code}")
+            sent += 1
+            time.sleep(1 / args.rate)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+"""Shared async client for the Hubitat Maker API.
+
+Usage:
+    from .hubitat_client import get_client
+    devices = await get_client().get_json("devices")
+
+One pooled `httpx.AsyncClient` is shared by every MCP tool so calls reuse
+keep-alive connections to the hub instead of opening a new socket each time,
+and never block the server's event loop.
+
+The hub is a small embedded box, so traffic to it is governed: identical
+in-flight reads are coalesced into one upstream request, at most
+HUB_MAX_CONCURRENCY requests run at once, and HUB_RATE_LIMIT can cap requests
+per second (token bucket). The concurrency cap alone keeps a hub responsive,
+so the rate limit is off by default (0): at 20/s a 13-outlet `control_devices`
+fan-out waits ~0.4s on tokens alone. Set it for hubs that fall over under
+bursts, keeping HUB_RATE_BURST at least HUB_BULK_CONCURRENCY. `stats()` reports queueing metrics, and
+every request is traced and counted through the OpenTelemetry API (see
+src/telemetry.py).
+
+Configuration comes from environment variables: HUB_HOST, HUB_ACCESS_TOKEN,
+HUB_TIMEOUT, HUB_CONNECT_TIMEOUT, HUB_MAX_CONNECTIONS, HUB_MAX_KEEPALIVE,
+HUB_MAX_RETRIES, HUB_RETRY_BACKOFF, HUB_MAX_CONCURRENCY, HUB_RATE_LIMIT,
+HUB_RATE_BURST.
+
+Reads (`get_json`) are retried on timeouts and busy statuses; commands only
+when the connection could not be made, so a command is never sent twice.
+"""
+from typing import Any, Dict, Optional
+import asyncio
+import os
+import re
+import time
+
+import httpx
+from opentelemetry import metrics, trace
+from opentelemetry.trace import SpanKind, Status, StatusCode
+
+# Status codes worth retrying; the hub returns these while busy or rebooting.
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+tracer = trace.get_tracer(__name__)
+meter = metrics.get_meter(__name__)
+hub_requests = meter.create_counter("hub.requests", description="Requests sent to the hub, by HTTP status")
+hub_errors = meter.create_counter("hub.errors", description="Hub calls that failed after all retries")
+hub_duration = meter.create_histogram(
+    "hub.request.duration", unit="s", description="Hub response time per request, by path template",
+    explicit_bucket_boundaries_advisory=[0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10],
+)
+
+
+def path_template(url: str) -> str:
+    """'/devices/12/setLevel/50' -> '/devices/{id}/setLevel/{id}', to keep metric labels bounded."""
+    return re.sub(r"/\d[^/]*", "/{id}", url)
+
+
+class HubitatError(RuntimeError):
+    """Raised when the hub cannot be reached or keeps returning errors."""
+
+
+class RateLimiter:
+    """Token bucket allowing `rate` requests per second with bursts of `burst`."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock: Optional[asyncio.Lock] = None
+
+    async def acquire(self):
+        if self.rate <= 0:
+            return
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class HubitatClient:
+    """Pooled, retrying async client for one Hubitat Maker API endpoint."""
+
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        token: Optional[str] = None,
+        timeout: Optional[float] = None,
+        connect_timeout: Optional[float] = None,
+        max_connections: Optional[int] = None,
+        max_keepalive: Optional[int] = None,
+        max_retries: Optional[int] = None,
+        retry_backoff: Optional[float] = None,
+        max_concurrency: Optional[int] = None,
+        rate_limit: Optional[float] = None,
+        rate_burst: Optional[int] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.base_url = (base_url or os.getenv("HUB_HOST") or "").rstrip("/")
+        self.token = token or os.getenv("HUB_ACCESS_TOKEN")
+        self.timeout = timeout if timeout is not None else float(os.getenv("HUB_TIMEOUT", "10"))
+        self.connect_timeout = (
+            connect_timeout if connect_timeout is not None else float(os.getenv("HUB_CONNECT_TIMEOUT", "3"))
+        )
+        self.max_connections = max_connections or int(os.getenv("HUB_MAX_CONNECTIONS", "10"))
+        self.max_keepalive = max_keepalive or int(os.getenv("HUB_MAX_KEEPALIVE", "5"))
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv("HUB_MAX_RETRIES", "2"))
+        self.retry_backoff = (
+            retry_backoff if retry_backoff is not None else float(os.getenv("HUB_RETRY_BACKOFF", "0.25"))
+        )
+        self.max_concurrency = max_concurrency or int(os.getenv("HUB_MAX_CONCURRENCY", "4"))
+        self.rate_limiter = RateLimiter(
+            rate_limit if rate_limit is not None else float(os.getenv("HUB_RATE_LIMIT", "0")),
+            rate_burst or int(os.getenv("HUB_RATE_BURST", "5")),
+        )
+        # Custom transport for the pooled client, e.g. httpx.MockTransport in tests
+        self.transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._metrics = {
+            "requests": 0,
+            "coalesced": 0,
+            "retries": 0,
+            "errors": 0,
+            "queued": 0,
+            "max_queued": 0,
+            "in_flight": 0,
+            "wait_seconds": 0.0,
+            "max_wait_seconds": 0.0,
+        }
+
+    def _get_http(self) -> httpx.AsyncClient:
+        # Created lazily so the client binds to the loop that actually serves requests
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout),
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_keepalive,
+                ),
+                transport=self.transport,
+            )
+        return self._client
+
+    async def _send(self, url: str, params: Dict[str, Any]) -> httpx.Response:
+        """Send one request once the concurrency governor and rate limiter allow it."""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        metrics = self._metrics
+        metrics["queued"] += 1
+        metrics["max_queued"] = max(metrics["max_queued"], metrics["queued"])
+        queued_at = time.monotonic()
+        dequeued = False
+        try:
+            async with self._semaphore:
+                await self.rate_limiter.acquire()
+                metrics["queued"] -= 1
+                dequeued = True
+                waited = time.monotonic() - queued_at
+                metrics["wait_seconds"] += waited
+                metrics["max_wait_seconds"] = max(metrics["max_wait_seconds"], waited)
+                metrics["requests"] += 1
+                metrics["in_flight"] += 1
+                sent_at = time.monotonic()
+                status = "transport_error"
+                try:
+                    response = await self._get_http().get(url, params=params)
+                    status = str(response.status_code)
+                    return response
+                finally:
+                    metrics["in_flight"] -= 1
+                    hub_requests.add(1, {"status": status})
+                    hub_duration.record(time.monotonic() - sent_at, {"path": path_template(url)})
+        finally:
+            # Cancelled while still waiting in the queue
+            if not dequeued:
+                metrics["queued"] -= 1
+
+    async def get(self, path: str, idempotent: bool = False) -> httpx.Response:
+        """GET a Maker API path (e.g. 'devices/1/on'), retrying with backoff.
+
+        Commands such as push or setCode must not run twice, so unless the call
+        is `idempotent` only failures to connect (the hub never saw the request)
+        are retried; a timeout or error status after sending is final.
+        """
+        url = f"/{path.lstrip('/')}"
+        params = {"access_token": self.token}
+        last_error: Optional[Exception] = None
+
+        with tracer.start_as_current_span(
+            f"hub GET {path_template(url)}", kind=SpanKind.CLIENT, attributes={"url.path": url}
+        ) as span:
+            for attempt in range(self.max_retries + 1):
+                if attempt:
+                    self._metrics["retries"] += 1
+                    span.set_attribute("hub.retries", attempt)
+                    await asyncio.sleep(self.retry_backoff * (2 ** (attempt - 1)))
+                try:
+                    response = await self._send(url, params)
+                except httpx.TransportError as e:
+                    last_error = e
+                    if idempotent or isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout)):
+                        continue
+                    break
+                if response.status_code in RETRY_STATUSES:
+                    # Still busy after the last attempt counts as a failed call, not a response
+                    last_error = HubitatError(f"Hub returned {response.status_code} for {url}")
+                    if idempotent:
+                        continue
+                    break
+                span.set_attribute("http.response.status_code", response.status_code)
+                return response
+
+            self._metrics["errors"] += 1
+            hub_errors.add(1, {"path": path_template(url)})
+            span.set_status(Status(StatusCode.ERROR, str(last_error)))
+            raise HubitatError(f"Hub request to {url} failed after {attempt + 1} attempts: {last_error}")
+
+    async def _fetch_json(self, path: str) -> Any:
+        response = await self.get(path, idempotent=True)
+        response.raise_for_status()
+        return response.json()
+
+    async def get_json(self, path: str) -> Any:
+        """GET a Maker API path and decode the JSON body.
+
+        Concurrent calls for the same path share one upstream request. Only use
+        this for reads; commands go through `get` so each one reaches the hub.
+        """
+        task = self._inflight.get(path)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch_json(path))
+            self._inflight[path] = task
+            task.add_done_callback(lambda _: self._inflight.pop(path, None))
+        else:
+            self._metrics["coalesced"] += 1
+        # Shielded so one caller giving up doesn't cancel the request for the others
+        return await asyncio.shield(task)
+
+    def stats(self) -> Dict[str, Any]:
+        metrics = dict(self._metrics)
+        metrics["avg_wait_seconds"] = round(metrics["wait_seconds"] / metrics["requests"], 4) if metrics["requests"] else 0.0
+        metrics["wait_seconds"] = round(metrics["wait_seconds"], 4)
+        metrics["max_wait_seconds"] = round(metrics["max_wait_seconds"], 4)
+        metrics["max_concurrency"] = self.max_concurrency
+        metrics["rate_limit"] = self.rate_limiter.rate
+        return metrics
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+_client: Optional[HubitatClient] = None
+
+
+def get_client() -> HubitatClient:
+    """Return the process-wide shared Hubitat client."""
+    global _client
+    if _client is None:
+        _client = HubitatClient()
+    return _client
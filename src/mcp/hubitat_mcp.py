@@ -1,80 +1,347 @@
+from ..startup import startup_timer
 import os
 import json
+import asyncio
+import inspect
+import logging
+import time
 from fastmcp import FastMCP
+from fastmcp.server.middleware import Middleware
 from dotenv import load_dotenv
-import requests
+from opentelemetry import metrics, trace
+from opentelemetry.trace import SpanKind, Status, StatusCode
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse
+
+from .device_cache import TTLCache
+from .device_index import DeviceIndex
+from .hubitat_client import HubitatError, get_client
+from .metadata_store import MetadataStore, fingerprint
+from .output import encode, log_payload, paginate, project
+from .scenes import SceneBook, SceneError
+from .state_store import DeviceStateStore
+from .timeseries import DEFAULT_ATTRIBUTES, SeriesStore
+from ..telemetry import metrics_text, recent_traces, setup_telemetry, traces_exporter
 
 load_dotenv()
+logger = logging.getLogger(__name__)
+
+# Fraction of tool calls whose full payload is logged at DEBUG
+LOG_SAMPLE_RATE = float(os.getenv("HUB_LOG_SAMPLE_RATE", "0.1"))
+# Default page size for device_history
+HISTORY_LIMIT = int(os.getenv("HUB_HISTORY_LIMIT", "50"))
+
 # Create an MCP server
 mcp = FastMCP("Hubitat MCP Server")
 
-HUBITAT_BASE_URL = os.getenv("HUB_HOST")
+tracer = trace.get_tracer(__name__)
+tool_duration = metrics.get_meter(__name__).create_histogram(
+    "mcp.tool.duration", unit="s", description="MCP tool call latency, by tool and outcome",
+    explicit_bucket_boundaries_advisory=[0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10],
+)
+
+class TelemetryMiddleware(Middleware):
+    """Wraps every tool call in a span (continuing the agent's trace) and times it."""
+
+    async def on_call_tool(self, context, call_next):
+        name = context.message.name
+        start = time.perf_counter()
+        status = "ok"
+        with tracer.start_as_current_span(f"mcp tool {name}", kind=SpanKind.SERVER,
+                                          attributes={"mcp.tool.name": name}) as span:
+            try:
+                return await call_next(context)
+            except Exception as e:
+                status = "error"
+                span.set_status(Status(StatusCode.ERROR, str(e)))
+                raise
+            finally:
+                tool_duration.record(time.perf_counter() - start, {"tool": name, "status": status})
+
+mcp.add_middleware(TelemetryMiddleware())
+
+# Shared pooled client; every tool goes through it so hub calls never block the event loop
+hub = get_client()
+
+# Device inventory and per-device details are re-read many times within one agent turn
+device_cache = TTLCache(
+    ttl=float(os.getenv("HUB_CACHE_TTL", "30")),
+    maxsize=int(os.getenv("HUB_CACHE_SIZE", "512")),
+)
+
+async def cached_get_json(path):
+    """Return a Maker API GET from the device cache, fetching it on a miss."""
+    data = device_cache.get(path)
+    if data is None:
+        data = await hub.get_json(path)
+        device_cache.set(path, data)
+    return data
+
+# Live device state pushed by the Maker API "POST device events to URL" feed
+state_store = DeviceStateStore(max_age=float(os.getenv("HUB_STATE_MAX_AGE", "600")))
+
+HUB_EVENTS_TOKEN = os.getenv("HUB_EVENTS_TOKEN")
+
+# Token index over the inventory so lookups don't need a full list_devices dump
+device_index = DeviceIndex(ttl=float(os.getenv("HUB_INDEX_TTL", "300")))
+
+# Ring-buffered history of numeric attributes for aggregate queries
+series_store = SeriesStore(
+    attributes=[a.strip() for a in os.getenv("HUB_SERIES_ATTRIBUTES", ",".join(DEFAULT_ATTRIBUTES)).split(",") if a.strip()],
+    capacity=int(os.getenv("HUB_SERIES_CAPACITY", "4096")),
+    backfill_ttl=float(os.getenv("HUB_SERIES_BACKFILL_TTL", "300")),
+    dedup_window=float(os.getenv("HUB_SERIES_DEDUP_WINDOW", "30")),
+)
+
+# Capabilities and commands survive restarts; stale entries are revalidated in the background
+metadata_store = MetadataStore(
+    path=os.getenv("HUB_METADATA_DB", ".cache/hubitat_metadata.sqlite"),
+    revalidate_after=float(os.getenv("HUB_METADATA_REVALIDATE", "3600")),
+)
+_revalidations = {}
+
+# Upper bound on hub commands in flight from a single control_devices call
+BULK_CONCURRENCY = int(os.getenv("HUB_BULK_CONCURRENCY", "5"))
+
+# Capability a control_devices selector is limited to, by command, so "light" + off
+# reaches switches and dimmers but not light sensors
+COMMAND_CAPABILITIES = {
+    "on": "Switch", "off": "Switch", "setLevel": "SwitchLevel",
+    "lock": "Lock", "unlock": "Lock",
+    "setColor": "ColorControl", "setHue": "ColorControl", "setSaturation": "ColorControl",
+    "setColorTemperature": "ColorTemperature",
+    "setHeatingSetpoint": "Thermostat", "setCoolingSetpoint": "Thermostat", "setThermostatMode": "Thermostat",
+    "push": "PushableButton", "refresh": "Refresh",
+}
+
+def _valid_entry(entry) -> bool:
+    """A control_devices entry with a device id (string or int) and a command string."""
+    if not isinstance(entry, dict):
+        return False
+    device_id, command = entry.get("device_id"), entry.get("command")
+    has_id = (isinstance(device_id, str) and device_id.strip() != "") or (
+        isinstance(device_id, int) and not isinstance(device_id, bool))
+    return has_id and isinstance(command, str) and command.strip() != ""
+
+# Named routines compiled against the inventory once and run without any model turns
+scene_book = SceneBook(
+    path=os.getenv("HUB_SCENES_FILE", "scenes.json"),
+    ttl=float(os.getenv("HUB_SCENES_TTL", "3600")),
+)
+
+@mcp.custom_route("/events", methods=["POST"])
+async def receive_events(request: Request):
+    """Receive device events POSTed by the Maker API and update the state table."""
+    return await handle_events(request, record_event)
+
+async def handle_events(request: Request, apply) -> JSONResponse:
+    """Check and parse a Maker API event POST, then hand the payload to `apply`.
+
+    `apply` is `record_event` or a wrapper returning an awaitable of its result,
+    for callers on a thread other than the tools' (see hubitat_a2a).
+    """
+    if HUB_EVENTS_TOKEN and request.query_params.get("token") != HUB_EVENTS_TOKEN:
+        return JSONResponse({"status": "forbidden"}, status_code=403)
+    try:
+        payload = await request.json()
+    except ValueError:
+        return JSONResponse({"status": "invalid json"}, status_code=400)
+    if not isinstance(payload, dict):
+        return JSONResponse({"status": "expected a JSON object"}, status_code=400)
+    device_id = apply(payload)
+    if inspect.isawaitable(device_id):
+        device_id = await device_id
+    return JSONResponse({"status": "ok" if device_id else "ignored"})
+
+def record_event(payload: dict) -> str | None:
+    """Apply one Maker API event to the state table, history and device cache.
+
+    Returns the event's device id, or None when the event was ignored. Not
+    thread-safe: run it on the event loop the tools run on.
+    """
+    device_id = state_store.apply_event(payload)
+    if device_id is None:
+        return None
+    content = payload.get("content", payload)
+    series_store.ingest(device_id, content.get("name"), content.get("value"))
+    device_cache.invalidate(f"devices/{device_id}")
+    return device_id
+
+@mcp.custom_route("/metrics", methods=["GET"])
+async def prometheus_metrics(request: Request):
+    """Prometheus scrape endpoint: tool latency, hub requests and errors."""
+    return PlainTextResponse(metrics_text(), media_type="text/plain; version=0.0.4")
 
-HUBITAT_TOKEN = os.getenv("HUB_ACCESS_TOKEN")
+@mcp.custom_route("/traces", methods=["GET"])
+async def traces(request: Request):
+    """Most recent traces kept in memory (OTEL_TRACES_EXPORTER=memory)."""
+    return JSONResponse(recent_traces(int(request.query_params.get("limit", "20"))))
 
-@mcp.tool(description="List the Hubitat Devices")
-def list_devices():
-    """Return a list of devices from Hubitat Maker API and log them nicely."""
-    url = f"{HUBITAT_BASE_URL}/devices?access_token={HUBITAT_TOKEN}"
-    r = requests.get(url)
-    devices = r.json()
+@mcp.tool(description="""List the Hubitat Devices.
+Optional `fields` keeps only those keys (e.g. ["id", "label"]); `compact` returns
+{"columns": [...], "rows": [[...]]} instead of one object per device.""")
+async def list_devices(fields: list[str] | None = None, compact: bool = False):
+    """Return a list of devices from Hubitat Maker API"""
+    devices = await cached_get_json("devices")
 
-    print("\n=== Hubitat Devices ===")
-    for d in devices:
-        name = d.get("label") or d.get("name", "Unknown")
-        device_id = d.get("id", "?")
-        device_type = d.get("type", "?")
-        print(f"- {name} (ID: {device_id}, Type: {device_type})")
-    print("=======================\n")
+    logger.info("Listed %d Hubitat devices", len(devices))
+    log_payload(logger, "Hubitat devices", devices, LOG_SAMPLE_RATE)
 
-    return json.dumps(devices)
+    return encode(devices, fields=fields, compact=compact)
 
-@mcp.tool(description="Check Specific Device Details")
-def device_details(device_id):
+async def refresh_index():
+    """Re-index the inventory if the device index is stale."""
+    if device_index.is_stale():
+        changed = device_index.update(await cached_get_json("devices/all"))
+        logger.info("Device index refreshed: %d of %d devices re-indexed", changed, len(device_index))
+
+@mcp.tool(description="""Find Hubitat Devices by name, room, type or capability.
+Returns only matching device IDs with a short summary; prefer this over list_devices
+when looking for specific devices (e.g. query="kitchen light", capability="Switch").""")
+async def find_devices(query: str, capability: str | None = None, limit: int = 10):
+    """Search the device index, refreshing it from the hub when it is stale"""
+    await refresh_index()
+    matches = device_index.search(query, capability=capability, limit=limit)
+    return json.dumps(matches)
+
+@mcp.tool(description="""Check Specific Device Details.
+Optional `fields` keeps only those keys (e.g. ["label", "attributes"]); `compact`
+row-encodes the attribute list.""")
+async def device_details(device_id, fields: list[str] | None = None, compact: bool = False):
     """Return the details for a specific device"""
-    url = f"{HUBITAT_BASE_URL}/devices/{device_id}?access_token={HUBITAT_TOKEN}"
-    r = requests.get(url)
-    device_details = r.json()
+    device_details = state_store.details(device_id)
+    if device_details is None:
+        device_details = await cached_get_json(f"devices/{device_id}")
+        state_store.seed(device_details)
 
-    print(f"Device '{device_id}': {device_details}")
+    log_payload(logger, f"Device '{device_id}'", device_details, LOG_SAMPLE_RATE)
 
-    return json.dumps(device_details)
+    return encode(device_details, fields=fields, compact=compact)
 
-@mcp.tool(description="Check Event History for a Specific Device")
-def device_history(device_id):
+@mcp.tool(description="""Check Event History for a Specific Device.
+Returns one page of events, newest first: `limit` events starting at `offset`, plus
+`total` and `next_offset` (null on the last page). Optional `fields` (e.g. ["name",
+"value", "date"]) and `compact` row encoding shrink the result.""")
+async def device_history(device_id, offset: int = 0, limit: int = HISTORY_LIMIT,
+                         fields: list[str] | None = None, compact: bool = False):
     """Return the event history for a specific device"""
-    url = f"{HUBITAT_BASE_URL}/devices/{device_id}/events?access_token={HUBITAT_TOKEN}"
-    r = requests.get(url)
-    events = r.json()
+    events = await hub.get_json(f"devices/{device_id}/events")
+    series_store.ingest_history(device_id, events)
+
+    logger.info("Device '%s': %d events", device_id, len(events))
+    log_payload(logger, f"Device '{device_id}' Events", events, LOG_SAMPLE_RATE)
+
+    page = paginate(events, offset=offset, limit=limit)
+    page["events"] = project(page.pop("items"), fields)
+    return encode(page, compact=compact)
+
+async def backfill_series(device_ids):
+    """Pull event history from the hub for devices whose series are missing or stale."""
+    missing = [str(d) for d in device_ids if series_store.needs_backfill(d)]
+
+    async def backfill(device_id):
+        events = await hub.get_json(f"devices/{device_id}/events")
+        series_store.ingest_history(device_id, events)
+
+    await asyncio.gather(*(backfill(device_id) for device_id in missing))
 
-    print(f"Device '{device_id}' Events: {events}")
+@mcp.tool(description="""Aggregate a numeric attribute (temperature, humidity, power, battery, ...)
+over the last `hours` for one or more devices. Returns count/min/max/avg/last per device
+and combined across all of them, e.g. attribute="temperature", device_ids=["12", "34"], hours=6.""")
+async def attribute_stats(attribute: str, device_ids: list[str], hours: float = 6):
+    """Return min/max/avg/last of an attribute over a time window"""
+    await backfill_series(device_ids)
+    until = time.time()
+    return json.dumps(series_store.stats(device_ids, attribute, since=until - hours * 3600, until=until))
 
-    return json.dumps(events)
+@mcp.tool(description="""Downsampled series of a numeric attribute over the last `hours`,
+averaged into `buckets` equal time slices per device: {device_id: [[bucket_start_epoch, avg], ...]}.
+Empty buckets have a null average.""")
+async def attribute_series(attribute: str, device_ids: list[str], hours: float = 6, buckets: int = 24):
+    """Return a downsampled time series of an attribute for each device"""
+    await backfill_series(device_ids)
+    until = time.time()
+    since = until - hours * 3600
+    return json.dumps({
+        str(device_id): series_store.downsample(device_id, attribute, since, until, buckets=max(buckets, 1))
+        for device_id in device_ids
+    }, separators=(",", ":"))
+
+async def inventory_fingerprint(device_id):
+    """Fingerprint of the device's inventory entry, or None if the hub doesn't list it."""
+    for d in await cached_get_json("devices"):
+        if str(d.get("id")) == str(device_id):
+            return fingerprint(d)
+    return None
+
+async def fetch_metadata(device_id, kind):
+    """Fetch capabilities/commands from the hub and persist them with the device fingerprint."""
+    data, device_fingerprint = await asyncio.gather(
+        hub.get_json(f"devices/{device_id}/{kind}"), inventory_fingerprint(device_id)
+    )
+    metadata_store.put(device_id, kind, device_fingerprint or "", data)
+    return data
+
+async def revalidate_metadata(device_id, kind, entry):
+    """Re-fetch a stored entry only if the device's driver changed since it was stored."""
+    try:
+        if await inventory_fingerprint(device_id) == entry.fingerprint:
+            metadata_store.touch(device_id, kind)
+        else:
+            await fetch_metadata(device_id, kind)
+            metadata_store.record_refresh()
+            logger.info("Device '%s' %s changed; refreshed stored copy", device_id, kind)
+    except Exception as e:
+        logger.warning("Revalidating device '%s' %s failed: %s", device_id, kind, e)
+    finally:
+        _revalidations.pop((str(device_id), kind), None)
+
+async def get_metadata(device_id, kind):
+    """Return stored capabilities/commands, fetching on a miss and revalidating stale ones lazily."""
+    entry = metadata_store.get(device_id, kind)
+    if entry is None:
+        return await fetch_metadata(device_id, kind)
+    key = (str(device_id), kind)
+    if metadata_store.needs_revalidation(entry) and key not in _revalidations:
+        _revalidations[key] = asyncio.create_task(revalidate_metadata(device_id, kind, entry))
+    return entry.data
 
 @mcp.tool(description="Get Capabilities for a Specific Device")
-def device_capabilities(device_id):
+async def device_capabilities(device_id):
     """Return a the capabilities for a specific device"""
-    url = f"{HUBITAT_BASE_URL}/devices/{device_id}/capabilities?access_token={HUBITAT_TOKEN}"
-    r = requests.get(url)
-    capabilities = r.json()
+    capabilities = await get_metadata(device_id, "capabilities")
 
-    print(f"Device '{device_id}' Events: {capabilities}")
+    log_payload(logger, f"Device '{device_id}' Capabilities", capabilities, LOG_SAMPLE_RATE)
 
     return json.dumps(capabilities)
 
 @mcp.tool(description="Check Commands for a Specific Device")
-def device_commands(device_id):
+async def device_commands(device_id):
     """Return a the commands for a specific device"""
-    url = f"{HUBITAT_BASE_URL}/devices/{device_id}/commands?access_token={HUBITAT_TOKEN}"
-    r = requests.get(url)
-    commands = r.json()
+    commands = await get_metadata(device_id, "commands")
 
-    print(f"Device '{device_id}' Commands: {commands}")
+    log_payload(logger, f"Device '{device_id}' Commands", commands, LOG_SAMPLE_RATE)
 
     return json.dumps(commands)
 
+async def send_command(device_id, command):
+    """Send one command to the hub and drop any cached state for the device."""
+    path = f"devices/{device_id}/{command}"
+    logger.debug("Path '%s'", path)
+    try:
+        r = await hub.get(path)
+        status = "ok" if r.status_code == 200 else "error"
+    except HubitatError as e:
+        logger.warning("Command '%s' to device ID %s failed: %s", command, device_id, e)
+        status = "error"
+    # The device's state just changed (or may have), so drop its cached details
+    device_cache.invalidate(f"devices/{device_id}")
+    state_store.mark_stale(device_id)
+    logger.info("Command '%s' sent to device ID %s - Status: %s", command, device_id, status)
+    return status
+
 @mcp.tool(description="Command the Hubitat Devices")
-def control_device(device_id, command):
+async def control_device(device_id, command):
     """Send a command to a Hubitat device.
     Example: To turn on a light device ID 1
 
@@ -88,15 +355,133 @@ def control_device(device_id, command):
 
     /devices/1321/setCode/3,4321,Guest
     """
-    url = f"{HUBITAT_BASE_URL}/devices/{device_id}/{command}?access_token={HUBITAT_TOKEN}"
-    print(f"URL '{url}'")
-    r = requests.get(url)
-    status = "ok" if r.status_code == 200 else "error"
-    print(f"Command '{command}' sent to device ID {device_id} - Status: {status}")
+    status = await send_command(device_id, command)
     return json.dumps({"status": status}, indent=2)
 
+@mcp.tool(description="""Command many Hubitat Devices at once.
+Pass either `commands`, a list of {"device_id": ..., "command": ...} pairs,
+or a `selector` plus a single `command` applied to every device whose label, name,
+room or type matches all of the selector's words and that has `capability`.
+`capability` defaults to the one the command belongs to (on/off: Switch,
+setLevel: SwitchLevel, lock/unlock: Lock, ...). Returns one result per device.""")
+async def control_devices(commands: list[dict] | None = None, selector: str | None = None,
+                          command: str | None = None, capability: str | None = None):
+    """Send commands to several Hubitat devices concurrently.
+    Example: Turn off every smart outlet
+
+    selector="outlet", command="off"
+
+    Example 2: Turn on light 1 and set light 2 to 50%
+
+    commands=[{"device_id": 1, "command": "on"}, {"device_id": 2, "command": "setLevel/50"}]
+    """
+    pairs, results = [], []
+    for i, entry in enumerate(commands or []):
+        if _valid_entry(entry):
+            pairs.append((entry["device_id"], entry["command"]))
+        else:
+            results.append({"index": i, "status": "error",
+                            "message": "Each entry needs a device_id and a command"})
+    if selector:
+        capability = capability or COMMAND_CAPABILITIES.get(str(command or "").split("/")[0])
+        if not command or not capability:
+            message = (f"Pass a capability to use a selector with '{command}'" if command
+                       else "A selector needs a command")
+            results.append({"selector": selector, "status": "error", "message": message})
+        else:
+            await refresh_index()
+            pairs += [(d["id"], command) for d in device_index.select(selector, capability=capability)]
+    if not pairs:
+        return json.dumps({"status": "error", "message": "No devices matched", "results": results}, indent=2)
+
+    limit = asyncio.Semaphore(BULK_CONCURRENCY)
+
+    async def run(device_id, device_command):
+        async with limit:
+            return {"device_id": device_id, "command": device_command,
+                    "status": await send_command(device_id, device_command)}
+
+    results += await asyncio.gather(*(run(device_id, device_command) for device_id, device_command in pairs))
+    failed = sum(1 for r in results if r["status"] != "ok")
+    return json.dumps({"status": "ok" if not failed else "error", "failed": failed, "results": results}, indent=2)
+
+async def load_scenes():
+    """Compile the scenes file if it changed or the inventory it was resolved against is stale."""
+    if await scene_book.refresh(lambda: cached_get_json("devices/all"), lambda d: get_metadata(d, "commands")):
+        for scene in scene_book.scenes.values():
+            if not scene.valid:
+                logger.warning("Scene '%s' is invalid: %s", scene.name, "; ".join(scene.errors))
+        logger.info("Loaded %d scenes from %s", len(scene_book.scenes), scene_book.path)
+
+@mcp.tool(description="""List the scenes (named routines like "goodnight") that run_scene can run,
+with how many devices each one commands and any errors that stop it from running.""")
+async def list_scenes():
+    """Return a summary of every scene in the scenes file"""
+    try:
+        await load_scenes()
+    except SceneError as e:
+        return json.dumps({"status": "error", "message": str(e), "scenes": []}, indent=2)
+    return json.dumps([scene.describe() for scene in scene_book.scenes.values()], indent=2)
+
+@mcp.tool(description="""Run a scene by name (e.g. "goodnight"): every device command in it is sent
+straight to the hub, with no need to look up devices first. Use list_scenes to see what exists.""")
+async def run_scene(name: str):
+    """Run a precompiled scene, stage by stage, each stage as one concurrent batch of hub commands"""
+    try:
+        await load_scenes()
+    except SceneError as e:
+        return json.dumps({"status": "error", "message": str(e)}, indent=2)
+    scene = scene_book.get(name)
+    if scene is None:
+        return json.dumps({"status": "error", "message": f"No scene named '{name}'",
+                           "scenes": [s.name for s in scene_book.scenes.values()]}, indent=2)
+    if not scene.valid:
+        return json.dumps({"status": "error", "message": f"Scene '{scene.name}' is invalid",
+                           "errors": scene.errors}, indent=2)
+
+    start = time.perf_counter()
+    results = await scene.run(send_command, concurrency=BULK_CONCURRENCY)
+    elapsed = time.perf_counter() - start
+    scene_book.record_run(results, elapsed)
+    failed = sum(1 for r in results if r["status"] == "error")
+    skipped = sum(1 for r in results if r["status"] == "skipped")
+    logger.info("Scene '%s': %d commands in %.1f ms, %d failed, %d skipped",
+                scene.name, len(results) - skipped, elapsed * 1000, failed, skipped)
+    return json.dumps({
+        "status": "ok" if not failed and not skipped else "error",
+        "scene": scene.name,
+        "failed": failed,
+        "skipped": skipped,
+        "elapsed_ms": round(elapsed * 1000, 1),
+        "results": results,
+    }, indent=2)
+
+@mcp.tool(description="Get Hubitat device cache hit/miss and hub traffic statistics")
+async def cache_stats():
+    """Return counters for the device cache, the live state table, stored metadata, scenes and hub request queueing"""
+    return json.dumps({
+        "cache": device_cache.stats(),
+        "state": state_store.stats(),
+        "metadata": metadata_store.stats(),
+        "scenes": scene_book.stats(),
+        "hub": hub.stats(),
+    }, indent=2)
+
 def main():
     """Main entry point for the hubitat MCP server."""
+    logging.basicConfig(
+        level=os.getenv("HUB_LOG_LEVEL", "INFO").upper(),
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+    )
+    startup_timer.mark("imports")
+    setup_telemetry("hubitat-mcp")
+    if traces_exporter() != "none":
+        # Agents' MCPClients put their trace context in each request's _meta; continue it here.
+        # This imports all of strands, so it is skipped when nothing would record the spans
+        from strands.tools.mcp.mcp_instrumentation import mcp_instrumentation
+        mcp_instrumentation()
+    startup_timer.mark("telemetry")
+    logger.info(startup_timer.report())
     # Start the server
     # Bind to 0.0.0.0 to allow access from outside the container (Docker)
     host = os.getenv("MCP_HOST", "0.0.0.0")
@@ -0,0 +1,83 @@
+"""In-process transport to a FastMCP server.
+
+Usage:
+    from strands_tools.mcp_client import MCPClient
+    from .hubitat_mcp import mcp
+    from .memory_transport import memory_transport
+    client = MCPClient(lambda: memory_transport(mcp))
+
+Connects to the server with fastmcp's in-memory client and hands the caller
+the (read, write) streams of a thin MCP server that forwards tool listing and
+calls to it, all on the client's own event loop. Tool calls are plain message
+passing: no sockets, HTTP framing or SSE parsing. Useful when the agent and
+the MCP server are deployed together. Only public fastmcp and MCP SDK APIs
+are used, so the transport survives fastmcp upgrades.
+
+The server's tools run on the MCP client's background event loop. Code on
+other threads that touches the same module state (e.g. an HTTP route on the
+A2A app) should hand its work to that loop with `call_in_server_loop`.
+"""
+import asyncio
+from concurrent.futures import Future
+from contextlib import asynccontextmanager
+
+import anyio
+from fastmcp import Client
+from fastmcp.client.transports import FastMCPTransport
+from mcp.server.lowlevel import Server
+from mcp.shared.memory import create_client_server_memory_streams
+
+
+# Event loop each in-process server is served on, keyed by server name
+_server_loops = {}
+
+
+def call_in_server_loop(server, func, *args) -> Future:
+    """Run `func(*args)` on the loop serving `server` and return a concurrent Future for its result."""
+    loop = _server_loops.get(server.name)
+    if loop is None or loop.is_closed():
+        raise RuntimeError(f"in-process MCP server {server.name!r} is not running")
+
+    async def call():
+        return func(*args)
+
+    return asyncio.run_coroutine_threadsafe(call(), loop)
+
+
+def _forwarding_server(client: Client, name: str) -> Server:
+    """Low-level MCP server answering tool requests through `client`."""
+    server = Server(name)
+
+    @server.list_tools()
+    async def list_tools():
+        return await client.list_tools()
+
+    # Arguments were validated by the FastMCP server we forward to
+    @server.call_tool(validate_input=False)
+    async def call_tool(name, arguments):
+        result = await client.call_tool_mcp(name, arguments)
+        if result.isError:
+            raise RuntimeError(" ".join(c.text for c in result.content if c.type == "text"))
+        if result.structuredContent is not None:
+            return result.content, result.structuredContent
+        return result.content
+
+    return server
+
+
+@asynccontextmanager
+async def memory_transport(server):
+    """Serve `server` (a FastMCP instance) in-process and yield (read, write) client streams."""
+    _server_loops[server.name] = asyncio.get_running_loop()
+    async with Client(FastMCPTransport(server)) as client:
+        forwarder = _forwarding_server(client, server.name)
+        async with create_client_server_memory_streams() as (client_streams, server_streams):
+            server_read, server_write = server_streams
+            async with anyio.create_task_group() as tg:
+                tg.start_soon(
+                    lambda: forwarder.run(server_read, server_write, forwarder.create_initialization_options())
+                )
+                try:
+                    yield client_streams
+                finally:
+                    tg.cancel_scope.cancel()
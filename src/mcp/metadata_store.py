@@ -0,0 +1,111 @@
+"""Persistent on-disk store for static device metadata.
+
+Usage:
+    from .metadata_store import MetadataStore, fingerprint
+    store = MetadataStore("hubitat_metadata.sqlite")
+    entry = store.get("12", "commands")   # None on miss
+    store.put("12", "commands", fingerprint(device), commands)
+
+A device's capabilities and commands only change when its driver changes, so
+they are kept in SQLite keyed by device ID and kind, together with a
+fingerprint of the device's driver (name and type from the inventory). Rows
+are read on demand, so opening the store costs the same with 5 devices or
+500, and a restart never starts cold. Entries older than `revalidate_after`
+seconds are still served but reported by `needs_revalidation()` so the caller
+can compare fingerprints in the background.
+"""
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+def fingerprint(device: Dict[str, Any]) -> str:
+    """Fingerprint of the inventory fields that decide a device's capabilities and commands."""
+    driver = json.dumps([device.get("name"), device.get("type")])
+    return hashlib.sha1(driver.encode()).hexdigest()
+
+
+class Entry(NamedTuple):
+    fingerprint: str
+    data: Any
+    validated_at: float
+
+
+class MetadataStore:
+    """SQLite-backed (device ID, kind) -> metadata store with an in-memory read cache."""
+
+    def __init__(self, path: str = ":memory:", revalidate_after: float = 3600.0):
+        self.path = path
+        self.revalidate_after = revalidate_after
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # Tools may run on more than one thread (e.g. in-process MCP next to the A2A server)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._db:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS metadata ("
+                " device_id TEXT NOT NULL, kind TEXT NOT NULL, fingerprint TEXT NOT NULL,"
+                " data TEXT NOT NULL, validated_at REAL NOT NULL,"
+                " PRIMARY KEY (device_id, kind))"
+            )
+        self._entries: Dict[Tuple[str, str], Entry] = {}
+        self._metrics = {"hits": 0, "misses": 0, "writes": 0, "revalidated": 0, "refreshed": 0}
+
+    def get(self, device_id, kind: str) -> Optional[Entry]:
+        key = (str(device_id), kind)
+        entry = self._entries.get(key)
+        if entry is None:
+            with self._lock:
+                row = self._db.execute(
+                    "SELECT fingerprint, data, validated_at FROM metadata WHERE device_id = ? AND kind = ?", key
+                ).fetchone()
+            if row is not None:
+                entry = self._entries[key] = Entry(row[0], json.loads(row[1]), row[2])
+        self._metrics["hits" if entry is not None else "misses"] += 1
+        return entry
+
+    def put(self, device_id, kind: str, device_fingerprint: str, data: Any):
+        key = (str(device_id), kind)
+        entry = self._entries[key] = Entry(device_fingerprint, data, time.time())
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO metadata VALUES (?, ?, ?, ?, ?)",
+                (*key, entry.fingerprint, json.dumps(data), entry.validated_at),
+            )
+        self._metrics["writes"] += 1
+
+    def touch(self, device_id, kind: str):
+        """Mark an entry as checked against the hub without rewriting its data."""
+        key = (str(device_id), kind)
+        entry = self._entries.get(key)
+        if entry is None:
+            return
+        self._entries[key] = entry._replace(validated_at=time.time())
+        with self._lock, self._db:
+            self._db.execute(
+                "UPDATE metadata SET validated_at = ? WHERE device_id = ? AND kind = ?",
+                (self._entries[key].validated_at, *key),
+            )
+        self._metrics["revalidated"] += 1
+
+    def needs_revalidation(self, entry: Entry) -> bool:
+        return time.time() - entry.validated_at > self.revalidate_after
+
+    def record_refresh(self):
+        self._metrics["refreshed"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            rows = self._db.execute("SELECT COUNT(*) FROM metadata").fetchone()[0]
+        lookups = self._metrics["hits"] + self._metrics["misses"]
+        return {
+            **self._metrics,
+            "hit_rate": round(self._metrics["hits"] / lookups, 3) if lookups else 0.0,
+            "stored": rows,
+            "path": self.path,
+        }
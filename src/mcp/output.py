@@ -0,0 +1,78 @@
+"""Output shaping for MCP tool results.
+
+Usage:
+    from .output import encode, paginate
+    encode(devices, fields=["id", "label"], compact=True)
+    paginate(events, offset=0, limit=50)
+
+Every byte a tool returns lands in the LLM context, so tools can project the
+fields the model actually needs and switch to a row-oriented encoding
+(`{"columns": [...], "rows": [[...], ...]}`) that states each key once instead
+of once per record.
+"""
+from typing import Any, Dict, Iterable, List, Optional
+import json
+import logging
+import random
+
+
+def project(data: Any, fields: Optional[Iterable[str]]) -> Any:
+    """Keep only `fields` on a record or on every record in a list."""
+    if not fields:
+        return data
+    fields = list(fields)
+    if isinstance(data, dict):
+        return {k: data[k] for k in fields if k in data}
+    if isinstance(data, list):
+        return [project(item, fields) if isinstance(item, dict) else item for item in data]
+    return data
+
+
+def to_rows(records: List[Dict[str, Any]]) -> Dict[str, List]:
+    """Turn a list of dicts into a header plus value rows."""
+    columns: List[str] = []
+    for record in records:
+        for key in record:
+            if key not in columns:
+                columns.append(key)
+    return {"columns": columns, "rows": [[record.get(c) for c in columns] for record in records]}
+
+
+def _is_records(value: Any) -> bool:
+    return isinstance(value, list) and bool(value) and all(isinstance(item, dict) for item in value)
+
+
+def compact_form(data: Any) -> Any:
+    """Row-encode a list of records, or every list of records inside a dict."""
+    if _is_records(data):
+        return to_rows(data)
+    if isinstance(data, dict):
+        return {k: compact_form(v) if _is_records(v) else v for k, v in data.items()}
+    return data
+
+
+def encode(data: Any, fields: Optional[Iterable[str]] = None, compact: bool = False) -> str:
+    """Serialize a tool result, optionally projected and row-encoded."""
+    data = project(data, fields)
+    if compact:
+        return json.dumps(compact_form(data), separators=(",", ":"))
+    return json.dumps(data)
+
+
+def paginate(items: List[Any], offset: int = 0, limit: int = 50) -> Dict[str, Any]:
+    """Slice a list and report where the next page starts (None when done)."""
+    offset = max(offset, 0)
+    page = items[offset:offset + limit] if limit > 0 else items[offset:]
+    end = offset + len(page)
+    return {
+        "total": len(items),
+        "offset": offset,
+        "next_offset": end if end < len(items) else None,
+        "items": page,
+    }
+
+
+def log_payload(logger: logging.Logger, message: str, payload: Any, sample_rate: float = 0.1):
+    """Log a full payload at DEBUG for a random sample of calls only."""
+    if logger.isEnabledFor(logging.DEBUG) and random.random() < sample_rate:
+        logger.debug("%s: %s", message, payload)
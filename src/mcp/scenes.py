@@ -0,0 +1,313 @@
+"""Named device routines compiled once and run without the agent.
+
+Usage:
+    from .scenes import SceneBook
+    scenes = SceneBook("scenes.json")
+    await scenes.refresh(fetch_inventory, get_commands)   # (re)compile if the file changed
+    results = await scenes.get("goodnight").run(send_command, concurrency=5)
+
+scenes.json (see scenes.example.json):
+    {
+      "goodnight": {
+        "description": "Lock up, lights off, heat down",
+        "steps": [
+          {"id": "lock", "select": {"capability": "Lock"}, "command": "lock"},
+          {"select": {"capability": "Switch", "exclude": ["Fridge Outlet"]}, "command": "off"},
+          {"devices": ["Hall Thermostat"], "command": "setHeatingSetpoint/66", "after": ["lock"]}
+        ]
+      }
+    }
+
+A step names its devices by id or label (`devices`) or by a selector
+(`select`: `capability`, `room` and/or a label substring `match`, minus any
+`exclude`d labels or ids). Steps run in parallel unless they list other
+step ids in `after`; the dependency graph is flattened into stages and each
+stage goes to the hub as one concurrent fan-out. A step whose dependency
+failed is skipped. Devices are resolved and every command is checked against
+the device's command list when the file is loaded, so a typo shows up in
+`list_scenes` instead of half-way through a routine.
+"""
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, NamedTuple, Optional
+import asyncio
+import json
+import os
+import time
+
+from .device_index import capability_names, normalize, tokenize
+
+
+class SceneError(ValueError):
+    """The scenes file can't be read or a scene definition is malformed."""
+
+
+class Action(NamedTuple):
+    step: str
+    device_id: str
+    label: str
+    command: str
+
+
+def command_names(commands: Iterable[Any]) -> set:
+    """Command names from a Maker API commands payload (strings or {"command": ...} dicts)."""
+    return {c.get("command") if isinstance(c, dict) else str(c) for c in commands or []}
+
+
+def scene_key(name: str) -> str:
+    """Scene names are matched ignoring case, spaces and punctuation ("Good night" is "goodnight")."""
+    return "".join(tokenize(name))
+
+
+class Scene:
+    """A compiled scene: stages of (device, command) actions, or the errors that stopped it compiling."""
+
+    def __init__(self, name: str, description: str = ""):
+        self.name = name
+        self.description = description
+        self.stages: List[List[Action]] = []
+        self.after: Dict[str, set] = {}
+        self.errors: List[str] = []
+
+    @property
+    def valid(self) -> bool:
+        return not self.errors
+
+    def describe(self) -> Dict[str, Any]:
+        actions = [a for stage in self.stages for a in stage]
+        summary = {
+            "name": self.name,
+            "description": self.description,
+            "valid": self.valid,
+            "stages": len(self.stages),
+            "commands": len(actions),
+            "devices": len({a.device_id for a in actions}),
+        }
+        if self.errors:
+            summary["errors"] = self.errors
+        return summary
+
+    async def run(self, send: Callable[[str, str], Awaitable[str]], concurrency: int = 5) -> List[Dict[str, Any]]:
+        """Send every stage as one concurrent batch; `send(device_id, command)` returns "ok" or "error"."""
+        limit = asyncio.Semaphore(concurrency)
+        failed_steps = set()
+        results = []
+
+        async def one(action):
+            async with limit:
+                status = await send(action.device_id, action.command)
+            return {"step": action.step, "device_id": action.device_id, "label": action.label,
+                    "command": action.command, "status": status}
+
+        for stage in self.stages:
+            runnable = []
+            for action in stage:
+                if self.after.get(action.step, set()) & failed_steps:
+                    failed_steps.add(action.step)
+                    results.append({"step": action.step, "device_id": action.device_id, "label": action.label,
+                                    "command": action.command, "status": "skipped"})
+                else:
+                    runnable.append(action)
+            for result in await asyncio.gather(*(one(action) for action in runnable)):
+                if result["status"] != "ok":
+                    failed_steps.add(result["step"])
+                results.append(result)
+        return results
+
+
+def _select(devices: List[Dict[str, Any]], selector: Dict[str, Any]) -> List[Dict[str, Any]]:
+    capability = normalize(selector.get("capability")) if selector.get("capability") else None
+    room = normalize(selector.get("room")) if selector.get("room") else None
+    match = str(selector.get("match") or "").lower()
+    exclude = {str(e).lower() for e in selector.get("exclude") or []}
+    selected = []
+    for d in devices:
+        if capability and capability not in capability_names(d):
+            continue
+        if room and normalize(d.get("room")) != room:
+            continue
+        if match and match not in " ".join(str(d.get(k) or "") for k in ("label", "name", "type")).lower():
+            continue
+        if str(d.get("id")) in exclude or str(d.get("label") or "").lower() in exclude:
+            continue
+        selected.append(d)
+    return selected
+
+
+def _lookup(devices: List[Dict[str, Any]], ref: Any) -> List[Dict[str, Any]]:
+    """Devices matching an id, or else an exact (case-insensitive) label or name."""
+    by_id = [d for d in devices if str(d.get("id")) == str(ref)]
+    if by_id:
+        return by_id
+    wanted = str(ref).lower()
+    return [d for d in devices if str(d.get("label") or "").lower() == wanted] or \
+           [d for d in devices if str(d.get("name") or "").lower() == wanted]
+
+
+def _stages(after: Dict[str, set], order: List[str]) -> Optional[List[List[str]]]:
+    """Group step ids into stages so every step runs after its dependencies; None on a cycle."""
+    level: Dict[str, int] = {}
+    visiting = set()
+
+    def depth(step):
+        if step in level:
+            return level[step]
+        if step in visiting:
+            return None
+        visiting.add(step)
+        deps = [depth(dep) for dep in after[step]]
+        visiting.discard(step)
+        if any(d is None for d in deps):
+            return None
+        level[step] = 1 + max(deps, default=-1)
+        return level[step]
+
+    if any(depth(step) is None for step in order):
+        return None
+    stages: List[List[str]] = [[] for _ in range(max(level.values(), default=-1) + 1)]
+    for step in order:
+        stages[level[step]].append(step)
+    return stages
+
+
+async def compile_scene(name: str, definition: Dict[str, Any], devices: List[Dict[str, Any]],
+                        get_commands: Callable[[str], Awaitable[Any]]) -> Scene:
+    """Resolve a scene definition against the inventory and validate its commands."""
+    if not isinstance(definition, dict) or not isinstance(definition.get("steps"), list):
+        raise SceneError(f"Scene '{name}' needs a list of steps")
+    scene = Scene(name, definition.get("description", ""))
+    planned: Dict[str, List[Action]] = {}
+    for n, step in enumerate(definition["steps"], start=1):
+        if not isinstance(step, dict):
+            scene.errors.append(f"step{n}: not an object")
+            continue
+        step_id = str(step.get("id") or f"step{n}")
+        command = step.get("command")
+        if not command:
+            scene.errors.append(f"{step_id}: missing command")
+            continue
+        if step_id in planned:
+            scene.errors.append(f"{step_id}: duplicate step id")
+            continue
+        targets = []
+        if "select" in step:
+            targets = _select(devices, step["select"] or {})
+            if not targets:
+                scene.errors.append(f"{step_id}: selector {json.dumps(step['select'])} matches no devices")
+        for ref in step.get("devices") or []:
+            found = _lookup(devices, ref)
+            if len(found) != 1:
+                scene.errors.append(f"{step_id}: {'no' if not found else 'more than one'} device named '{ref}'")
+            else:
+                targets.extend(found)
+        if "select" not in step and not step.get("devices"):
+            scene.errors.append(f"{step_id}: needs devices or select")
+        unique = {str(d.get("id")): d for d in targets}
+        planned[step_id] = [Action(step_id, device_id, d.get("label") or device_id, str(command))
+                            for device_id, d in unique.items()]
+        scene.after[step_id] = {str(dep) for dep in step.get("after") or []}
+
+    for step_id, deps in scene.after.items():
+        for dep in deps - set(planned):
+            scene.errors.append(f"{step_id}: after unknown step '{dep}'")
+
+    # Every (device, command) pair must be something the device's driver accepts
+    device_ids = sorted({a.device_id for actions in planned.values() for a in actions})
+    commands = await asyncio.gather(*(get_commands(device_id) for device_id in device_ids), return_exceptions=True)
+    accepted = dict(zip(device_ids, commands))
+    for actions in planned.values():
+        for action in actions:
+            available = accepted[action.device_id]
+            if isinstance(available, Exception):
+                scene.errors.append(f"{action.step}: could not read commands for '{action.label}': {available}")
+            elif action.command.split("/", 1)[0] not in command_names(available):
+                scene.errors.append(f"{action.step}: '{action.label}' has no command '{action.command.split('/', 1)[0]}'")
+
+    if not scene.errors:
+        stages = _stages({s: deps & set(planned) for s, deps in scene.after.items()}, list(planned))
+        if stages is None:
+            scene.errors.append("steps have circular 'after' dependencies")
+        else:
+            scene.stages = [[a for step_id in stage for a in planned[step_id]] for stage in stages]
+    return scene
+
+
+class SceneBook:
+    """The scenes file, compiled against the inventory and recompiled when it changes or goes stale."""
+
+    def __init__(self, path: str, ttl: float = 3600.0):
+        self.path = path
+        self.ttl = ttl
+        self.scenes: Dict[str, Scene] = {}
+        self.loaded_at: Optional[float] = None
+        self._mtime: Optional[float] = None
+        self._lock = asyncio.Lock()
+        self._metrics = {"loads": 0, "runs": 0, "failed_runs": 0, "commands": 0, "run_seconds": 0.0}
+
+    def _file_mtime(self) -> Optional[float]:
+        try:
+            return os.path.getmtime(self.path)
+        except OSError:
+            return None
+
+    def is_stale(self) -> bool:
+        return (self.loaded_at is None or time.monotonic() - self.loaded_at > self.ttl
+                or self._file_mtime() != self._mtime)
+
+    def read(self) -> Dict[str, Any]:
+        """Raw scene definitions; an absent file means no scenes."""
+        if self._file_mtime() is None:
+            return {}
+        try:
+            with open(self.path) as f:
+                definitions = json.load(f)
+        except (OSError, ValueError) as e:
+            raise SceneError(f"Could not read scenes file {self.path}: {e}") from e
+        if not isinstance(definitions, dict):
+            raise SceneError(f"Scenes file {self.path} must map scene names to definitions")
+        return definitions
+
+    async def load(self, devices: List[Dict[str, Any]], get_commands: Callable[[str], Awaitable[Any]]):
+        mtime = self._file_mtime()
+        definitions = self.read()
+        scenes = {}
+        for name, definition in definitions.items():
+            try:
+                scenes[scene_key(name)] = await compile_scene(name, definition, devices, get_commands)
+            except SceneError as e:
+                scene = Scene(name)
+                scene.errors.append(str(e))
+                scenes[scene_key(name)] = scene
+        self.scenes = scenes
+        self._mtime = mtime
+        self.loaded_at = time.monotonic()
+        self._metrics["loads"] += 1
+
+    async def refresh(self, fetch_devices: Callable[[], Awaitable[List[Dict[str, Any]]]],
+                      get_commands: Callable[[str], Awaitable[Any]]) -> bool:
+        """Recompile if stale; returns True when the scenes were (re)loaded."""
+        async with self._lock:
+            if not self.is_stale():
+                return False
+            await self.load(await fetch_devices(), get_commands)
+            return True
+
+    def get(self, name: str) -> Optional[Scene]:
+        return self.scenes.get(scene_key(name))
+
+    def record_run(self, results: List[Dict[str, Any]], seconds: float):
+        self._metrics["runs"] += 1
+        self._metrics["commands"] += sum(1 for r in results if r["status"] != "skipped")
+        self._metrics["run_seconds"] += seconds
+        if any(r["status"] != "ok" for r in results):
+            self._metrics["failed_runs"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        m = self._metrics
+        return {
+            "scenes": len(self.scenes),
+            "invalid": sum(1 for s in self.scenes.values() if not s.valid),
+            "loads": m["loads"],
+            "runs": m["runs"],
+            "failed_runs": m["failed_runs"],
+            "commands": m["commands"],
+            "avg_run_ms": round(m["run_seconds"] / m["runs"] * 1000, 1) if m["runs"] else 0.0,
+        }
@@ -0,0 +1,97 @@
+"""Live device state table fed by the Maker API event feed.
+
+Usage:
+    from .state_store import DeviceStateStore
+    store = DeviceStateStore(max_age=600)
+    store.seed(details)                 # full /devices/<id> snapshot from the hub
+    store.apply_event(payload)          # body POSTed by Maker API "POST device events to URL"
+    details = store.details("42")       # None when unknown or stale
+
+The table maps device -> attribute -> (value, timestamp). It is only trusted
+once the hub has pushed at least one event, so a server without the webhook
+configured keeps reading from the hub as before.
+"""
+from typing import Any, Dict, Optional
+import copy
+import time
+
+
+class DeviceStateStore:
+    """In-memory device -> attribute -> (value, timestamp) table."""
+
+    def __init__(self, max_age: float = 600.0):
+        self.max_age = max_age
+        self.events_received = 0
+        self.last_event_at: Optional[float] = None
+        self._snapshots: Dict[str, Dict[str, Any]] = {}
+        self._attributes: Dict[str, Dict[str, tuple[Any, float]]] = {}
+        self._updated: Dict[str, float] = {}
+
+    @property
+    def feed_active(self) -> bool:
+        return self.events_received > 0
+
+    def seed(self, details: Dict[str, Any]):
+        """Record a full device snapshot as returned by /devices/<id>."""
+        device_id = str(details.get("id"))
+        now = time.time()
+        self._snapshots[device_id] = details
+        attributes = self._attributes.setdefault(device_id, {})
+        for attribute in details.get("attributes") or []:
+            attributes[attribute.get("name")] = (attribute.get("currentValue"), now)
+        self._updated[device_id] = now
+
+    def update(self, device_id, attribute: str, value: Any, timestamp: Optional[float] = None):
+        device_id = str(device_id)
+        timestamp = timestamp or time.time()
+        self._attributes.setdefault(device_id, {})[attribute] = (value, timestamp)
+        self._updated[device_id] = max(self._updated.get(device_id, 0.0), timestamp)
+
+    def apply_event(self, payload: Dict[str, Any]) -> Optional[str]:
+        """Apply one Maker API event body; returns the device ID it touched."""
+        content = payload.get("content", payload)
+        if not isinstance(content, dict):
+            return None
+        device_id = content.get("deviceId")
+        attribute = content.get("name")
+        if device_id is None or not attribute:
+            return None
+        self.update(device_id, attribute, content.get("value"))
+        self.events_received += 1
+        self.last_event_at = time.time()
+        return str(device_id)
+
+    def mark_stale(self, device_id):
+        """Force the next read of a device to go to the hub (e.g. after a command)."""
+        self._updated.pop(str(device_id), None)
+
+    def is_fresh(self, device_id) -> bool:
+        updated = self._updated.get(str(device_id))
+        return self.feed_active and updated is not None and time.time() - updated <= self.max_age
+
+    def attributes(self, device_id) -> Dict[str, Dict[str, Any]]:
+        return {
+            name: {"value": value, "timestamp": timestamp}
+            for name, (value, timestamp) in self._attributes.get(str(device_id), {}).items()
+        }
+
+    def details(self, device_id) -> Optional[Dict[str, Any]]:
+        """Return the device snapshot with live attribute values, or None if stale."""
+        device_id = str(device_id)
+        snapshot = self._snapshots.get(device_id)
+        if snapshot is None or not self.is_fresh(device_id):
+            return None
+        details = copy.deepcopy(snapshot)
+        live = self._attributes.get(device_id, {})
+        for attribute in details.get("attributes") or []:
+            if attribute.get("name") in live:
+                attribute["currentValue"] = live[attribute["name"]][0]
+        return details
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "devices": len(self._attributes),
+            "events_received": self.events_received,
+            "last_event_at": self.last_event_at,
+            "max_age": self.max_age,
+        }
@@ -0,0 +1,224 @@
+"""Bounded per-attribute time series for numeric device attributes.
+
+Usage:
+    from .timeseries import SeriesStore
+    series = SeriesStore(attributes={"temperature", "humidity"}, capacity=4096)
+    series.ingest_history("42", events)           # /devices/42/events payload
+    series.ingest("42", "temperature", 71.5)      # pushed event, stamped now
+    series.stats(["42", "43"], "temperature", since=time.time() - 6 * 3600)
+    series.needs_backfill("42")                   # history never pulled, or older than backfill_ttl
+
+Each (device, attribute) pair keeps its samples in a fixed-capacity ring of
+two `array('d')` buffers (timestamps, values), oldest samples overwritten
+first. Window bounds are found with bisect and min/max/sum run over array
+slices, so aggregating days of samples across many sensors stays in C loops.
+
+A device's history is pulled again once the last pull is older than
+`backfill_ttl`, unless pushed events have kept its series current since.
+Pushed events carry no hub timestamp and are stamped on arrival, so when
+history is merged in, a stored sample with the same value as a history sample
+less than `dedup_window` seconds away is taken to be the same reading and
+dropped in favour of the hub-dated one.
+"""
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import time
+
+DEFAULT_ATTRIBUTES = ("temperature", "humidity", "power", "battery", "illuminance", "energy", "level")
+
+
+def parse_timestamp(value: Any) -> Optional[float]:
+    """Parse a Maker API event date ('2025-03-14T23:59:00+0000') to epoch seconds."""
+    if not value:
+        return None
+    try:
+        return datetime.strptime(str(value), "%Y-%m-%dT%H:%M:%S%z").timestamp()
+    except ValueError:
+        try:
+            return datetime.fromisoformat(str(value)).timestamp()
+        except ValueError:
+            return None
+
+
+def parse_number(value: Any) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class RingSeries:
+    """Fixed-capacity ring buffer of (timestamp, value) samples kept in time order."""
+
+    def __init__(self, capacity: int = 4096):
+        self.capacity = capacity
+        self._ts = array("d", bytes(8 * capacity))
+        self._values = array("d", bytes(8 * capacity))
+        self._start = 0
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def last_timestamp(self) -> Optional[float]:
+        return self._ts[(self._start + self._size - 1) % self.capacity] if self._size else None
+
+    def append(self, timestamp: float, value: float):
+        """Add a sample; out-of-order samples are merged in with a rebuild."""
+        last = self.last_timestamp
+        if last is not None and timestamp < last:
+            self.merge([(timestamp, value)])
+            return
+        end = (self._start + self._size) % self.capacity
+        self._ts[end] = timestamp
+        self._values[end] = value
+        if self._size < self.capacity:
+            self._size += 1
+        else:
+            self._start = (self._start + 1) % self.capacity
+
+    def merge(self, samples: Iterable[Tuple[float, float]], dedup_window: float = 0.0):
+        """Merge a batch of samples (e.g. a history pull) keeping the newest `capacity`.
+
+        Stored samples with the same value as an incoming one within
+        `dedup_window` seconds are replaced by it rather than kept alongside.
+        """
+        incoming = sorted(set(samples))
+        existing = zip(*self.ordered())
+        if dedup_window > 0 and incoming:
+            incoming_ts = [timestamp for timestamp, _ in incoming]
+
+            def duplicate(timestamp, value):
+                lo = bisect_left(incoming_ts, timestamp - dedup_window)
+                hi = bisect_right(incoming_ts, timestamp + dedup_window)
+                return any(incoming[i][1] == value for i in range(lo, hi))
+
+            existing = [(t, v) for t, v in existing if not duplicate(t, v)]
+        merged = sorted(set(existing) | set(incoming))[-self.capacity:]
+        self._start = 0
+        self._size = len(merged)
+        for i, (timestamp, value) in enumerate(merged):
+            self._ts[i] = timestamp
+            self._values[i] = value
+
+    def ordered(self) -> Tuple[array, array]:
+        """Return (timestamps, values) as contiguous arrays, oldest first."""
+        end = self._start + self._size
+        if end <= self.capacity:
+            return self._ts[self._start:end], self._values[self._start:end]
+        wrap = end - self.capacity
+        return (
+            self._ts[self._start:] + self._ts[:wrap],
+            self._values[self._start:] + self._values[:wrap],
+        )
+
+    def window(self, since: Optional[float] = None, until: Optional[float] = None) -> Tuple[array, array]:
+        timestamps, values = self.ordered()
+        lo = bisect_left(timestamps, since) if since is not None else 0
+        hi = bisect_right(timestamps, until) if until is not None else len(timestamps)
+        return timestamps[lo:hi], values[lo:hi]
+
+
+class SeriesStore:
+    """Ring-buffered series keyed by (device_id, attribute) for numeric attributes."""
+
+    def __init__(self, attributes: Iterable[str] = DEFAULT_ATTRIBUTES, capacity: int = 4096,
+                 backfill_ttl: float = 300, dedup_window: float = 30):
+        self.attributes = set(attributes)
+        self.capacity = capacity
+        self.backfill_ttl = backfill_ttl
+        self.dedup_window = dedup_window
+        # device_id -> when its history was last pulled / last pushed sample arrived (monotonic)
+        self.backfilled: Dict[str, float] = {}
+        self.pushed: Dict[str, float] = {}
+        self._series: Dict[Tuple[str, str], RingSeries] = {}
+
+    def _get(self, device_id, attribute: str) -> RingSeries:
+        key = (str(device_id), attribute)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = RingSeries(self.capacity)
+        return series
+
+    def ingest(self, device_id, attribute: str, value: Any, timestamp: Optional[float] = None) -> bool:
+        """Record one sample if the attribute is tracked and the value is numeric."""
+        number = parse_number(value)
+        if attribute not in self.attributes or number is None:
+            return False
+        self._get(device_id, attribute).append(timestamp or time.time(), number)
+        self.pushed[str(device_id)] = time.monotonic()
+        return True
+
+    def ingest_history(self, device_id, events: List[Dict[str, Any]]) -> int:
+        """Merge a Maker API event history for one device; returns samples kept."""
+        batches: Dict[str, List[Tuple[float, float]]] = {}
+        for event in events:
+            number = parse_number(event.get("value"))
+            timestamp = parse_timestamp(event.get("date"))
+            if event.get("name") in self.attributes and number is not None and timestamp is not None:
+                batches.setdefault(event["name"], []).append((timestamp, number))
+        for attribute, samples in batches.items():
+            self._get(device_id, attribute).merge(samples, dedup_window=self.dedup_window)
+        self.backfilled[str(device_id)] = time.monotonic()
+        return sum(len(samples) for samples in batches.values())
+
+    def needs_backfill(self, device_id) -> bool:
+        """True if the device's history was never pulled, or is stale with no pushed events since."""
+        pulled = self.backfilled.get(str(device_id))
+        if pulled is None:
+            return True
+        fresh = max(pulled, self.pushed.get(str(device_id), 0.0))
+        return time.monotonic() - fresh > self.backfill_ttl
+
+    def stats(self, device_ids: Iterable, attribute: str,
+              since: Optional[float] = None, until: Optional[float] = None) -> Dict[str, Any]:
+        """min/max/avg/last per device and across all devices within the window."""
+        per_device = {}
+        all_values: List[array] = []
+        latest: Optional[Tuple[float, float]] = None
+        for device_id in device_ids:
+            series = self._series.get((str(device_id), attribute))
+            timestamps, values = series.window(since, until) if series else (array("d"), array("d"))
+            if not values:
+                per_device[str(device_id)] = {"count": 0}
+                continue
+            all_values.append(values)
+            if latest is None or timestamps[-1] > latest[0]:
+                latest = (timestamps[-1], values[-1])
+            per_device[str(device_id)] = {
+                "count": len(values),
+                "min": min(values),
+                "max": max(values),
+                "avg": round(sum(values) / len(values), 3),
+                "last": values[-1],
+                "last_at": timestamps[-1],
+            }
+        count = sum(len(values) for values in all_values)
+        combined = {"count": count}
+        if count:
+            combined.update(
+                min=min(min(values) for values in all_values),
+                max=max(max(values) for values in all_values),
+                avg=round(sum(sum(values) for values in all_values) / count, 3),
+                last=latest[1],
+                last_at=latest[0],
+            )
+        return {"attribute": attribute, "since": since, "until": until, "devices": per_device, "combined": combined}
+
+    def downsample(self, device_id, attribute: str, since: float, until: float,
+                   buckets: int = 24) -> List[List[Optional[float]]]:
+        """Average samples into `buckets` equal time slices: [[bucket_start, avg], ...]."""
+        series = self._series.get((str(device_id), attribute))
+        timestamps, values = series.ordered() if series else (array("d"), array("d"))
+        width = (until - since) / buckets
+        result = []
+        for i in range(buckets):
+            start = since + i * width
+            lo = bisect_left(timestamps, start)
+            hi = bisect_left(timestamps, start + width) if i < buckets - 1 else bisect_right(timestamps, until)
+            chunk = values[lo:hi]
+            result.append([round(start, 3), round(sum(chunk) / len(chunk), 3) if chunk else None])
+        return result
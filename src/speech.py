@@ -0,0 +1,460 @@
+"""Overlapped, offline speech capture and recognition.
+
+Usage:
+    from speech import MicrophoneSource, SpeechPipeline, get_recognizer
+    pipeline = SpeechPipeline(MicrophoneSource(), get_recognizer())
+    pipeline.start()
+    for transcript in pipeline.transcripts():
+        print(transcript.text, f"{transcript.latency:.2f}s")
+
+    # Same pipeline over a recorded 16-bit mono WAV file:
+    python src/speech.py fixture.wav --recognizer vosk
+
+A capture thread reads fixed-size audio frames and never waits on anything
+else; a voice-activity chunker cuts them into utterances, which go through a
+bounded queue (oldest dropped when full) to recognition worker threads. While
+one utterance is being recognized the next one is already being captured.
+
+SPEECH_RECOGNIZER selects "vosk" (VOSK_MODEL_PATH), "whisper"
+(faster-whisper, WHISPER_MODEL, CPU int8) or "google", the old online
+recognizer. Unset, the first local backend that is set up is used (the
+`vosk` and `whisper` extras install them). Audio only leaves the machine if
+google is picked explicitly, or SPEECH_ALLOW_ONLINE=true allows falling back
+to it. Each transcript carries its latency, from the end of the utterance to
+the recognized text.
+"""
+from array import array
+from collections import deque
+from typing import Callable, Iterator, List, NamedTuple, Optional
+import argparse
+import json
+import math
+import os
+import queue
+import statistics
+import threading
+import time
+import wave
+
+SAMPLE_RATE = 16000
+FRAME_MS = 30
+
+
+def frame_rms(frame: bytes) -> float:
+    samples = array("h", frame)
+    return math.sqrt(sum(x * x for x in samples) / len(samples)) if samples else 0.0
+
+
+class Utterance(NamedTuple):
+    seq: int
+    audio: bytes          # 16-bit mono PCM
+    sample_rate: int
+    ended_at: float       # perf_counter() when the chunker closed the utterance
+
+    @property
+    def seconds(self) -> float:
+        return len(self.audio) / 2 / self.sample_rate
+
+
+class Transcript(NamedTuple):
+    seq: int
+    text: str
+    audio_seconds: float
+    latency: float        # utterance end -> text available
+    recognize_seconds: float
+
+
+# --- Audio sources: iterables of fixed-size 16-bit mono PCM frames -----------------
+
+class MicrophoneSource:
+    """Live microphone frames via PyAudio."""
+
+    def __init__(self, sample_rate: int = SAMPLE_RATE, frame_ms: int = FRAME_MS):
+        self.sample_rate = sample_rate
+        self.frame_samples = sample_rate * frame_ms // 1000
+        self._closed = threading.Event()
+
+    def __iter__(self) -> Iterator[bytes]:
+        import pyaudio
+
+        audio = pyaudio.PyAudio()
+        stream = audio.open(format=pyaudio.paInt16, channels=1, rate=self.sample_rate,
+                            input=True, frames_per_buffer=self.frame_samples)
+        try:
+            while not self._closed.is_set():
+                # Dropping an overflowed buffer beats raising mid-sentence
+                yield stream.read(self.frame_samples, exception_on_overflow=False)
+        finally:
+            stream.stop_stream()
+            stream.close()
+            audio.terminate()
+
+    def close(self):
+        self._closed.set()
+
+
+class WavSource:
+    """Frames from a 16-bit mono WAV file, optionally paced in real time."""
+
+    def __init__(self, path: str, frame_ms: int = FRAME_MS, realtime: bool = False):
+        self.path = path
+        self.realtime = realtime
+        with wave.open(path, "rb") as wav:
+            if wav.getsampwidth() != 2 or wav.getnchannels() != 1:
+                raise ValueError(f"{path}: expected 16-bit mono PCM")
+            self.sample_rate = wav.getframerate()
+        self.frame_samples = self.sample_rate * frame_ms // 1000
+        self._closed = threading.Event()
+
+    def __iter__(self) -> Iterator[bytes]:
+        frame_seconds = self.frame_samples / self.sample_rate
+        with wave.open(self.path, "rb") as wav:
+            while not self._closed.is_set():
+                frame = wav.readframes(self.frame_samples)
+                if len(frame) < self.frame_samples * 2:
+                    return
+                yield frame
+                if self.realtime:
+                    time.sleep(frame_seconds)
+
+    def close(self):
+        self._closed.set()
+
+
+# --- Voice activity chunking -------------------------------------------------------
+
+class VadChunker:
+    """Energy-based voice activity detector that groups frames into utterances.
+
+    The noise floor is learned from the first `calibration_ms` of audio and
+    then tracked during silence; a frame is speech when its RMS exceeds the
+    floor by `threshold`x. An utterance starts after `start_frames` speech
+    frames (plus `pre_roll_ms` of audio before them, so first syllables
+    aren't clipped) and ends after `hangover_ms` of silence or
+    `max_utterance_s` of audio.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = SAMPLE_RATE,
+        frame_ms: int = FRAME_MS,
+        threshold: Optional[float] = None,
+        start_frames: int = 3,
+        hangover_ms: int = 600,
+        pre_roll_ms: int = 300,
+        max_utterance_s: float = 15.0,
+        calibration_ms: int = 500,
+        is_speech: Optional[Callable[[bytes], bool]] = None,
+    ):
+        self.sample_rate = sample_rate
+        self.threshold = threshold if threshold is not None else float(os.getenv("VAD_THRESHOLD", "3"))
+        self.start_frames = start_frames
+        self.hangover_frames = max(1, hangover_ms // frame_ms)
+        self.max_frames = int(max_utterance_s * 1000 // frame_ms)
+        self.calibration_frames = max(1, calibration_ms // frame_ms)
+        self.is_speech = is_speech or self._energy_is_speech
+        self.noise_floor: Optional[float] = None
+        self._calibration: List[float] = []
+        self._pre_roll = deque(maxlen=max(1, pre_roll_ms // frame_ms))
+        self._frames: List[bytes] = []
+        self._speech_run = 0
+        self._silence_run = 0
+        self._seq = 0
+
+    def _energy_is_speech(self, frame: bytes) -> bool:
+        rms = frame_rms(frame)
+        if self.noise_floor is None:
+            self._calibration.append(rms)
+            if len(self._calibration) >= self.calibration_frames:
+                self.noise_floor = max(statistics.median(self._calibration), 1.0)
+            return False
+        speech = rms > self.noise_floor * self.threshold
+        if not speech and not self._frames:
+            # Follow slow changes in background noise (fans, HVAC) between utterances
+            self.noise_floor = 0.95 * self.noise_floor + 0.05 * max(rms, 1.0)
+        return speech
+
+    def _emit(self) -> Utterance:
+        utterance = Utterance(self._seq, b"".join(self._frames), self.sample_rate, time.perf_counter())
+        self._seq += 1
+        self._frames = []
+        self._speech_run = self._silence_run = 0
+        return utterance
+
+    def process(self, frame: bytes) -> Optional[Utterance]:
+        """Feed one frame; returns an Utterance when one has just ended."""
+        speech = self.is_speech(frame)
+        if not self._frames:
+            self._pre_roll.append(frame)
+            self._speech_run = self._speech_run + 1 if speech else 0
+            if self._speech_run >= self.start_frames:
+                self._frames = list(self._pre_roll)
+                self._pre_roll.clear()
+                self._silence_run = 0
+            return None
+        self._frames.append(frame)
+        self._silence_run = 0 if speech else self._silence_run + 1
+        if self._silence_run >= self.hangover_frames or len(self._frames) >= self.max_frames:
+            return self._emit()
+        return None
+
+    def flush(self) -> Optional[Utterance]:
+        """End of audio: emit whatever utterance is still open."""
+        return self._emit() if self._frames else None
+
+
+# --- Recognizer backends: transcribe(audio, sample_rate) -> text --------------------
+
+class VoskRecognizer:
+    """Offline Kaldi-based recognizer; small models run comfortably on a CPU."""
+
+    def __init__(self, model_path: Optional[str] = None):
+        try:
+            import vosk
+        except ImportError as e:
+            raise RuntimeError("SPEECH_RECOGNIZER=vosk needs the 'vosk' package (uv sync --extra vosk)") from e
+        model_path = model_path or os.getenv("VOSK_MODEL_PATH")
+        if not model_path:
+            raise RuntimeError("Set VOSK_MODEL_PATH to an unpacked Vosk model directory")
+        vosk.SetLogLevel(-1)
+        self._vosk = vosk
+        try:
+            self.model = vosk.Model(model_path)
+        except Exception as e:
+            # vosk raises a bare Exception for a missing or invalid model directory
+            raise RuntimeError(f"Could not load the Vosk model at {model_path}: {e}") from e
+
+    def transcribe(self, audio: bytes, sample_rate: int) -> str:
+        # KaldiRecognizer holds per-stream state, so each utterance gets a fresh one
+        recognizer = self._vosk.KaldiRecognizer(self.model, sample_rate)
+        recognizer.AcceptWaveform(audio)
+        return json.loads(recognizer.FinalResult()).get("text", "")
+
+
+class WhisperRecognizer:
+    """Offline Whisper via faster-whisper, int8 on the CPU."""
+
+    def __init__(self, model: Optional[str] = None):
+        try:
+            from faster_whisper import WhisperModel
+            import numpy
+        except ImportError as e:
+            raise RuntimeError("SPEECH_RECOGNIZER=whisper needs the 'faster-whisper' package (uv sync --extra whisper)") from e
+        self._numpy = numpy
+        model = model or os.getenv("WHISPER_MODEL", "base.en")
+        try:
+            self.model = WhisperModel(model, device="cpu", compute_type="int8")
+        except Exception as e:
+            # A model that isn't cached yet is downloaded from Hugging Face, which fails offline
+            raise RuntimeError(f"Could not load the Whisper model {model!r}: {e}") from e
+
+    def transcribe(self, audio: bytes, sample_rate: int) -> str:
+        if sample_rate != SAMPLE_RATE:
+            raise ValueError(f"Whisper expects {SAMPLE_RATE} Hz audio, got {sample_rate}")
+        samples = self._numpy.frombuffer(audio, dtype=self._numpy.int16).astype(self._numpy.float32) / 32768.0
+        segments, _ = self.model.transcribe(samples, beam_size=1, language="en")
+        return " ".join(segment.text.strip() for segment in segments)
+
+
+class GoogleRecognizer:
+    """The previous online recognizer, kept for hosts without a local model."""
+
+    def __init__(self):
+        import speech_recognition as sr
+
+        self._sr = sr
+        self.recognizer = sr.Recognizer()
+
+    def transcribe(self, audio: bytes, sample_rate: int) -> str:
+        try:
+            return self.recognizer.recognize_google(self._sr.AudioData(audio, sample_rate, 2))
+        except self._sr.UnknownValueError:
+            return ""
+
+
+RECOGNIZERS = {"vosk": VoskRecognizer, "whisper": WhisperRecognizer, "google": GoogleRecognizer}
+
+
+def get_recognizer(name: Optional[str] = None):
+    """Build the recognizer backend named by `name` or SPEECH_RECOGNIZER.
+
+    With neither set, vosk or whisper is used if installed and configured.
+    If neither loads, RuntimeError says why, unless SPEECH_ALLOW_ONLINE=true
+    allows falling back to google.
+    """
+    name = (name or os.getenv("SPEECH_RECOGNIZER", "")).lower()
+    if not name:
+        return _default_recognizer()
+    if name not in RECOGNIZERS:
+        raise ValueError(f"Unknown speech recognizer: {name}")
+    return RECOGNIZERS[name]()
+
+
+def _default_recognizer():
+    reasons = []
+    for name in ("vosk", "whisper"):
+        try:
+            return RECOGNIZERS[name]()
+        except RuntimeError as e:
+            reasons.append(str(e))
+    if os.getenv("SPEECH_ALLOW_ONLINE", "false").lower() not in ("1", "true", "yes"):
+        raise RuntimeError(
+            f"No offline speech recognizer is set up ({'; '.join(reasons)}). "
+            "Set SPEECH_ALLOW_ONLINE=true or SPEECH_RECOGNIZER=google to use the online Google recognizer."
+        )
+    print("WARNING: no offline speech recognizer is set up "
+          f"({'; '.join(reasons)}); SPEECH_ALLOW_ONLINE is set, so audio will be sent to Google")
+    return GoogleRecognizer()
+
+
+# --- Pipeline ------------------------------------------------------------------------
+
+class SpeechPipeline:
+    """Capture thread -> VAD chunker -> bounded queue -> recognition workers."""
+
+    def __init__(self, source, recognizer, chunker: Optional[VadChunker] = None,
+                 workers: int = 1, queue_size: int = 8):
+        self.source = source
+        self.recognizer = recognizer
+        self.chunker = chunker or VadChunker(sample_rate=source.sample_rate)
+        self.workers = workers
+        self.utterances: "queue.Queue[Optional[Utterance]]" = queue.Queue(maxsize=queue_size)
+        self.results: "queue.Queue[Optional[Transcript]]" = queue.Queue()
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        # Workers may finish out of order; results are released in utterance order
+        self._finished = {}
+        self._next_seq = 0
+        self._workers_left = workers
+        self._metrics = {"utterances": 0, "dropped": 0, "errors": 0, "audio_seconds": 0.0, "recognize_seconds": 0.0}
+        self._latencies: List[float] = []
+
+    def start(self):
+        self._threads = [threading.Thread(target=self._capture, name="speech-capture", daemon=True)]
+        self._threads += [
+            threading.Thread(target=self._recognize, name=f"speech-recognizer-{i}", daemon=True)
+            for i in range(self.workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self):
+        """Stop capturing; utterances already queued are still recognized."""
+        self.source.close()
+
+    def _enqueue(self, utterance: Utterance):
+        # Capture must never block: if recognition has fallen behind, drop the oldest utterance
+        while True:
+            try:
+                self.utterances.put_nowait(utterance)
+                return
+            except queue.Full:
+                try:
+                    dropped = self.utterances.get_nowait()
+                    with self._lock:
+                        self._metrics["dropped"] += 1
+                    self._skip(dropped.seq)
+                except queue.Empty:
+                    pass
+
+    def _capture(self):
+        try:
+            for frame in self.source:
+                utterance = self.chunker.process(frame)
+                if utterance is not None:
+                    self._enqueue(utterance)
+            utterance = self.chunker.flush()
+            if utterance is not None:
+                self._enqueue(utterance)
+        finally:
+            for _ in range(self.workers):
+                self.utterances.put(None)
+
+    def _recognize(self):
+        while True:
+            utterance = self.utterances.get()
+            if utterance is None:
+                break
+            start = time.perf_counter()
+            try:
+                text = self.recognizer.transcribe(utterance.audio, utterance.sample_rate).strip()
+            except Exception as e:
+                print(f"⚠️  Speech recognition failed: {e}")
+                with self._lock:
+                    self._metrics["errors"] += 1
+                text = ""
+            done = time.perf_counter()
+            transcript = Transcript(utterance.seq, text, utterance.seconds, done - utterance.ended_at, done - start)
+            with self._lock:
+                self._metrics["utterances"] += 1
+                self._metrics["audio_seconds"] += transcript.audio_seconds
+                self._metrics["recognize_seconds"] += transcript.recognize_seconds
+                self._latencies.append(transcript.latency)
+            self._release(utterance.seq, transcript)
+        with self._lock:
+            self._workers_left -= 1
+            if self._workers_left == 0:
+                self.results.put(None)
+
+    def _skip(self, seq: int):
+        self._release(seq, None)
+
+    def _release(self, seq: int, transcript: Optional[Transcript]):
+        with self._lock:
+            self._finished[seq] = transcript
+            while self._next_seq in self._finished:
+                ready = self._finished.pop(self._next_seq)
+                self._next_seq += 1
+                if ready is not None and ready.text:
+                    self.results.put(ready)
+
+    def transcripts(self, timeout: Optional[float] = None) -> Iterator[Transcript]:
+        """Yield non-empty transcripts in spoken order until the source ends (or `timeout` idles)."""
+        while True:
+            try:
+                transcript = self.results.get(timeout=timeout)
+            except queue.Empty:
+                return
+            if transcript is None:
+                return
+            yield transcript
+
+    def stats(self):
+        with self._lock:
+            latencies = sorted(self._latencies)
+            metrics = dict(self._metrics)
+
+        def percentile(p):
+            return round(latencies[min(len(latencies) - 1, int(len(latencies) * p))], 3) if latencies else 0.0
+
+        return {
+            **metrics,
+            "audio_seconds": round(metrics["audio_seconds"], 2),
+            "recognize_seconds": round(metrics["recognize_seconds"], 2),
+            # Recognition time per second of speech; above 1.0 the queue will back up
+            "real_time_factor": round(metrics["recognize_seconds"] / metrics["audio_seconds"], 3)
+            if metrics["audio_seconds"] else 0.0,
+            "latency_p50": percentile(0.5),
+            "latency_p95": percentile(0.95),
+            "queued": self.utterances.qsize(),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Transcribe a 16-bit mono WAV file through the speech pipeline")
+    parser.add_argument("wav")
+    parser.add_argument("--recognizer", default=None, help="vosk | whisper | google (default: SPEECH_RECOGNIZER)")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--realtime", action="store_true", help="feed audio at recording speed, like a microphone")
+    args = parser.parse_args()
+
+    pipeline = SpeechPipeline(WavSource(args.wav, realtime=args.realtime), get_recognizer(args.recognizer),
+                              workers=args.workers)
+    pipeline.start()
+    for transcript in pipeline.transcripts():
+        print(f"[{transcript.audio_seconds:5.2f}s audio, {transcript.latency * 1000:6.0f} ms] {transcript.text}")
+    print(json.dumps(pipeline.stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Startup-time breakdown for the entry points.
+
+Usage:
+    from ..startup import startup_timer      # first import, so later imports are timed
+    ...imports...
+    startup_timer.mark("imports")
+    connect()
+    startup_timer.mark("mcp connect")
+    print(startup_timer.report())           # Ready in 1.84s: interpreter 0.05s, imports 1.21s, ...
+    startup_timer.stats()                   # served at /stats/startup
+
+Each `mark()` closes a phase that started at the previous mark. On Linux the
+time the interpreter took to get to this module is counted as its own phase
+(from /proc), so the total is the real process start to "ready". For a
+per-module view of the import phase, run the entry point with
+`python -X importtime`.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+import os
+import time
+
+
+def process_age() -> Optional[float]:
+    """Seconds since this process started, or None where /proc isn't available."""
+    try:
+        with open("/proc/self/stat") as f:
+            # Fields after the ")" closing the command name start at field 3; starttime is field 22
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return max(uptime - start_ticks / os.sysconf("SC_CLK_TCK"), 0.0)
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+class StartupTimer:
+    """Named, consecutive start-up phases and the total time to ready."""
+
+    def __init__(self):
+        self.phases: List[Tuple[str, float]] = []
+        age = process_age()
+        if age is not None:
+            self.phases.append(("interpreter", age))
+        self._last = time.perf_counter()
+        self.ready = False
+
+    def mark(self, phase: str):
+        """End the current phase, naming it `phase`."""
+        now = time.perf_counter()
+        self.phases.append((phase, now - self._last))
+        self._last = now
+
+    def total(self) -> float:
+        return sum(seconds for _, seconds in self.phases)
+
+    def report(self) -> str:
+        """One-line breakdown; also marks the process ready."""
+        self.ready = True
+        phases = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in self.phases)
+        return f"Ready in {self.total():.2f}s: {phases}"
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "total_seconds": round(self.total(), 3),
+            "phases": {name: round(seconds, 3) for name, seconds in self.phases},
+        }
+
+
+startup_timer = StartupTimer()
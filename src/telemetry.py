@@ -0,0 +1,242 @@
+"""Tracing and Prometheus metrics shared by the MCP server and the A2A agents.
+
+Usage:
+    from ..telemetry import TraceContextMiddleware, metrics_text, recent_traces, setup_telemetry
+    setup_telemetry("hubitat-agent")
+    app.add_middleware(TraceContextMiddleware)
+    # GET /metrics -> metrics_text(), GET /traces -> recent_traces()
+
+Code that records spans or metrics only uses the OpenTelemetry API
+(`trace.get_tracer(__name__)`, `metrics.get_meter(__name__)`), as strands
+already does for its agent, model and tool spans; `setup_telemetry()` installs
+the SDK providers behind them once per process. W3C trace context is read from
+incoming HTTP requests (TraceContextMiddleware), added to outgoing A2A calls
+(`inject_trace_headers` httpx hook) and carried in MCP request metadata
+(strands' MCPClient injects it; the MCP server applies the same
+instrumentation to extract it), so
+one voice command is one trace across home-agent, hubitat-agent and
+hubitat-mcp.
+
+OTEL_TRACES_EXPORTER picks where spans go: "memory" (default; the last
+OTEL_RECENT_SPANS spans are kept in-process and served at /traces, no
+collector needed), "console", "otlp" (needs opentelemetry-exporter-otlp),
+"none", or "package.module:factory" for any SpanExporter. Metrics are always
+collected in-process and rendered in Prometheus text format by `metrics_text()`.
+"""
+from collections import deque
+from typing import Any, Dict, List, Optional
+import importlib
+import os
+import re
+import threading
+
+from opentelemetry import context, metrics, propagate, trace
+from opentelemetry.sdk.metrics import MeterProvider
+from opentelemetry.sdk.metrics.export import (
+    Gauge,
+    Histogram,
+    InMemoryMetricReader,
+    Sum,
+)
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import (
+    BatchSpanProcessor,
+    ConsoleSpanExporter,
+    SimpleSpanProcessor,
+    SpanExporter,
+    SpanExportResult,
+)
+from opentelemetry.trace import SpanKind, Status, StatusCode
+
+_metric_reader: Optional[InMemoryMetricReader] = None
+_recent_spans: Optional["RecentSpanExporter"] = None
+_setup_lock = threading.Lock()
+
+
+class RecentSpanExporter(SpanExporter):
+    """Keeps the most recent finished spans in memory for the /traces endpoint."""
+
+    def __init__(self, max_spans: int = 2000):
+        self.spans = deque(maxlen=max_spans)
+        self._lock = threading.Lock()
+
+    def export(self, spans) -> SpanExportResult:
+        with self._lock:
+            self.spans.extend(spans)
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self):
+        pass
+
+    def traces(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Most recent traces, newest first, each with its spans in start order."""
+        with self._lock:
+            spans = list(self.spans)
+        grouped: Dict[str, List] = {}
+        for span in spans:
+            grouped.setdefault(format(span.context.trace_id, "032x"), []).append(span)
+        traces = sorted(grouped.items(), key=lambda item: max(s.end_time for s in item[1]), reverse=True)
+        return [
+            {
+                "trace_id": trace_id,
+                "spans": [
+                    {
+                        "name": s.name,
+                        "service": s.resource.attributes.get("service.name"),
+                        "span_id": format(s.context.span_id, "016x"),
+                        "parent_id": format(s.parent.span_id, "016x") if s.parent else None,
+                        "duration_ms": round((s.end_time - s.start_time) / 1e6, 2),
+                        "status": s.status.status_code.name,
+                        "attributes": {k: v for k, v in (s.attributes or {}).items() if isinstance(v, (str, int, float, bool))},
+                    }
+                    for s in sorted(trace_spans, key=lambda s: s.start_time)
+                ],
+            }
+            for trace_id, trace_spans in traces[:limit]
+        ]
+
+
+def _span_exporter(name: str):
+    """Build the SpanExporter named by OTEL_TRACES_EXPORTER; None for "none"."""
+    global _recent_spans
+    if name == "none":
+        return None
+    if name == "memory":
+        _recent_spans = RecentSpanExporter(int(os.getenv("OTEL_RECENT_SPANS", "2000")))
+        return _recent_spans
+    if name == "console":
+        return ConsoleSpanExporter()
+    if name == "otlp":
+        try:
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        except ImportError as e:
+            raise RuntimeError("OTEL_TRACES_EXPORTER=otlp needs the 'opentelemetry-exporter-otlp' package") from e
+        return OTLPSpanExporter()
+    if ":" in name:
+        module, factory = name.split(":", 1)
+        return getattr(importlib.import_module(module), factory)()
+    raise ValueError(f"Unknown OTEL_TRACES_EXPORTER: {name}")
+
+
+def traces_exporter() -> str:
+    """The configured OTEL_TRACES_EXPORTER ("none" turns tracing off)."""
+    return os.getenv("OTEL_TRACES_EXPORTER", "memory").strip()
+
+
+def setup_telemetry(service_name: str):
+    """Install tracer and meter providers for this process (only the first call counts)."""
+    global _metric_reader
+    with _setup_lock:
+        if _metric_reader is not None:
+            return
+        resource = Resource.create({"service.name": os.getenv("OTEL_SERVICE_NAME", service_name)})
+
+        tracer_provider = TracerProvider(resource=resource)
+        exporter = _span_exporter(traces_exporter())
+        if exporter is not None:
+            # In-memory export is cheap enough to do inline; anything else is batched
+            processor = SimpleSpanProcessor if exporter is _recent_spans else BatchSpanProcessor
+            tracer_provider.add_span_processor(processor(exporter))
+        trace.set_tracer_provider(tracer_provider)
+
+        _metric_reader = InMemoryMetricReader()
+        metrics.set_meter_provider(MeterProvider(resource=resource, metric_readers=[_metric_reader]))
+
+
+def recent_traces(limit: int = 20) -> List[Dict[str, Any]]:
+    return _recent_spans.traces(limit) if _recent_spans is not None else []
+
+
+# --- Prometheus text rendering -------------------------------------------------------
+
+def _metric_name(name: str) -> str:
+    return re.sub(r"[^a-zA-Z0-9_:]", "_", name)
+
+
+def _labels(attributes, extra: Optional[Dict[str, Any]] = None) -> str:
+    items = {**dict(attributes or {}), **(extra or {})}
+    if not items:
+        return ""
+    body = ",".join(
+        f'{_metric_name(k)}="{str(v).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+        for k, v in sorted(items.items())
+    )
+    return "{" + body + "}"
+
+
+def metrics_text() -> str:
+    """All metrics recorded in this process, in Prometheus text exposition format."""
+    if _metric_reader is None:
+        return ""
+    data = _metric_reader.get_metrics_data()
+    lines: List[str] = []
+    for resource_metrics in data.resource_metrics if data else []:
+        for scope_metrics in resource_metrics.scope_metrics:
+            for metric in scope_metrics.metrics:
+                name = _metric_name(metric.name)
+                counter = isinstance(metric.data, Sum) and metric.data.is_monotonic
+                if counter and not name.endswith("_total"):
+                    # HELP, TYPE and samples must all use the counter's _total name
+                    name = f"{name}_total"
+                if metric.description:
+                    lines.append(f"# HELP {name} {metric.description}")
+                points = metric.data.data_points
+                if isinstance(metric.data, Histogram):
+                    lines.append(f"# TYPE {name} histogram")
+                    for point in points:
+                        cumulative = 0
+                        for bound, count in zip(point.explicit_bounds, point.bucket_counts):
+                            cumulative += count
+                            lines.append(f"{name}_bucket{_labels(point.attributes, {'le': bound})} {cumulative}")
+                        lines.append(f"{name}_bucket{_labels(point.attributes, {'le': '+Inf'})} {point.count}")
+                        lines.append(f"{name}_sum{_labels(point.attributes)} {point.sum}")
+                        lines.append(f"{name}_count{_labels(point.attributes)} {point.count}")
+                elif counter:
+                    lines.append(f"# TYPE {name} counter")
+                    lines.extend(f"{name}{_labels(p.attributes)} {p.value}" for p in points)
+                elif isinstance(metric.data, (Sum, Gauge)):
+                    lines.append(f"# TYPE {name} gauge")
+                    lines.extend(f"{name}{_labels(p.attributes)} {p.value}" for p in points)
+    return "\n".join(lines) + "\n"
+
+
+# --- Context propagation over HTTP ---------------------------------------------------
+
+async def inject_trace_headers(request):
+    """httpx request hook: add W3C trace context headers to outgoing A2A calls."""
+    propagate.inject(request.headers)
+
+
+class TraceContextMiddleware:
+    """ASGI middleware: continue the caller's trace and wrap each request in a server span."""
+
+    def __init__(self, app, skip_paths=("/metrics", "/traces", "/health/ready")):
+        self.app = app
+        self.skip_paths = set(skip_paths)
+        self.tracer = trace.get_tracer(__name__)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.skip_paths:
+            await self.app(scope, receive, send)
+            return
+        headers = {k.decode("latin-1"): v.decode("latin-1") for k, v in scope.get("headers", [])}
+        token = context.attach(propagate.extract(headers))
+        status = {}
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        try:
+            with self.tracer.start_as_current_span(
+                f"{scope['method']} {scope['path']}", kind=SpanKind.SERVER,
+                attributes={"http.request.method": scope["method"], "url.path": scope["path"]},
+            ) as span:
+                await self.app(scope, receive, send_with_status)
+                span.set_attribute("http.response.status_code", status.get("code", 0))
+                if status.get("code", 0) >= 500:
+                    span.set_status(Status(StatusCode.ERROR))
+        finally:
+            context.detach(token)
@@ -0,0 +1,57 @@
+import asyncio
+
+from src.agents.agent_pool import AgentPool
+
+
+def test_acquired_session_survives_eviction_under_pressure():
+    built = []
+
+    def factory():
+        built.append(object())
+        return built[-1]
+
+    pool = AgentPool(factory, max_size=1, idle_ttl=3600)
+
+    async def scenario():
+        async with pool.session("a") as first:
+            # "a" is busy, so the pool is over its size while "b" is acquired
+            async with pool.session("b") as second:
+                assert second is not first
+            async with pool.session("b") as again:
+                assert again is second
+        return pool.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["created"] == 2
+    assert stats["reused"] == 1
+
+
+def test_least_recently_used_idle_session_is_evicted():
+    pool = AgentPool(object, max_size=2, idle_ttl=3600)
+
+    async def scenario():
+        for session_id in ["a", "b", "c"]:
+            async with pool.session(session_id):
+                pass
+        async with pool.session("a"):
+            pass
+        return pool.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["sessions"] == 2
+    assert stats["created"] == 4
+    assert stats["evicted"] == 2
+
+
+def test_unnamed_requests_stay_out_of_the_pool():
+    pool = AgentPool(object)
+
+    async def scenario():
+        async with pool.session(None) as first:
+            pass
+        async with pool.session(None) as second:
+            pass
+        return first is second
+
+    assert asyncio.run(scenario()) is False
+    assert pool.stats()["sessions"] == 0
@@ -0,0 +1,61 @@
+from src.mcp.device_index import DeviceIndex
+
+DEVICES = [
+    {"id": 1, "label": "Kitchen Light", "name": "Generic Z-Wave Switch", "room": "Kitchen",
+     "type": "Generic Z-Wave Switch", "capabilities": ["Switch", "Actuator"]},
+    {"id": 2, "label": "Kitchen Outlet", "name": "Zooz Outlet", "room": "Kitchen",
+     "type": "Zooz Outlet", "capabilities": ["Switch", "Outlet", "PowerMeter"]},
+    {"id": 3, "label": "Office Lamp", "name": "Hue Bulb", "room": "Office",
+     "type": "Hue Bulb", "capabilities": ["Switch", "SwitchLevel"]},
+    {"id": 4, "label": "Office Sensor", "name": "Aeotec MultiSensor 6", "room": "Office",
+     "type": "Aeotec MultiSensor 6", "capabilities": ["TemperatureMeasurement", "MotionSensor"]},
+]
+
+
+def index():
+    idx = DeviceIndex()
+    idx.update(DEVICES)
+    return idx
+
+
+def test_exact_label_ranks_first():
+    results = index().search("kitchen light")
+    assert results[0]["id"] == "1"
+    assert results[0]["score"] > results[1]["score"]
+
+
+def test_prefix_and_typo_still_match():
+    assert index().search("offi lamp")[0]["id"] == "3"
+    assert index().search("kitchn lite")[0]["id"] == "1"
+
+
+def test_capability_filter_and_camel_case_capabilities():
+    assert [d["id"] for d in index().search("kitchen", capability="PowerMeter")] == ["2"]
+    assert index().search("temperature")[0]["id"] == "4"
+
+
+def test_limit_and_no_match():
+    idx = index()
+    assert len(idx.search("kitchen", limit=1)) == 1
+    assert idx.search("garage door") == []
+
+
+def test_update_reindexes_only_changed_devices():
+    idx = index()
+    renamed = [dict(d) for d in DEVICES[:3]]
+    renamed[2]["label"] = "Desk Lamp"
+    # One relabelled, one removed
+    assert idx.update(renamed) == 2
+    assert len(idx) == 3
+    assert idx.search("desk")[0]["id"] == "3"
+    assert idx.search("sensor") == []
+
+
+def test_select_needs_every_word_and_the_capability():
+    idx = index()
+    assert [d["id"] for d in idx.select("kitchen")] == ["1", "2"]
+    assert [d["id"] for d in idx.select("office", capability="Switch")] == ["3"]
+    assert [d["id"] for d in idx.select("kitchen outlets")] == ["2"]
+    # No fuzzy or partial matches when commanding devices in bulk
+    assert idx.select("kitchn") == []
+    assert idx.select("kitchen lamp") == []
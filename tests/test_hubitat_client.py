@@ -0,0 +1,95 @@
+import asyncio
+
+import httpx
+import pytest
+
+from src.mcp.hubitat_client import HubitatClient, HubitatError
+
+
+class FakeHub:
+    """MockTransport handler that fails the first `failures` requests per path with `error`."""
+
+    def __init__(self, error=None, failures=0, delay=0.0):
+        self.error = error
+        self.failures = failures
+        self.delay = delay
+        self.requests = []
+
+    async def __call__(self, request):
+        self.requests.append(request.url.path)
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.requests.count(request.url.path) <= self.failures:
+            if isinstance(self.error, int):
+                return httpx.Response(self.error)
+            raise self.error("hub trouble", request=request)
+        return httpx.Response(200, json={"path": request.url.path})
+
+
+def client_for(hub):
+    return HubitatClient(base_url="http://hub", token="t", max_retries=2, retry_backoff=0,
+                         transport=httpx.MockTransport(hub))
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+@pytest.mark.parametrize("error", [httpx.ReadTimeout, 503])
+def test_command_is_not_resent_once_the_hub_may_have_seen_it(error):
+    hub = FakeHub(error=error, failures=1)
+    client = client_for(hub)
+    with pytest.raises(HubitatError):
+        run(client.get("devices/1/setCode/3,4321,Guest"))
+    assert hub.requests == ["/devices/1/setCode/3,4321,Guest"]
+    assert client.stats()["errors"] == 1
+
+
+@pytest.mark.parametrize("error", [httpx.ConnectError, httpx.ConnectTimeout])
+def test_command_is_retried_when_it_never_reached_the_hub(error):
+    hub = FakeHub(error=error, failures=1)
+    client = client_for(hub)
+    assert run(client.get("devices/1/on")).status_code == 200
+    assert len(hub.requests) == 2
+
+
+@pytest.mark.parametrize("error", [httpx.ReadTimeout, 503])
+def test_reads_are_retried(error):
+    hub = FakeHub(error=error, failures=2)
+    client = client_for(hub)
+    assert run(client.get_json("devices/1")) == {"path": "/devices/1"}
+    assert len(hub.requests) == 3
+    assert client.stats()["retries"] == 2
+
+
+def test_read_still_busy_after_the_last_retry_raises():
+    hub = FakeHub(error=503, failures=10)
+    client = client_for(hub)
+    with pytest.raises(HubitatError):
+        run(client.get_json("devices"))
+    assert len(hub.requests) == 3
+    assert client.stats()["errors"] == 1
+
+
+def test_concurrent_identical_reads_share_one_request():
+    hub = FakeHub(delay=0.05)
+    client = client_for(hub)
+
+    async def burst():
+        return await asyncio.gather(*[client.get_json("devices") for _ in range(5)], client.get_json("devices/1"))
+
+    results = run(burst())
+    assert results[:5] == [{"path": "/devices"}] * 5
+    assert sorted(hub.requests) == ["/devices", "/devices/1"]
+    assert client.stats()["coalesced"] == 4
+
+
+def test_commands_are_never_coalesced():
+    hub = FakeHub(delay=0.05)
+    client = client_for(hub)
+
+    async def burst():
+        return await asyncio.gather(*[client.get("devices/1/push/1") for _ in range(3)])
+
+    run(burst())
+    assert hub.requests == ["/devices/1/push/1"] * 3
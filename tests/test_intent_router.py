@@ -0,0 +1,62 @@
+import asyncio
+import json
+
+import pytest
+
+from src.agents.intent_router import Intent, IntentRouter, parse
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Turn off the kitchen light.", Intent("kitchen light", "off", "Switch", "Turned off {label}.")),
+    ("please switch the office lamp on", Intent("office lamp", "on", "Switch", "Turned on {label}.")),
+    ("Set office lamp to 50%", Intent("office lamp", "setLevel/50", "SwitchLevel", "Set {label} to 50%.")),
+    ("dim my bedroom light at 20 percent", Intent("bedroom light", "setLevel/20", "SwitchLevel", "Set {label} to 20%.")),
+    ("lock the front door", Intent("front door", "lock", "Lock", "Locked {label}.")),
+])
+def test_grammar_matches_simple_commands(text, expected):
+    assert parse(text) == expected
+
+
+@pytest.mark.parametrize("text", [
+    "turn off all the lights",
+    "turn off the kitchen light and the office lamp",
+    "turn on the porch light when it gets dark",
+    "set the office lamp to 150%",
+    "what's the temperature in the office",
+])
+def test_grammar_leaves_everything_else_to_the_agent(text):
+    assert parse(text) is None
+
+
+class FakeMCP:
+    def __init__(self, responses):
+        self.responses = responses
+        self.calls = []
+
+    async def call_tool_async(self, tool_use_id, name, arguments):
+        self.calls.append((name, arguments))
+        return {"status": "success", "content": [{"text": json.dumps(self.responses[name])}]}
+
+
+def test_router_runs_a_clear_match_and_caches_the_device():
+    mcp = FakeMCP({
+        "find_devices": [{"id": "3", "label": "Office Lamp", "score": 1.0}],
+        "control_device": {"status": "ok"},
+    })
+    router = IntentRouter(mcp, min_score=0.9, margin=0.2)
+
+    async def run():
+        return [await router.handle("turn on the office lamp"), await router.handle("turn on the office lamp")]
+
+    assert asyncio.run(run()) == ["Turned on Office Lamp.", "Turned on Office Lamp."]
+    assert [name for name, _ in mcp.calls] == ["find_devices", "control_device", "control_device"]
+
+
+def test_router_falls_back_when_the_device_is_ambiguous():
+    mcp = FakeMCP({"find_devices": [
+        {"id": "1", "label": "Kitchen Light", "score": 0.95},
+        {"id": "2", "label": "Kitchen Light 2", "score": 0.9},
+    ]})
+    router = IntentRouter(mcp, min_score=0.9, margin=0.2)
+    assert asyncio.run(router.handle("turn off the kitchen light")) is None
+    assert router.stats()["fallbacks"] == 1
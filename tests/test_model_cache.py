@@ -0,0 +1,128 @@
+import asyncio
+
+from src.agents.model_cache import CachingModel
+
+
+class CountingModel:
+    """Answers every prompt with its call number."""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def stream(self, messages, tool_specs=None, system_prompt=None, **kwargs):
+        self.calls += 1
+        yield {"messageStart": {"role": "assistant"}}
+        yield {"contentBlockStart": {"start": {}}}
+        yield {"contentBlockDelta": {"delta": {"text": f"answer {self.calls}"}}}
+        yield {"contentBlockStop": {}}
+        yield {"messageStop": {"stopReason": "end_turn"}}
+
+
+def user(text):
+    return {"role": "user", "content": [{"text": text}]}
+
+
+def assistant(text):
+    return {"role": "assistant", "content": [{"text": text}]}
+
+
+def ask(model, messages, system_prompt="You control the house."):
+    async def run():
+        return "".join([
+            e["contentBlockDelta"]["delta"]["text"]
+            async for e in model.stream(messages, None, system_prompt) if "contentBlockDelta" in e
+        ])
+    return asyncio.run(run())
+
+
+def test_repeated_prompt_is_replayed():
+    inner = CountingModel()
+    model = CachingModel(inner, ttl=60)
+    assert ask(model, [user("Is the kitchen light on?")]) == "answer 1"
+    assert ask(model, [user("is the kitchen light on")]) == "answer 1"
+    assert inner.calls == 1
+    assert model.stats()["hits"] == 1
+
+
+def test_key_includes_system_prompt_and_earlier_conversation():
+    inner = CountingModel()
+    model = CachingModel(inner, ttl=60)
+    summarize = user("Please summarize this conversation.")
+    assert ask(model, [user("my door code is 1234"), assistant("ok"), summarize]) == "answer 1"
+    assert ask(model, [user("hi, I'm Bob"), assistant("hello"), summarize]) == "answer 2"
+    assert ask(model, [summarize], system_prompt="Summarize.") == "answer 3"
+    assert model.stats()["hits"] == 0
+
+
+def test_bump_version_retires_cached_answers():
+    inner = CountingModel()
+    model = CachingModel(inner, ttl=60)
+    ask(model, [user("Is the kitchen light on?")])
+    model.bump_version()
+    assert ask(model, [user("Is the kitchen light on?")]) == "answer 2"
+
+
+def test_state_changing_tool_call_invalidates_and_is_not_stored():
+    inner = CountingModel()
+    model = CachingModel(inner, ttl=60)
+    ask(model, [user("Is the kitchen light on?")])
+    turn = [
+        user("Turn on the kitchen light"),
+        {"role": "assistant", "content": [{"toolUse": {"toolUseId": "t1", "name": "control_device",
+                                                       "input": {"device_id": "1", "command": "on"}}}]},
+        {"role": "user", "content": [{"toolResult": {"toolUseId": "t1", "status": "success",
+                                                      "content": [{"text": "ok"}]}}]},
+    ]
+    ask(model, turn)
+    assert model.stats()["bypassed"] == 1
+    assert model.tool_state_version == 1
+    assert ask(model, [user("Is the kitchen light on?")]) == "answer 3"
+
+
+def test_read_only_tool_turns_are_cached():
+    inner = CountingModel()
+    model = CachingModel(inner, ttl=60)
+    turn = [
+        user("What is the office temperature?"),
+        {"role": "assistant", "content": [{"toolUse": {"toolUseId": "t1", "name": "device_details",
+                                                       "input": {"device_id": "4"}}}]},
+        {"role": "user", "content": [{"toolResult": {"toolUseId": "t1", "status": "success",
+                                                      "content": [{"text": "70"}]}}]},
+    ]
+    ask(model, turn)
+    assert ask(model, [user("What is the office temperature?")]) == "answer 1"
+    assert model.tool_state_version == 0
+
+
+def test_entries_expire():
+    inner = CountingModel()
+    model = CachingModel(inner, ttl=0)
+    ask(model, [user("Is the kitchen light on?")])
+    assert ask(model, [user("Is the kitchen light on?")]) == "answer 2"
+
+
+def test_standalone_status_question_hits_mid_session():
+    inner = CountingModel()
+    model = CachingModel(inner, ttl=60)
+    question = user("Is the kitchen light on?")
+    assert ask(model, [question]) == "answer 1"
+    session = [user("hello"), assistant("hi"), question, assistant("answer 1"), user("thanks"), assistant("sure")]
+    assert ask(model, session + [user("is the kitchen light on")]) == "answer 1"
+    assert model.stats()["mid_session_hits"] == 1
+
+
+def test_follow_up_questions_depend_on_the_conversation():
+    inner = CountingModel()
+    model = CachingModel(inner, ttl=60)
+    follow_up = user("What about that one?")
+    assert ask(model, [user("Is the kitchen light on?"), assistant("yes"), follow_up]) == "answer 1"
+    assert ask(model, [user("Is the porch light on?"), assistant("no"), follow_up]) == "answer 2"
+
+
+def test_is_standalone():
+    from src.agents.model_cache import is_standalone, normalize_prompt
+
+    for prompt in ["Is the kitchen light on?", "What's the office temperature", "show me the thermostat"]:
+        assert is_standalone(normalize_prompt(prompt)), prompt
+    for prompt in ["Is it on?", "What is my name?", "Summarize this conversation", "turn on the lamp"]:
+        assert not is_standalone(normalize_prompt(prompt)), prompt
@@ -0,0 +1,94 @@
+import asyncio
+
+from src.agents.model_router import TieredModel
+
+
+class FakeModel:
+    """Replies with text or a tool call and records how much of each reply was read."""
+
+    def __init__(self, reply):
+        self.reply = reply
+        self.calls = 0
+        self.events_read = 0
+
+    def update_config(self, **config):
+        pass
+
+    def get_config(self):
+        return {}
+
+    async def stream(self, messages, tool_specs=None, system_prompt=None, **kwargs):
+        self.calls += 1
+        events = [{"messageStart": {"role": "assistant"}}]
+        if self.reply == "tool":
+            events += [
+                {"contentBlockStart": {"start": {"toolUse": {"toolUseId": "t1", "name": "list_devices"}}}},
+                {"contentBlockDelta": {"delta": {"toolUse": {"input": "{}"}}}},
+                {"contentBlockStop": {}},
+                {"messageStop": {"stopReason": "tool_use"}},
+            ]
+        else:
+            events += [{"contentBlockStart": {"start": {}}}]
+            events += [{"contentBlockDelta": {"delta": {"text": word}}} for word in ["\n", "The ", "light ", "is ", "on."]]
+            events += [{"contentBlockStop": {}}, {"messageStop": {"stopReason": "end_turn"}}]
+        for event in events:
+            self.events_read += 1
+            yield event
+
+
+TOOLS = [{"name": "list_devices"}]
+PROMPT = [{"role": "user", "content": [{"text": "Is the light on?"}]}]
+AFTER_TOOLS = PROMPT + [
+    {"role": "assistant", "content": [{"toolUse": {"toolUseId": "t1", "name": "list_devices", "input": {}}}]},
+    {"role": "user", "content": [{"toolResult": {"toolUseId": "t1", "status": "success", "content": [{"text": "[]"}]}}]},
+]
+
+
+def run(model, messages, tools=TOOLS):
+    async def collect():
+        return [e async for e in model.stream(messages, tools, None)]
+    return asyncio.run(collect())
+
+
+def text_of(events):
+    return "".join(e["contentBlockDelta"]["delta"].get("text", "") for e in events if "contentBlockDelta" in e)
+
+
+def test_tool_call_stays_on_the_small_model():
+    small, large = FakeModel("tool"), FakeModel("text")
+    router = TieredModel(small, large)
+    events = run(router, PROMPT)
+    assert any("toolUse" in e.get("contentBlockStart", {}).get("start", {}) for e in events)
+    assert (small.calls, large.calls) == (1, 0)
+
+
+def test_free_form_answer_escalates_without_finishing_the_small_reply():
+    small, large = FakeModel("text"), FakeModel("text")
+    router = TieredModel(small, large)
+    assert text_of(run(router, PROMPT)) == "\nThe light is on."
+    assert large.calls == 1
+    # Stopped at the first word of text, not after the whole generation
+    assert small.events_read == 4
+    assert router.stats()["escalations"]["free_form"] == 1
+
+
+def test_final_answer_after_tools_escalates():
+    small, large = FakeModel("text"), FakeModel("text")
+    router = TieredModel(small, large)
+    run(router, AFTER_TOOLS)
+    assert large.calls == 1
+    assert router.stats()["escalations"]["synthesis"] == 1
+
+
+def test_no_tools_goes_straight_to_large():
+    small, large = FakeModel("text"), FakeModel("text")
+    router = TieredModel(small, large)
+    run(router, PROMPT, tools=None)
+    assert (small.calls, large.calls) == (0, 1)
+
+
+def test_small_synthesis_keeps_answers_on_the_small_model():
+    small, large = FakeModel("text"), FakeModel("text")
+    router = TieredModel(small, large, synthesis="small")
+    assert text_of(run(router, AFTER_TOOLS)) == "\nThe light is on."
+    assert (small.calls, large.calls) == (1, 0)
@@ -0,0 +1,59 @@
+import time
+
+from src.agents import llm_provider
+from src.agents.llm_provider import ModelWarmer
+
+
+class FlakyOllama:
+    """Stands in for an Ollama model whose server comes up after `failures` pings."""
+
+    def __init__(self, failures):
+        self.failures = failures
+        self.pings = 0
+
+
+def warmer_for(model, monkeypatch, **kwargs):
+    monkeypatch.setattr(llm_provider, "_is_ollama", lambda m: isinstance(m, FlakyOllama))
+
+    def ping(self, m):
+        m.pings += 1
+        return m.pings > m.failures
+
+    monkeypatch.setattr(ModelWarmer, "_ping", ping)
+    return ModelWarmer(model, **kwargs)
+
+
+def test_failed_warm_up_is_retried_quickly(monkeypatch):
+    model = FlakyOllama(failures=2)
+    warmer = warmer_for(model, monkeypatch, interval=0, retry_delay=0.01)
+    warmer.start()
+    try:
+        assert warmer.ready.wait(2)
+        assert model.pings == 3
+    finally:
+        warmer.stop()
+
+
+def test_wait_ready_returns_once_the_first_attempt_fails(monkeypatch):
+    warmer = warmer_for(FlakyOllama(failures=1000), monkeypatch, interval=0, retry_delay=60)
+    warmer.start()
+    try:
+        start = time.monotonic()
+        assert warmer.wait_ready(timeout=30) is False
+        assert time.monotonic() - start < 5
+    finally:
+        warmer.stop()
+
+
+def test_keep_warm_pings_after_ready(monkeypatch):
+    model = FlakyOllama(failures=0)
+    warmer = warmer_for(model, monkeypatch, interval=0.01)
+    warmer.start()
+    try:
+        assert warmer.wait_ready(timeout=2)
+        deadline = time.monotonic() + 2
+        while model.pings < 3 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert model.pings >= 3
+    finally:
+        warmer.stop()
@@ -0,0 +1,87 @@
+import asyncio
+
+import pytest
+
+from src.mcp.scenes import SceneError, _stages, compile_scene, scene_key
+
+DEVICES = [
+    {"id": "1", "label": "Front Door", "room": "Hall", "capabilities": ["Lock"]},
+    {"id": "2", "label": "Kitchen Light", "room": "Kitchen", "capabilities": ["Switch"]},
+    {"id": "3", "label": "Fridge Outlet", "room": "Kitchen", "capabilities": ["Switch", "Outlet"]},
+    {"id": "4", "label": "Hall Thermostat", "room": "Hall", "capabilities": ["Thermostat"]},
+]
+COMMANDS = {"1": ["lock", "unlock"], "2": ["on", "off"], "3": ["on", "off"], "4": [{"command": "setHeatingSetpoint"}]}
+
+
+async def get_commands(device_id):
+    return COMMANDS[device_id]
+
+
+def compile_(definition):
+    return asyncio.run(compile_scene("goodnight", definition, DEVICES, get_commands))
+
+
+def test_stages_follow_dependencies():
+    after = {"lock": set(), "lights": set(), "heat": {"lock"}, "report": {"heat", "lights"}}
+    assert _stages(after, ["lock", "lights", "heat", "report"]) == [["lock", "lights"], ["heat"], ["report"]]
+
+
+def test_stages_detect_cycles():
+    assert _stages({"a": {"b"}, "b": {"a"}}, ["a", "b"]) is None
+
+
+def test_compile_resolves_selectors_and_orders_steps():
+    scene = compile_({"steps": [
+        {"id": "lock", "select": {"capability": "Lock"}, "command": "lock"},
+        {"id": "lights", "select": {"capability": "Switch", "exclude": ["Fridge Outlet"]}, "command": "off"},
+        {"id": "heat", "devices": ["hall thermostat"], "command": "setHeatingSetpoint/66", "after": ["lock"]},
+    ]})
+    assert scene.valid, scene.errors
+    assert [[(a.device_id, a.command) for a in stage] for stage in scene.stages] == [
+        [("1", "lock"), ("2", "off")],
+        [("4", "setHeatingSetpoint/66")],
+    ]
+
+
+def test_compile_reports_every_problem():
+    scene = compile_({"steps": [
+        {"id": "a", "devices": ["Garage Door"], "command": "close"},
+        {"id": "b", "select": {"room": "Kitchen"}, "command": "lock"},
+        {"id": "c", "devices": ["Front Door"], "command": "lock", "after": ["missing"]},
+        {"id": "d", "command": "off"},
+    ]})
+    assert not scene.valid
+    assert "a: no device named 'Garage Door'" in scene.errors
+    assert "b: 'Kitchen Light' has no command 'lock'" in scene.errors
+    assert "c: after unknown step 'missing'" in scene.errors
+    assert "d: needs devices or select" in scene.errors
+
+
+def test_compile_rejects_circular_steps():
+    scene = compile_({"steps": [
+        {"id": "a", "devices": ["1"], "command": "lock", "after": ["b"]},
+        {"id": "b", "devices": ["2"], "command": "off", "after": ["a"]},
+    ]})
+    assert scene.errors == ["steps have circular 'after' dependencies"]
+
+
+def test_compile_needs_steps():
+    with pytest.raises(SceneError):
+        compile_({"description": "nothing to do"})
+
+
+def test_failed_step_skips_its_dependents():
+    scene = compile_({"steps": [
+        {"id": "lock", "devices": ["Front Door"], "command": "lock"},
+        {"id": "heat", "devices": ["Hall Thermostat"], "command": "setHeatingSetpoint/66", "after": ["lock"]},
+    ]})
+
+    async def send(device_id, command):
+        return "error" if device_id == "1" else "ok"
+
+    results = asyncio.run(scene.run(send))
+    assert [(r["step"], r["status"]) for r in results] == [("lock", "error"), ("heat", "skipped")]
+
+
+def test_scene_key_ignores_case_and_spacing():
+    assert scene_key("Good Night!") == scene_key("goodnight")
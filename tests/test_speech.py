@@ -0,0 +1,114 @@
+import math
+import wave
+from array import array
+
+import pytest
+
+from src.speech import SAMPLE_RATE, SpeechPipeline, VadChunker, WavSource
+
+
+def write_wav(path, segments):
+    """16-bit mono WAV of (seconds, amplitude) segments: quiet noise or a 440 Hz tone."""
+    samples = array("h")
+    for seconds, amplitude in segments:
+        for i in range(int(seconds * SAMPLE_RATE)):
+            tone = math.sin(2 * math.pi * 440 * i / SAMPLE_RATE)
+            samples.append(int(amplitude * tone) if amplitude else (7 if i % 2 else -7))
+    with wave.open(str(path), "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(SAMPLE_RATE)
+        wav.writeframes(samples.tobytes())
+
+
+class LengthRecognizer:
+    """Transcribes each utterance as its length, so results can be checked without a model."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def transcribe(self, audio, sample_rate):
+        self.calls += 1
+        return f"{len(audio) / 2 / sample_rate:.1f}s"
+
+
+@pytest.fixture
+def fixture_wav(tmp_path):
+    path = tmp_path / "two_utterances.wav"
+    # Calibration silence, two spoken phrases separated by a pause, trailing silence
+    write_wav(path, [(1.0, 0), (0.9, 8000), (1.0, 0), (1.5, 8000), (1.0, 0)])
+    return path
+
+
+def test_pipeline_transcribes_wav_utterances_in_order(fixture_wav):
+    recognizer = LengthRecognizer()
+    pipeline = SpeechPipeline(WavSource(str(fixture_wav)), recognizer, workers=2)
+    pipeline.start()
+    transcripts = list(pipeline.transcripts(timeout=10))
+
+    assert [t.seq for t in transcripts] == [0, 1]
+    # Each utterance is the phrase plus pre-roll and hangover, never the silence between them
+    first, second = (t.audio_seconds for t in transcripts)
+    assert 0.9 <= first < 2.0
+    assert 1.5 <= second < 2.6
+    assert second > first
+    stats = pipeline.stats()
+    assert stats["utterances"] == 2
+    assert stats["dropped"] == 0
+
+
+def test_silence_only_yields_nothing(tmp_path):
+    path = tmp_path / "silence.wav"
+    write_wav(path, [(2.0, 0)])
+    recognizer = LengthRecognizer()
+    pipeline = SpeechPipeline(WavSource(str(path)), recognizer)
+    pipeline.start()
+    assert list(pipeline.transcripts(timeout=10)) == []
+    assert recognizer.calls == 0
+
+
+def test_wav_source_rejects_stereo(tmp_path):
+    path = tmp_path / "stereo.wav"
+    with wave.open(str(path), "wb") as wav:
+        wav.setnchannels(2)
+        wav.setsampwidth(2)
+        wav.setframerate(SAMPLE_RATE)
+        wav.writeframes(b"\0\0" * 200)
+    with pytest.raises(ValueError):
+        WavSource(str(path))
+
+
+def test_chunker_splits_at_max_length():
+    chunker = VadChunker(max_utterance_s=0.3, is_speech=lambda frame: True, start_frames=1)
+    frame = b"\1\0" * (SAMPLE_RATE * 30 // 1000)
+    utterances = [u for u in (chunker.process(frame) for _ in range(25)) if u is not None]
+    assert len(utterances) >= 2
+    assert all(u.seconds <= 0.3 + 1e-9 for u in utterances)
+
+
+def test_default_recognizer_stays_offline(monkeypatch):
+    from src import speech
+
+    def broken():
+        raise RuntimeError("not set up")
+
+    monkeypatch.delenv("SPEECH_RECOGNIZER", raising=False)
+    monkeypatch.delenv("SPEECH_ALLOW_ONLINE", raising=False)
+    monkeypatch.setitem(speech.RECOGNIZERS, "vosk", broken)
+    monkeypatch.setitem(speech.RECOGNIZERS, "whisper", broken)
+    with pytest.raises(RuntimeError, match="SPEECH_ALLOW_ONLINE"):
+        speech.get_recognizer()
+
+
+def test_vosk_model_errors_become_runtime_errors(monkeypatch, tmp_path):
+    import sys
+    import types
+
+    from src import speech
+
+    def model(path):
+        raise Exception(f"Failed to create a model from {path}")
+
+    monkeypatch.setitem(sys.modules, "vosk", types.SimpleNamespace(SetLogLevel=lambda level: None, Model=model))
+    with pytest.raises(RuntimeError, match="Could not load the Vosk model"):
+        speech.VoskRecognizer(str(tmp_path / "missing"))
@@ -0,0 +1,50 @@
+import time
+
+from src.mcp.state_store import DeviceStateStore
+
+DETAILS = {
+    "id": "42",
+    "label": "Office Sensor",
+    "attributes": [
+        {"name": "temperature", "currentValue": 70.0, "dataType": "NUMBER"},
+        {"name": "motion", "currentValue": "inactive", "dataType": "ENUM"},
+    ],
+}
+
+
+def test_details_untrusted_until_an_event_arrives():
+    store = DeviceStateStore()
+    store.seed(DETAILS)
+    assert not store.feed_active
+    assert store.details("42") is None
+
+
+def test_event_overrides_seeded_value():
+    store = DeviceStateStore()
+    store.seed(DETAILS)
+    assert store.apply_event({"content": {"deviceId": 42, "name": "temperature", "value": 72.5}}) == "42"
+    details = store.details("42")
+    values = {a["name"]: a["currentValue"] for a in details["attributes"]}
+    assert values == {"temperature": 72.5, "motion": "inactive"}
+    # The seeded snapshot itself is left untouched
+    assert DETAILS["attributes"][0]["currentValue"] == 70.0
+
+
+def test_events_without_device_or_attribute_are_ignored():
+    store = DeviceStateStore()
+    assert store.apply_event({"content": {"name": "temperature", "value": 1}}) is None
+    assert store.apply_event({"content": {"deviceId": 1, "value": 1}}) is None
+    assert store.apply_event({"content": ["deviceId", 1]}) is None
+    assert store.events_received == 0
+
+
+def test_mark_stale_and_max_age():
+    store = DeviceStateStore(max_age=60)
+    store.seed(DETAILS)
+    store.apply_event({"deviceId": "42", "name": "motion", "value": "active"})
+    assert store.is_fresh("42")
+    store.mark_stale("42")
+    assert store.details("42") is None
+
+    store.update("42", "motion", "inactive", timestamp=time.time() - 120)
+    assert not store.is_fresh("42")
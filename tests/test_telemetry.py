@@ -0,0 +1,19 @@
+from opentelemetry.sdk.metrics import MeterProvider
+from opentelemetry.sdk.metrics.export import InMemoryMetricReader
+
+from src import telemetry
+
+
+def test_metrics_text_uses_one_name_per_family(monkeypatch):
+    reader = InMemoryMetricReader()
+    meter = MeterProvider(metric_readers=[reader]).get_meter("test")
+    monkeypatch.setattr(telemetry, "_metric_reader", reader)
+
+    meter.create_counter("hub.requests", description="Requests sent to the hub").add(2, {"status": "200"})
+    meter.create_histogram("hub.request.duration", description="Hub response time").record(0.03)
+    text = telemetry.metrics_text()
+
+    assert "# HELP hub_requests_total Requests sent to the hub\n# TYPE hub_requests_total counter\n" in text
+    assert 'hub_requests_total{status="200"} 2\n' in text
+    assert "# HELP hub_request_duration Hub response time\n# TYPE hub_request_duration histogram\n" in text
+    assert "hub_request_duration_count 1\n" in text
@@ -0,0 +1,75 @@
+import time
+
+from src.mcp.timeseries import RingSeries, SeriesStore
+
+
+def test_ring_keeps_newest_samples_in_order():
+    series = RingSeries(3)
+    for t in range(5):
+        series.append(float(t), t * 10.0)
+    timestamps, values = series.ordered()
+    assert list(timestamps) == [2.0, 3.0, 4.0]
+    assert list(values) == [20.0, 30.0, 40.0]
+
+
+def test_ingest_skips_untracked_and_non_numeric():
+    store = SeriesStore(attributes={"temperature"})
+    assert store.ingest("1", "temperature", "71.5")
+    assert not store.ingest("1", "temperature", "warm")
+    assert not store.ingest("1", "switch", "on")
+
+
+def test_history_merge_and_stats_window():
+    store = SeriesStore(attributes={"temperature"})
+    now = time.time()
+    events = [
+        {"name": "temperature", "value": "68", "date": time.strftime("%Y-%m-%dT%H:%M:%S+0000", time.gmtime(now - 7200))},
+        {"name": "temperature", "value": "70", "date": time.strftime("%Y-%m-%dT%H:%M:%S+0000", time.gmtime(now - 1800))},
+        {"name": "switch", "value": "on", "date": time.strftime("%Y-%m-%dT%H:%M:%S+0000", time.gmtime(now - 60))},
+    ]
+    assert store.ingest_history("1", events) == 2
+    store.ingest("2", "temperature", 74, timestamp=now - 60)
+
+    stats = store.stats(["1", "2", "3"], "temperature", since=now - 3600, until=now)
+    assert stats["devices"]["1"]["count"] == 1
+    assert stats["devices"]["3"] == {"count": 0}
+    assert stats["combined"]["min"] == 70
+    assert stats["combined"]["max"] == 74
+    assert stats["combined"]["last"] == 74
+
+
+def test_downsample_buckets():
+    store = SeriesStore(attributes={"power"})
+    for t, value in [(0, 10), (1, 20), (5, 30)]:
+        store.ingest("1", "power", value, timestamp=1000.0 + t)
+    assert store.downsample("1", "power", 1000.0, 1006.0, buckets=3) == [[1000.0, 15.0], [1002.0, None], [1004.0, 30.0]]
+
+
+def test_backfill_needed_again_once_stale(monkeypatch):
+    store = SeriesStore(backfill_ttl=300)
+    clock = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: clock[0])
+    assert store.needs_backfill("1")
+    store.ingest_history("1", [])
+    assert not store.needs_backfill("1")
+    clock[0] += 301
+    assert store.needs_backfill("1")
+    # Pushed events keep the series current without another pull
+    store.ingest("1", "temperature", 70)
+    assert not store.needs_backfill("1")
+
+
+def test_pushed_reading_is_not_counted_again_when_history_arrives():
+    store = SeriesStore(attributes={"temperature"}, dedup_window=30)
+    hub_time = 1_700_000_000
+    # Pushed events are stamped when they arrive, a little after the hub recorded them
+    store.ingest("1", "temperature", "70.5", timestamp=hub_time + 2)
+    store.ingest("1", "temperature", "71", timestamp=hub_time + 62)
+    store.ingest_history("1", [
+        {"name": "temperature", "value": "70.5", "date": "2023-11-14T22:13:20+0000"},
+        {"name": "temperature", "value": "71", "date": "2023-11-14T22:14:20+0000"},
+        {"name": "temperature", "value": "71", "date": "2023-11-14T22:15:20+0000"},
+    ])
+    stats = store.stats(["1"], "temperature")["devices"]["1"]
+    assert stats["count"] == 3
+    assert store._series[("1", "temperature")].ordered()[0].tolist() == [hub_time, hub_time + 60, hub_time + 120]